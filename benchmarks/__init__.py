@@ -0,0 +1,9 @@
+"""Micro benchmarks for the interpreter
+
+These are not tests, they print timings that help to evaluate performance work.
+Run them from the root of the repository, for example:
+
+    .. code::
+
+        python -m benchmarks.action_dispatch
+"""
@@ -0,0 +1,62 @@
+"""Compare the dispatch table in `Machine.act` to the name based dispatch it replaced
+
+The old dispatch translated the action's class name to snake case and used `getattr` for every action.
+"""
+import timeit
+
+from jawa.constants import ConstantPool
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.actions import Push, Pop, IncrementProgramCounter
+from pyjvm.core.class_loaders import FixedClassLoader
+from pyjvm.core.frame import Frame
+from pyjvm.core.jvm_class import JvmClass, BytecodeMethod
+from pyjvm.core.jvm_types import Integer
+from pyjvm.core.machine import Machine, _to_snake_case
+from pyjvm.utils.utils import named_tuple_replace
+
+ROUNDS = 100000
+VALUE = Integer.create_instance(1)
+ACTIONS = (Push(VALUE), Pop(), IncrementProgramCounter())
+
+
+def _machine():
+    method = BytecodeMethod(
+        name='method',
+        descriptor='()V',
+        instructions=[named_tuple_replace(Instruction.create('nop'), pos=i) for i in range(ROUNDS + 1)],
+        max_locals=0,
+        max_stack=2,
+        args=[]
+    )
+    jvm_class = JvmClass('SomeClass', 'java/lang/Object', ConstantPool(), methods={})
+    machine = Machine(FixedClassLoader({}))
+    machine.frames.push(Frame.from_class_and_method(jvm_class, method))
+    return machine
+
+
+def _by_name(machine, action):
+    getattr(machine, _to_snake_case(action.__class__.__name__))(action)
+
+
+def _time(dispatch):
+    machine = _machine()
+
+    def run():
+        for action in ACTIONS:
+            dispatch(machine, action)
+
+    return timeit.timeit(run, number=ROUNDS)
+
+
+def main():
+    by_name = _time(_by_name)
+    by_table = _time(Machine.act)
+    per_action = len(ACTIONS) * ROUNDS
+    print(f'{per_action} actions')
+    print(f'name based dispatch: {by_name:.3f}s ({by_name / per_action * 1e9:.0f}ns per action)')
+    print(f'table dispatch:      {by_table:.3f}s ({by_table / per_action * 1e9:.0f}ns per action)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Compare loading classes from class files with loading them from a `ClassCache`
+
+Loading from a class file parses it with jawa and converts it, see `convert_class_file`. In both cases the instructions
+of methods are only created when they are first used, see `BytecodeMethod.deferred`.
+The generated classes have `METHODS` methods each. When the standard library is available, loading a set of
+its classes with a `TraditionalLoader` is timed as well, without a cache, with a cold cache and with a warm one.
+"""
+import io
+import tempfile
+import timeit
+from pathlib import Path
+
+from jawa.assemble import Label, assemble
+from jawa.cf import ClassFile
+
+from pyjvm.core.class_cache import ClassCache, entry_stamp
+from pyjvm.core.class_loaders import TraditionalLoader
+from pyjvm.utils.jawa_conversions import convert_class_file
+from pyjvm.utils.utils import path_to_std_lib
+
+CLASSES = 100
+METHODS = 20
+STANDARD_CLASSES = [
+    'java/lang/String', 'java/lang/StringBuilder', 'java/lang/Integer', 'java/lang/Math', 'java/lang/System',
+    'java/util/ArrayList', 'java/util/HashMap', 'java/util/Arrays', 'java/lang/Throwable', 'java/lang/Character'
+]
+
+
+def class_file_bytes(name):
+    """Return the bytes of a class file with `METHODS` methods that sum the numbers below 10"""
+    cf = ClassFile.create(name)
+    for index in range(METHODS):
+        method = cf.methods.create(f'method{index}', '()I', code=True)
+        method.access_flags.set('acc_static', True)
+        method.code.max_stack = 4
+        method.code.max_locals = 3
+        method.code.assemble(assemble([
+            ('iconst_0',),
+            ('istore_1',),
+            ('iconst_0',),
+            ('istore_2',),
+            Label('loop'),
+            ('iload_2',),
+            ('bipush', 10),
+            ('if_icmpge', Label('done')),
+            ('iload_1',),
+            ('iload_2',),
+            ('iadd',),
+            ('istore_1',),
+            ('iinc', 2, 1),
+            ('goto', Label('loop')),
+            Label('done'),
+            ('iload_1',),
+            ('ireturn',)
+        ]))
+    out = io.BytesIO()
+    cf.save(out)
+    return out.getvalue()
+
+
+def _generated_classes(directory):
+    names = [f'Generated{index}' for index in range(CLASSES)]
+    files = {name: class_file_bytes(name) for name in names}
+    entry = directory / 'classes.jar'
+    entry.write_bytes(b''.join(files.values()))
+    stamp = entry_stamp(entry)
+
+    def convert():
+        for data in files.values():
+            convert_class_file(ClassFile(io.BytesIO(data)))
+
+    def from_cache():
+        cache = ClassCache(directory / 'cache')
+        for name in names:
+            cache.get(stamp, name)
+
+    cache = ClassCache(directory / 'cache')
+    for name, data in files.items():
+        cache.put(stamp, name, convert_class_file(ClassFile(io.BytesIO(data))))
+
+    print(f'{CLASSES} generated classes with {METHODS} methods each:')
+    for title, load in [('class files', convert), ('class cache', from_cache)]:
+        seconds = timeit.timeit(load, number=3) / 3
+        print(f'  {title}: {seconds * 1000:.1f}ms')
+
+
+def _standard_classes(directory):
+    def load(cache_directory):
+        loader = TraditionalLoader('', cache_directory=cache_directory)
+        for name in STANDARD_CLASSES:
+            loader.get_the_class(name)
+
+    print(f'{len(STANDARD_CLASSES)} standard library classes and their ancestors:')
+    runs = [('no cache', None), ('cold cache', directory / 'std'), ('warm cache', directory / 'std')]
+    for title, cache_directory in runs:
+        seconds = timeit.timeit(lambda: load(cache_directory), number=1)
+        print(f'  {title}: {seconds * 1000:.1f}ms')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        _generated_classes(directory)
+        if path_to_std_lib().exists():
+            _standard_classes(directory)
+        else:
+            print('The standard library is missing, skipping the TraditionalLoader timings')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Compare finding and reading class files with a `ClassPath` and with jawa's ClassLoader
+
+The classpath has `JARS` generated JARs with `CLASSES_PER_JAR` classes each. Every class is read once,
+and names that are not on the classpath are looked up `MISS_ROUNDS` times.
+"""
+import io
+import tempfile
+import time
+from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from jawa.cf import ClassFile
+from jawa.classloader import ClassLoader as JawaLoader
+
+from pyjvm.core.class_path import ClassPath
+
+JARS = 200
+CLASSES_PER_JAR = 50
+MISS_ROUNDS = 10
+
+
+def _class_bytes(name):
+    out = io.BytesIO()
+    ClassFile.create(name).save(out)
+    return out.getvalue()
+
+
+def _jars(directory):
+    paths = []
+    names = []
+    for jar_index in range(JARS):
+        path = directory / f'library{jar_index}.jar'
+        with ZipFile(path, 'w', compression=ZIP_DEFLATED) as archive:
+            for class_index in range(CLASSES_PER_JAR):
+                name = f'library{jar_index}/Class{class_index}'
+                archive.writestr(f'{name}.class', _class_bytes(name))
+                names.append(name)
+        paths.append(str(path))
+    return paths, names
+
+
+def _time(title, function):
+    start = time.perf_counter()
+    function()
+    print(f'  {title}: {(time.perf_counter() - start) * 1000:.1f}ms')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        paths, names = _jars(Path(directory))
+        missing = [f'missing/Class{index}' for index in range(1000)]
+        print(f'{JARS} JARs with {CLASSES_PER_JAR} classes each:')
+
+        class_path = None
+        jawa_loader = None
+
+        def create_class_path():
+            nonlocal class_path
+            class_path = ClassPath(paths)
+
+        def create_jawa_loader():
+            nonlocal jawa_loader
+            jawa_loader = JawaLoader(*paths)
+
+        def class_path_misses():
+            for _ in range(MISS_ROUNDS):
+                for name in missing:
+                    name in class_path
+
+        def jawa_misses():
+            for _ in range(MISS_ROUNDS):
+                for name in missing:
+                    name in jawa_loader
+
+        def class_path_reads():
+            for name in names:
+                class_path.read(name)
+
+        def jawa_reads():
+            for name in names:
+                with jawa_loader.open(f'{name}.class') as source:
+                    source.read()
+
+        _time('ClassPath index', create_class_path)
+        _time('jawa index', create_jawa_loader)
+        _time('ClassPath reads', class_path_reads)
+        _time('jawa reads', jawa_reads)
+        _time('ClassPath misses', class_path_misses)
+        _time('jawa misses', jawa_misses)
+        class_path.close()
+
+
+if __name__ == '__main__':
+    main()
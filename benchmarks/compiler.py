@@ -0,0 +1,15 @@
+"""Compare the direct engine with and without the compiler on the summing loop of `benchmarks.superinstructions`"""
+import timeit
+
+from benchmarks.superinstructions import loop_class, run_loop, ITERATIONS, ROUNDS
+
+
+def main():
+    jvm_class = loop_class()
+    for name, threshold in [('interpreted', None), ('compiled', 1)]:
+        seconds = timeit.timeit(lambda: run_loop(jvm_class, compile_threshold=threshold), number=ROUNDS) / ROUNDS
+        print(f'{name}: {seconds * 1000:.1f}ms for {ITERATIONS} iterations')
+
+
+if __name__ == '__main__':
+    main()
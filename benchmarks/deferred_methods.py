@@ -0,0 +1,41 @@
+"""Measure the time and memory of converting classes, with their methods deferred and with all of them loaded
+
+`convert_class_file` defers the code of methods until it is first used, see `BytecodeMethod.deferred`.
+Loading every method shows what converting used to cost, when all methods were disassembled eagerly.
+"""
+import io
+import time
+import tracemalloc
+
+from jawa.cf import ClassFile
+
+from benchmarks.class_cache import class_file_bytes, CLASSES, METHODS
+from pyjvm.utils.jawa_conversions import convert_class_file
+
+
+def _convert(files, load_methods):
+    classes = []
+    for data in files:
+        jvm_class = convert_class_file(ClassFile(io.BytesIO(data)))
+        if load_methods:
+            for method in jvm_class.methods.values():
+                method.instructions
+        classes.append(jvm_class)
+    return classes
+
+
+def main():
+    files = [class_file_bytes(f'Generated{index}') for index in range(CLASSES)]
+    print(f'{CLASSES} generated classes with {METHODS} methods each:')
+    for title, load_methods in [('deferred', False), ('all methods loaded', True)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        classes = _convert(files, load_methods)
+        seconds = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'  {title}: {seconds * 1000:.1f}ms, {size / 1024:.0f}KiB for {len(classes)} classes')
+
+
+if __name__ == '__main__':
+    main()
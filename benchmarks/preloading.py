@@ -0,0 +1,49 @@
+"""Compare loading classes one at a time with preloading them in a pool of processes first
+
+A JAR with `CLASSES` generated classes of `METHODS` methods each is put on the classpath, see benchmarks/class_cache.py.
+Every class is then loaded, either directly or after `TraditionalLoader.preload`. Loading a class includes
+its methods' code, as running would. `TraditionalLoader` needs the standard library.
+"""
+import tempfile
+import time
+from pathlib import Path
+from zipfile import ZipFile
+
+from benchmarks.class_cache import class_file_bytes, CLASSES, METHODS
+from pyjvm.core.class_loaders import TraditionalLoader
+from pyjvm.utils.utils import path_to_std_lib
+
+WORKERS = (1, 2, 4)
+
+
+def _load_all(loader, names):
+    for name in names:
+        for method in loader.get_the_class(name).methods.values():
+            method.instructions
+
+
+def main():
+    if not path_to_std_lib().exists():
+        print('The standard library is missing, TraditionalLoader cannot be created')
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        jar = Path(directory) / 'classes.jar'
+        names = [f'Generated{index}' for index in range(CLASSES)]
+        with ZipFile(jar, 'w') as archive:
+            for name in names:
+                archive.writestr(f'{name}.class', class_file_bytes(name))
+
+        print(f'{CLASSES} generated classes with {METHODS} methods each:')
+        start = time.perf_counter()
+        _load_all(TraditionalLoader(str(jar)), names)
+        print(f'  one at a time: {(time.perf_counter() - start) * 1000:.1f}ms')
+        for workers in WORKERS:
+            start = time.perf_counter()
+            loader = TraditionalLoader(str(jar))
+            loader.preload(names, workers=workers)
+            _load_all(loader, names)
+            print(f'  preloaded by {workers} workers: {(time.perf_counter() - start) * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Compare the tail-backed `Stack` to the head-backed list it replaced
+
+The old stack inserted and removed values at the start of its list, so every operation moved all the other values.
+"""
+import timeit
+
+from pyjvm.core.stack import Stack
+
+DEPTHS = (10, 1000, 10000)
+
+
+class HeadStack:
+    def __init__(self):
+        self._values = []
+
+    def push(self, value):
+        self._values.insert(0, value)
+
+    def pop(self):
+        return self._values.pop(0)
+
+
+def _fill_and_drain(stack, depth):
+    for value in range(depth):
+        stack.push(value)
+    for _ in range(depth):
+        stack.pop()
+
+
+def main():
+    for depth in DEPTHS:
+        head = timeit.timeit(lambda: _fill_and_drain(HeadStack(), depth), number=10)
+        tail = timeit.timeit(lambda: _fill_and_drain(Stack(max_depth=depth), depth), number=10)
+        print(f'depth {depth}: head {head * 100:.3f}ms, tail {tail * 100:.3f}ms per fill and drain')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Compare the direct engine with and without superinstructions on a summing loop"""
+import timeit
+
+from jawa.cf import ClassFile
+from jawa.constants import ConstantPool
+from jawa.util.bytecode import Instruction, Operand, OperandTypes
+
+from pyjvm.core.class_loaders import FixedClassLoader
+from pyjvm.core.frame import Frame
+from pyjvm.core.jvm_class import MethodKey, JvmClass
+from pyjvm.core.jvm_types import RootObjectType
+from pyjvm.core.machine import Machine, DIRECT_ENGINE
+from pyjvm.instructions.superinstructions import DEFAULT_PATTERNS
+from pyjvm.utils.jawa_conversions import convert_class_file
+
+ITERATIONS = 10000
+ROUNDS = 5
+METHOD_KEY = MethodKey('run', '()V')
+
+
+def loop_class():
+    """Sum the numbers below `ITERATIONS`, local 1 is the sum and local 2 is the counter"""
+    cf = ClassFile.create('Loop')
+    method = cf.methods.create(METHOD_KEY.name, METHOD_KEY.descriptor, code=True)
+    method.access_flags.set('acc_static', True)
+    method.code.max_stack = 4
+    method.code.max_locals = 3
+    method.code.assemble([
+        Instruction.create('iconst_0'),  # 0
+        Instruction.create('istore_1'),  # 1
+        Instruction.create('iconst_0'),  # 2
+        Instruction.create('istore_2'),  # 3
+        # BranchComparison sends the operands to the comparison with top-of-stack first
+        Instruction.create('sipush', [Operand(OperandTypes.LITERAL, ITERATIONS)]),  # 4
+        Instruction.create('iload_2'),  # 7
+        Instruction.create('if_icmpge', [Operand(OperandTypes.BRANCH, 14)]),  # 8
+        Instruction.create('iload_1'),  # 11
+        Instruction.create('iload_2'),  # 12
+        Instruction.create('iadd'),  # 13
+        Instruction.create('istore_1'),  # 14
+        Instruction.create('iload_2'),  # 15
+        Instruction.create('iconst_1'),  # 16
+        Instruction.create('iadd'),  # 17
+        Instruction.create('istore_2'),  # 18
+        Instruction.create('goto', [Operand(OperandTypes.BRANCH, -15)]),  # 19
+        Instruction.create('return')  # 22
+    ])
+    return convert_class_file(cf)
+
+
+def run_loop(jvm_class, engine=DIRECT_ENGINE, **machine_kwargs):
+    machine = Machine(FixedClassLoader({
+        jvm_class.name: jvm_class,
+        RootObjectType.refers_to: JvmClass(RootObjectType.refers_to, None, ConstantPool())
+    }), engine=engine, **machine_kwargs)
+    machine.frames.push(Frame.from_class_and_method(jvm_class, jvm_class.methods[METHOD_KEY]))
+    machine.run()
+
+
+def main():
+    jvm_class = loop_class()
+    for name, patterns in [('without superinstructions', ()), ('with the default patterns', DEFAULT_PATTERNS)]:
+        seconds = timeit.timeit(lambda: run_loop(jvm_class, superinstructions=patterns), number=ROUNDS) / ROUNDS
+        print(f'{name}: {seconds * 1000:.1f}ms for {ITERATIONS} iterations')
+
+
+if __name__ == '__main__':
+    main()
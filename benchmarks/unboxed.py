@@ -0,0 +1,16 @@
+"""Compare the direct engine with the unboxed engine on the summing loop of `benchmarks.superinstructions`"""
+import timeit
+
+from benchmarks.superinstructions import loop_class, run_loop, ITERATIONS, ROUNDS
+from pyjvm.core.machine import DIRECT_ENGINE, UNBOXED_ENGINE
+
+
+def main():
+    jvm_class = loop_class()
+    for engine in [DIRECT_ENGINE, UNBOXED_ENGINE]:
+        seconds = timeit.timeit(lambda: run_loop(jvm_class, engine=engine), number=ROUNDS) / ROUNDS
+        print(f'{engine}: {seconds * 1000:.1f}ms for {ITERATIONS} iterations')
+
+
+if __name__ == '__main__':
+    main()
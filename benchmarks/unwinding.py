@@ -0,0 +1,88 @@
+"""Time exceptions that are thrown from deep call stacks and caught at the bottom
+
+A static method recurses to the given depth and throws, and the method that started the recursion catches.
+The machine unwinds all the frames in between, see `Machine.throw`.
+"""
+import timeit
+
+from jawa.assemble import Label, assemble
+from jawa.attributes.code import CodeException
+from jawa.cf import ClassFile
+from jawa.constants import ConstantPool
+
+from pyjvm.core.class_loaders import FixedClassLoader
+from pyjvm.core.frame import Frame
+from pyjvm.core.jvm_class import MethodKey, JvmClass
+from pyjvm.core.jvm_types import RootObjectType
+from pyjvm.core.machine import Machine, ENGINES
+from pyjvm.utils.jawa_conversions import convert_class_file
+
+DEPTHS = (10, 100, 10000)
+ROUNDS = 3
+CLASS_NAME = 'Deep'
+EXCEPTION_CLASS_NAME = 'Oops'
+METHOD_KEY = MethodKey('run', '()V')
+
+
+def _static_method(cf, name, descriptor, code):
+    method = cf.methods.create(name, descriptor, code=True)
+    method.access_flags.set('acc_static', True)
+    method.code.max_stack = 4
+    method.code.max_locals = 1
+    method.code.assemble(assemble(code))
+    return method
+
+
+def deep_throw_class(depth):
+    """Return a class whose `run` method calls `down(depth)`, which recurses to `depth` frames and throws"""
+    cf = ClassFile.create(CLASS_NAME)
+    constants = cf.constants
+    down_ref = constants.create_method_ref(CLASS_NAME, 'down', '(I)V')
+    exception_class = constants.create_class(EXCEPTION_CLASS_NAME)
+
+    _static_method(cf, 'down', '(I)V', [
+        ('iload_0',),
+        ('ifne', Label('recurse')),
+        ('new', exception_class),
+        ('athrow',),
+        Label('recurse'),
+        ('iload_0',),
+        ('iconst_1',),
+        ('isub',),
+        ('invokestatic', down_ref),
+        ('return',),
+    ])
+    run = _static_method(cf, METHOD_KEY.name, METHOD_KEY.descriptor, [
+        ('ldc', constants.create_integer(depth)),
+        ('invokestatic', down_ref),
+        ('return',),
+        # The handler
+        ('pop',),
+        ('return',),
+    ])
+    # The handler covers the call
+    call, after_call, handler = [ins.pos for ins in run.code.disassemble()][1:4]
+    run.code.exception_table.append(CodeException(call, after_call, handler, exception_class.index))
+    return convert_class_file(cf)
+
+
+def run_deep_throw(jvm_class, engine):
+    machine = Machine(FixedClassLoader({
+        jvm_class.name: jvm_class,
+        EXCEPTION_CLASS_NAME: convert_class_file(ClassFile.create(EXCEPTION_CLASS_NAME)),
+        RootObjectType.refers_to: JvmClass(RootObjectType.refers_to, None, ConstantPool())
+    }), engine=engine)
+    machine.frames.push(Frame.from_class_and_method(jvm_class, jvm_class.methods[METHOD_KEY]))
+    machine.run()
+
+
+def main():
+    for depth in DEPTHS:
+        jvm_class = deep_throw_class(depth)
+        for engine in ENGINES:
+            seconds = timeit.timeit(lambda: run_deep_throw(jvm_class, engine), number=ROUNDS) / ROUNDS
+            print(f'{engine}, depth {depth}: {seconds * 1000:.1f}ms ({seconds / depth * 1e6:.1f}us per frame)')
+
+
+if __name__ == '__main__':
+    main()
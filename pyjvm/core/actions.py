@@ -4,16 +4,22 @@ import attr
 class Action:
     """An object representing operations in a Machine
 
-    This class registers sub classes solely for reporting purposes (see main.py).
+    This class registers sub classes for reporting purposes (see main.py)
+    and so that the Machine can build its dispatch table up front (see machine.py).
     """
     _subs = []
 
     def __init_subclass__(cls, **kwargs):
-        cls._subs.append(cls.__name__)
+        cls._subs.append(cls)
 
     @classmethod
     def action_names(cls):
         """Return the named of all sub classes of this class"""
+        return tuple(sub.__name__ for sub in cls._subs)
+
+    @classmethod
+    def action_types(cls):
+        """Return all sub classes of this class"""
         return tuple(cls._subs)
 
 
@@ -183,10 +189,12 @@ class Invoke(Action):
     class_name: str
     method_key: MethodKey
     arguments: Iterable[JvmValue]
+    virtual: bool, if True the method is looked up in the class of the receiver, the first argument, instead
     """
     class_name = attr.ib()
     method_key = attr.ib()
     arguments = attr.ib(converter=tuple)
+    virtual = attr.ib(default=False)
 
 
 @attr.s(frozen=True)
@@ -0,0 +1,274 @@
+"""Intrinsics for bulk array operations
+
+Without native code, ``System.arraycopy`` cannot run, and the methods of ``java.util.Arrays`` loop through arrays
+element by element in bytecode. The intrinsics in this module implement them as slice operations on the values of
+arrays, the `array.array` buffers of primitive arrays (see core/primitive_arrays.py) and the lists of reference arrays:
+ - ``System.arraycopy``, and ``VMSystem.arraycopy``, the native method behind it in GNU Classpath
+ - ``Arrays.fill``, ``copyOf`` and ``copyOfRange`` for all array types
+ - ``Arrays.equals`` and ``hashCode`` for primitive arrays, and ``Arrays.sort`` for numeric arrays.
+   The reference array versions of these call ``equals``, ``hashCode`` and ``compareTo`` on the elements,
+   so they are left to bytecode
+ - ``clone`` on arrays
+
+The intrinsics are registered in `intrinsics.REGISTRY`, see core/intrinsics.py.
+"""
+import math
+from array import array
+from functools import partial
+
+from pyjvm.core.hierarchies import is_assignable, type_key
+from pyjvm.core.intrinsics import IntrinsicThrow, REGISTRY, ARRAY_CLASS
+from pyjvm.core.jvm_class import MethodKey
+from pyjvm.core.jvm_types import Integer
+from pyjvm.core.primitive_arrays import PrimitiveArray
+from pyjvm.utils.bits import INT_MASK, LONG_MASK, to_int, float_to_int_bits, double_to_long_bits
+from pyjvm.utils.utils import bool_to_num
+
+SYSTEM = 'java/lang/System'
+VM_SYSTEM = 'java/lang/VMSystem'
+ARRAYS = 'java/util/Arrays'
+CLONE_KEY = MethodKey('clone', '()Ljava/lang/Object;')
+
+_NULL_POINTER = 'java/lang/NullPointerException'
+_OUT_OF_BOUNDS = 'java/lang/ArrayIndexOutOfBoundsException'
+_ARRAY_STORE = 'java/lang/ArrayStoreException'
+_ILLEGAL_ARGUMENT = 'java/lang/IllegalArgumentException'
+_NEGATIVE_ARRAY_SIZE = 'java/lang/NegativeArraySizeException'
+
+_OBJECT = 'Ljava/lang/Object;'
+# The descriptors of the element types of arrays
+_PRIMITIVES = list('ZBCSIJFD')
+_NUMERIC = list('BCSIJFD')
+_ALL = _PRIMITIVES + [_OBJECT]
+
+
+def _elements(array_value):
+    """Return the value of the array `array_value`, throwing a NullPointerException if it is null"""
+    if array_value.is_null:
+        raise IntrinsicThrow(_NULL_POINTER)
+    return array_value.value
+
+
+def _storage(elements):
+    """Return the sliceable sequence that holds the elements of an array value"""
+    if isinstance(elements, PrimitiveArray):
+        return elements.buffer
+    return elements
+
+
+def _new_array(array_value, storage):
+    """Return a new array of the type of `array_value`, whose elements are held by `storage`"""
+    elements = array_value.value
+    if isinstance(elements, PrimitiveArray):
+        storage = PrimitiveArray(elements.element_type, elements.typecode, storage)
+    return array_value.type.create_instance(storage)
+
+
+def _defaults(array_value, amount):
+    """Return a sequence of `amount` default elements for the array `array_value`, that can extend its storage"""
+    elements = array_value.value
+    if isinstance(elements, PrimitiveArray):
+        return array(elements.typecode, bytes(elements.buffer.itemsize * amount))
+    type_ = array_value.type.refers_to
+    return [type_.create_instance(type_.default_value) for _ in range(amount)]
+
+
+def _same_kind(first, second):
+    """Return True if elements of the array value `first` can be copied into `second`"""
+    if isinstance(first, PrimitiveArray):
+        return isinstance(second, PrimitiveArray) and first.typecode == second.typecode
+    return not isinstance(second, PrimitiveArray)
+
+
+def _check_range(length, start, end):
+    """Throw the exceptions of the range checks of ``java.util.Arrays``"""
+    if start > end:
+        raise IntrinsicThrow(_ILLEGAL_ARGUMENT)
+    if start < 0 or end > length:
+        raise IntrinsicThrow(_OUT_OF_BOUNDS)
+
+
+def _fold_long(value):
+    """The hash code of a long, ``(int) (value ^ (value >>> 32))``"""
+    value &= LONG_MASK
+    return to_int(value ^ (value >> 32))
+
+
+# The hash code of an element, by element descriptor, see `Arrays.hashCode`
+_ELEMENT_HASHES = {
+    'Z': lambda value: 1231 if value else 1237,
+    'B': int,
+    'C': int,
+    'S': int,
+    'I': int,
+    'J': _fold_long,
+    'F': float_to_int_bits,
+    'D': lambda value: _fold_long(double_to_long_bits(value))
+}
+
+# The values that `Arrays.equals` compares, by element descriptor. Floating point elements are compared by their bits
+_EQUALITY_KEYS = {
+    'F': float_to_int_bits,
+    'D': double_to_long_bits
+}
+
+
+def _sort_key(value):
+    """Order floating point values like `Arrays.sort`, -0.0 before 0.0 and NaN last"""
+    return math.isnan(value), value, math.copysign(1.0, value)
+
+
+def _holds_all(machine, source_component, component):
+    """Return True if an array of `component` can hold every element of an array of `source_component`"""
+    if type_key(component) == type_key(source_component):
+        return True
+    return is_assignable(source_component, component, machine.class_loader)
+
+
+def _storable_prefix(machine, elements, component):
+    """Return the amount of leading `elements` that an array of `component` can hold
+
+    Null can always be stored, other references are checked by their class.
+    """
+    checked = dict()
+    for index, element in enumerate(elements):
+        if element.is_null:
+            continue
+        key = type_key(element.type)
+        if key not in checked:
+            checked[key] = is_assignable(element.type, component, machine.class_loader)
+        if not checked[key]:
+            return index
+    return len(elements)
+
+
+def array_copy(machine, args):
+    """``System.arraycopy(Object src, int srcPos, Object dest, int destPos, int length)``
+
+    Also implements ``VMSystem.arraycopy``, which GNU Classpath's System, String and StringBuffer classes call.
+    Like the JVM, copying between reference arrays stores the elements before the first one that the destination
+    cannot hold, and then throws an ArrayStoreException.
+    """
+    src, src_pos, dest, dest_pos, length = args
+    source = _elements(src)
+    destination = _elements(dest)
+    src_pos, dest_pos, length = src_pos.value, dest_pos.value, length.value
+    both_arrays = src.type.is_array_reference and dest.type.is_array_reference
+    if not both_arrays or not _same_kind(source, destination):
+        raise IntrinsicThrow(_ARRAY_STORE)
+    if min(src_pos, dest_pos, length) < 0 or src_pos + length > len(source) or dest_pos + length > len(destination):
+        raise IntrinsicThrow(_OUT_OF_BOUNDS)
+    # The slice of the source is a copy, so overlapping ranges are copied correctly
+    copied = _storage(source)[src_pos:src_pos + length]
+    component = dest.type.refers_to
+    if not isinstance(source, PrimitiveArray) and not _holds_all(machine, src.type.refers_to, component):
+        storable = _storable_prefix(machine, copied, component)
+        if storable < length:
+            destination[dest_pos:dest_pos + storable] = copied[:storable]
+            raise IntrinsicThrow(_ARRAY_STORE)
+    _storage(destination)[dest_pos:dest_pos + length] = copied
+
+
+def fill(machine, args):
+    """``Arrays.fill(a, value)`` and ``Arrays.fill(a, fromIndex, toIndex, value)``"""
+    array_value, value = args[0], args[-1]
+    elements = _elements(array_value)
+    if len(args) == 4:
+        start, end = args[1].value, args[2].value
+        _check_range(len(elements), start, end)
+    else:
+        start, end = 0, len(elements)
+    if isinstance(elements, PrimitiveArray):
+        elements.buffer[start:end] = array(elements.typecode, [elements.narrow(value.value)]) * (end - start)
+    else:
+        elements[start:end] = [value] * (end - start)
+
+
+def copy_of(machine, args):
+    """``Arrays.copyOf(original, newLength)``"""
+    original, new_length = args[0], args[1].value
+    storage = _storage(_elements(original))
+    if new_length < 0:
+        raise IntrinsicThrow(_NEGATIVE_ARRAY_SIZE)
+    copied = storage[:new_length]
+    return _new_array(original, copied + _defaults(original, new_length - len(copied)))
+
+
+def copy_of_range(machine, args):
+    """``Arrays.copyOfRange(original, from, to)``"""
+    original, start, end = args[0], args[1].value, args[2].value
+    storage = _storage(_elements(original))
+    if start > end:
+        raise IntrinsicThrow(_ILLEGAL_ARGUMENT)
+    if start < 0 or start > len(storage):
+        raise IntrinsicThrow(_OUT_OF_BOUNDS)
+    copied = storage[start:end]
+    return _new_array(original, copied + _defaults(original, end - start - len(copied)))
+
+
+def equals(descriptor, machine, args):
+    """``Arrays.equals(a, a2)`` for arrays of the primitive type `descriptor`"""
+    first, second = args
+    if first.is_null or second.is_null:
+        return bool_to_num(first.is_null and second.is_null)
+    first, second = first.value.buffer, second.value.buffer
+    if len(first) != len(second):
+        return bool_to_num(False)
+    key = _EQUALITY_KEYS.get(descriptor)
+    if key is None:
+        return bool_to_num(first == second)
+    return bool_to_num(all(key(a) == key(b) for a, b in zip(first, second)))
+
+
+def hash_code(descriptor, machine, args):
+    """``Arrays.hashCode(a)`` for arrays of the primitive type `descriptor`"""
+    array_value, = args
+    if array_value.is_null:
+        return Integer.create_instance(0)
+    element_hash = _ELEMENT_HASHES[descriptor]
+    result = 1
+    for element in array_value.value.buffer:
+        result = (31 * result + element_hash(element)) & INT_MASK
+    return Integer.create_instance(to_int(result))
+
+
+def sort(descriptor, machine, args):
+    """``Arrays.sort(a)`` and ``Arrays.sort(a, fromIndex, toIndex)`` for arrays of the numeric type `descriptor`"""
+    buffer = _elements(args[0]).buffer
+    if len(args) == 3:
+        start, end = args[1].value, args[2].value
+        _check_range(len(buffer), start, end)
+    else:
+        start, end = 0, len(buffer)
+    key = _sort_key if descriptor in 'FD' else None
+    buffer[start:end] = array(buffer.typecode, sorted(buffer[start:end], key=key))
+
+
+def clone(machine, args):
+    """``clone()`` on an array, a shallow copy"""
+    array_value, = args
+    return _new_array(array_value, _storage(array_value.value)[:])
+
+
+def _register():
+    REGISTRY.add(SYSTEM, MethodKey('arraycopy', f'({_OBJECT}I{_OBJECT}II)V'), array_copy)
+    REGISTRY.add(VM_SYSTEM, MethodKey('arraycopy', f'({_OBJECT}I{_OBJECT}II)V'), array_copy)
+    REGISTRY.add(ARRAY_CLASS, CLONE_KEY, clone)
+
+    def add(name, descriptor, function):
+        REGISTRY.add(ARRAYS, MethodKey(name, descriptor), function)
+
+    for element in _ALL:
+        add('fill', f'([{element}{element})V', fill)
+        add('fill', f'([{element}II{element})V', fill)
+        add('copyOf', f'([{element}I)[{element}', copy_of)
+        add('copyOfRange', f'([{element}II)[{element}', copy_of_range)
+    for element in _PRIMITIVES:
+        add('equals', f'([{element}[{element})Z', partial(equals, element))
+        add('hashCode', f'([{element})I', partial(hash_code, element))
+    for element in _NUMERIC:
+        add('sort', f'([{element})V', partial(sort, element))
+        add('sort', f'([{element}II)V', partial(sort, element))
+
+
+_register()
@@ -0,0 +1,136 @@
+"""Inline caches for invocation instructions
+
+Every invocation instruction in a linked method is a call site. Resolving the method that a call site invokes means
+walking the super classes of a class and looking the method up in each of them, so the result is cached at the site.
+
+The cache of a site maps receiver types to resolved methods and goes through the classic states:
+ - Uninitialized: the site was never executed
+ - Monomorphic: the site has seen a single receiver type
+ - Polymorphic: the site has seen a few receiver types, up to `CallSites.max_entries`
+ - Megamorphic: the site has seen too many receiver types. It stops caching by itself,
+   and uses a table that is shared by all megamorphic sites instead
+
+The receiver type is the name of the class that the method is resolved on, see `class_loaders.dispatch_class_name`.
+Sites of instructions that do not dispatch on a receiver, such as ``invokestatic``, use `NO_RECEIVER` as their
+receiver type, so they are always monomorphic once executed.
+
+Every site counts its hits and misses, see `CallSites.report`.
+"""
+
+UNINITIALIZED = 'uninitialized'
+MONOMORPHIC = 'monomorphic'
+POLYMORPHIC = 'polymorphic'
+MEGAMORPHIC = 'megamorphic'
+
+# The receiver type for sites that do not dispatch on the receiver
+NO_RECEIVER = None
+
+
+class CallSite:
+    """The inline cache of a single invocation instruction
+
+    description: Tuple, the class name, method name, method descriptor and position of the instruction
+    class_name: str, the name of the class that the instruction refers to
+    method_key: MethodKey, the key of the method that the instruction refers to
+    hits: int, the amount of lookups that were answered by the site's cache
+    misses: int, the amount of lookups that were not
+    """
+
+    def __init__(self, description, class_name, method_key, max_entries, shared):
+        self.description = description
+        self.class_name = class_name
+        self.method_key = method_key
+        self.hits = 0
+        self.misses = 0
+        self._max_entries = max_entries
+        self._shared = shared
+        self._entries = dict()
+        self._megamorphic = False
+
+    @property
+    def state(self):
+        """One of the states in the module documentation"""
+        if self._megamorphic:
+            return MEGAMORPHIC
+        amount = len(self._entries)
+        if amount == 0:
+            return UNINITIALIZED
+        if amount == 1:
+            return MONOMORPHIC
+        return POLYMORPHIC
+
+    def receiver_types(self):
+        """Return the receiver types that are currently cached by this site"""
+        return list(self._entries)
+
+    def lookup(self, receiver_type, resolve):
+        """Return the resolved method for `receiver_type`
+
+        :param receiver_type: the key of the cache, the type of the receiver or `NO_RECEIVER`
+        :param resolve: a function that takes `receiver_type` and resolves the method on a miss
+        """
+        try:
+            entry = self._entries[receiver_type]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        if not self._megamorphic:
+            if len(self._entries) < self._max_entries:
+                entry = resolve(receiver_type)
+                self._entries[receiver_type] = entry
+                return entry
+            self._megamorphic = True
+            self._entries.clear()
+
+        shared_key = (receiver_type, self.class_name, self.method_key)
+        try:
+            return self._shared[shared_key]
+        except KeyError:
+            entry = resolve(receiver_type)
+            self._shared[shared_key] = entry
+            return entry
+
+
+class CallSites:
+    """All the call sites of a Machine
+
+    max_entries: int, the amount of receiver types a site caches before it becomes megamorphic
+    """
+
+    def __init__(self, max_entries=4):
+        if max_entries < 1:
+            raise ValueError('Call sites must be able to cache at least one receiver type')
+        self.max_entries = max_entries
+        self._sites = dict()
+        self._shared = dict()
+
+    def create(self, description, class_name, method_key):
+        """Return a new site for the instruction described by `description` and keep track of it"""
+        site = CallSite(description, class_name, method_key, self.max_entries, self._shared)
+        self._sites[description] = site
+        return site
+
+    def __getitem__(self, description):
+        return self._sites[description]
+
+    def __iter__(self):
+        return iter(self._sites.values())
+
+    def __len__(self):
+        return len(self._sites)
+
+    def report(self):
+        """Return a list of lines that describe the sites, the ones with most misses first"""
+        lines = []
+        for site in sorted(self, key=lambda s: (-s.misses, -s.hits)):
+            class_name, method_name, descriptor, pos = site.description
+            target = f'{site.class_name}#{site.method_key.name}{site.method_key.descriptor}'
+            lines.append(
+                f'{class_name}#{method_name}{descriptor} at {pos} -> {target}: '
+                f'{site.state}, {site.hits} hits, {site.misses} misses'
+            )
+        return lines
@@ -0,0 +1,236 @@
+"""A persistent, on-disk cache of converted classes
+
+Loading a class from a class file means parsing it with jawa and converting the result to a `JvmClass`,
+see `convert_class_file`. A program touches hundreds of standard library classes, and every process start used to
+repeat that work. Like converted classes, cached classes create the instructions of a method when it is first used.
+Methods are stored with their bytecode as it is in the class file, so storing a class does not disassemble them either.
+
+A `ClassCache` keeps converted classes in a directory, one file per class. The files hold the data of a JvmClass as
+plain Python values (tuples, strings, numbers and bytes) in the `marshal` format, which is compact and fast to read.
+The constant pool is kept in its class file form, since `ResolvedConstants` works on a jawa ConstantPool.
+
+Entries are keyed by the classpath entry that the class comes from (a JAR or a .class file), the modification time
+and size of that entry, and the name of the class. A changed entry therefore never matches old cache files.
+The key also includes `FORMAT_VERSION` and the Python version, since the `marshal` format depends on it.
+Files are written atomically, and files that cannot be read are treated as missing,
+so a cache directory that is shared by several processes, or damaged, is safe to use.
+
+See `TraditionalLoader`, which uses a ClassCache when it is given a cache directory.
+"""
+import hashlib
+import io
+import marshal
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+import attr
+from jawa.constants import ConstantPool
+from jawa.util.bytecode import read_instruction, write_instruction
+
+from pyjvm.core.jvm_class import JvmClass, BytecodeMethod, MethodKey, Handlers, ExceptionHandler, MethodCode
+from pyjvm.core.jvm_types import Integer, Float, Long, Double, ObjectReferenceType, ArrayReferenceType
+from pyjvm.utils.jawa_conversions import CodeLoader
+
+# Change this whenever the data that `class_to_data` returns changes
+FORMAT_VERSION = 3
+
+_SUFFIX = '.class-cache'
+
+_VALUE_TYPES = {'I': Integer, 'F': Float, 'J': Long, 'D': Double}
+_LETTERS = {type_.name: letter for letter, type_ in _VALUE_TYPES.items()}
+
+
+def _type_to_data(type_):
+    if type_.is_array_reference:
+        return '[', _type_to_data(type_.refers_to)
+    if type_.is_class_reference:
+        return 'L', type_.refers_to
+    return _LETTERS[type_.name]
+
+
+def _type_from_data(data):
+    if isinstance(data, str):
+        return _VALUE_TYPES[data]
+    kind, value = data
+    if kind == '[':
+        return ArrayReferenceType(_type_from_data(value))
+    return ObjectReferenceType(value)
+
+
+@attr.s(frozen=True)
+class _CachedCode:
+    """The `load_code` function of a cached method, which disassembles the bytecode in `data`, see `_code_to_data`"""
+    data = attr.ib()
+
+    def __call__(self):
+        bytecode, max_locals, max_stack, handlers = self.data
+        with io.BytesIO(bytecode) as code:
+            instructions = list(iter(lambda: read_instruction(code, code.tell()), None))
+        return MethodCode(
+            instructions=instructions,
+            max_locals=max_locals,
+            max_stack=max_stack,
+            exception_handlers=Handlers(ExceptionHandler(*handler) for handler in handlers)
+        )
+
+
+def _assembled(instructions):
+    out = io.BytesIO()
+    for ins in instructions:
+        write_instruction(out, out.tell(), ins)
+    return out.getvalue()
+
+
+def _code_to_data(method):
+    """Return the bytecode, max_locals, max_stack and exception handlers of `method`
+
+    The code of deferred methods is taken from where they would load it, without disassembling it.
+    """
+    load_code = method.load_code
+    if isinstance(load_code, _CachedCode):
+        return load_code.data
+    if isinstance(load_code, CodeLoader):
+        bytecode, max_locals, max_stack, handlers = load_code.bytecode()
+    else:
+        bytecode = _assembled(method.instructions)
+        max_locals, max_stack, handlers = method.max_locals, method.max_stack, method.exception_handlers
+    return (
+        bytecode,
+        max_locals,
+        max_stack,
+        tuple((h.start_pc, h.end_pc, h.handler_pc, h.catch_type) for h in handlers.handlers)
+    )
+
+
+def _method_to_data(method):
+    return (
+        method.name,
+        method.descriptor,
+        tuple(_type_to_data(t) for t in method.args),
+        method.is_native,
+        method.has_code,
+        _code_to_data(method)
+    )
+
+
+def _method_from_data(data):
+    name, descriptor, args, is_native, has_code, code = data
+    # Like methods that are converted from class files, the instructions are created on first use
+    return BytecodeMethod.deferred(
+        name=name,
+        descriptor=descriptor,
+        args=[_type_from_data(t) for t in args],
+        is_native=is_native,
+        has_code=has_code,
+        load_code=_CachedCode(code)
+    )
+
+
+def _fields_to_data(fields):
+    return tuple((name, _type_to_data(type_)) for name, type_ in fields.items())
+
+
+def _fields_from_data(data):
+    return [(name, _type_from_data(type_)) for name, type_ in data]
+
+
+def class_to_data(jvm_class):
+    """Return the data of `jvm_class` as plain Python values, which `marshal` can write"""
+    constants = io.BytesIO()
+    jvm_class.constants.pack(constants)
+    return (
+        jvm_class.name,
+        jvm_class.name_of_base,
+        constants.getvalue(),
+        tuple(jvm_class.interfaces),
+        _fields_to_data(jvm_class.fields),
+        tuple(_method_to_data(method) for method in jvm_class.methods.values()),
+        _fields_to_data(jvm_class.static_fields)
+    )
+
+
+def class_from_data(data):
+    """Return the JvmClass that `class_to_data` returned `data` for"""
+    name, name_of_base, constants_data, interfaces, fields, methods, static_fields = data
+    constants = ConstantPool()
+    constants.unpack(io.BytesIO(constants_data))
+    methods = [_method_from_data(method) for method in methods]
+    return JvmClass(
+        name=name,
+        name_of_base=name_of_base,
+        constants=constants,
+        interfaces=interfaces,
+        fields=_fields_from_data(fields),
+        methods=[(MethodKey(method.name, method.descriptor), method) for method in methods],
+        static_fields=_fields_from_data(static_fields)
+    )
+
+
+def entry_stamp(path):
+    """Return a tuple that changes when the classpath entry (a JAR or a .class file) at `path` changes"""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+class ClassCache:
+    """A directory of converted classes, see the module documentation
+
+    directory: Path, the directory of the cache files, created when the first class is stored
+    hits: int, the amount of classes that were found in the cache
+    misses: int, the amount of classes that were not
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, stamp, class_name):
+        return (FORMAT_VERSION, tuple(sys.version_info[:2]), *stamp, class_name)
+
+    def _path(self, key):
+        digest = hashlib.sha256(repr(key).encode('utf8')).hexdigest()
+        return self.directory / digest[:2] / (digest + _SUFFIX)
+
+    def get(self, stamp, class_name):
+        """Return the cached JvmClass of `class_name` from the classpath entry with `stamp`, or None
+
+        :param stamp: The `entry_stamp` of the classpath entry that holds the class
+        """
+        key = self._key(stamp, class_name)
+        try:
+            stored_key, data = marshal.loads(self._path(key).read_bytes())
+            if stored_key != key:
+                raise ValueError('Cache key mismatch')
+            jvm_class = class_from_data(data)
+        except (OSError, EOFError, ValueError, TypeError, KeyError, IndexError, struct.error):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return jvm_class
+
+    def put(self, stamp, class_name, jvm_class):
+        """Store `jvm_class`, the class named `class_name` from the classpath entry with `stamp`
+
+        Failures to write are ignored, the class will be converted again next time.
+        """
+        key = self._key(stamp, class_name)
+        path = self._path(key)
+        data = marshal.dumps((key, class_to_data(jvm_class)))
+        temporary = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written to a temporary file first, so that readers never see a partial file
+            with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as temporary:
+                temporary.write(data)
+            os.replace(temporary.name, path)
+        except OSError:
+            # The temporary file would stay in the cache directory for good
+            if temporary is not None:
+                try:
+                    os.unlink(temporary.name)
+                except OSError:
+                    pass
@@ -1,10 +1,19 @@
-from jawa.classloader import ClassLoader as JawaLoader
-from jawa.util.bytecode import Instruction
-
-from pyjvm.core.jvm_class import MethodKey, BytecodeMethod, Handlers
+import functools
+import io
+import marshal
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import attr
+from jawa.cf import ClassFile
+from jawa.constants import ConstantClass
+
+from pyjvm.core.class_cache import ClassCache, entry_stamp, class_to_data, class_from_data
+from pyjvm.core.class_path import ClassPath
+from pyjvm.core.constant_pool import ResolvedConstants, SharedConstants
 from pyjvm.core.jvm_types import RootObjectType, ObjectReferenceType, JvmObject
 from pyjvm.utils.jawa_conversions import convert_class_file
-from pyjvm.utils.utils import path_to_std_lib_as_str, named_tuple_replace
+from pyjvm.utils.utils import path_to_std_lib_as_str
 
 
 class LoaderEntry:
@@ -13,11 +22,17 @@ class LoaderEntry:
     Attributes
         - jvm_class - A instance of JvmClass
         - statics - A dictionary from names (str) to instances of JvmValue
+        - vtable - The dispatch table of the class, see `ClassLoader.vtable`. None until it is first needed
+        - itable - The interface default methods of the class, see `ClassLoader.itable`. None until it is first needed
+        - ancestors - The ancestor set of the class, see `ClassLoader.ancestor_set`. None until it is first needed
     """
 
     def __init__(self, jvm_class, statics):
         self.jvm_class = jvm_class
         self.statics = statics
+        self.vtable = None
+        self.itable = None
+        self.ancestors = None
 
 
 class ClassLoader:
@@ -43,6 +58,8 @@ class ClassLoader:
         """
         self._map = dict()
         self.first_load_function = first_load_function
+        # The materialized constants of all the classes of this loader, see core/constant_pool.py
+        self.shared_constants = SharedConstants()
 
     def _load_jvm_class(self, name):
         """Load the class of the given name, usually from a JAR or .class file, and return a `JvmClass` instance
@@ -53,6 +70,9 @@ class ClassLoader:
 
     def _create_entry(self, name):
         jvm_class = self._load_jvm_class(name)
+        # Loaded classes resolve their constants into the table of this loader
+        resolved_constants = ResolvedConstants(jvm_class.constants, self.shared_constants)
+        jvm_class = attr.evolve(jvm_class, resolved_constants=resolved_constants)
         statics = dict(_name_and_default_value(pair) for pair in jvm_class.static_fields.items())
         return LoaderEntry(jvm_class, statics)
 
@@ -129,30 +149,88 @@ class ClassLoader:
          - The ancestor set for all interfaces that A implements
          - The ancestor set for A's base class, unless A is already the root class (java/lang/Object)
         See hierarchies.py for a complete definition
-        """
 
-        def loop(name, the_set):
-            the_class = self.get_the_class(name)
-            the_set.add(name)
+        The set is computed once per class, from the memoized sets of its base class and interfaces.
+        """
+        entry = self[class_name]
+        if entry.ancestors is None:
+            the_class = entry.jvm_class
+            the_set = {class_name}
             for interface in the_class.interfaces:
                 the_set.update(self.ancestor_set(interface))
             name_of_base = the_class.name_of_base
-            if name == RootObjectType.refers_to or name_of_base is None:
-                return the_set
+            if not (class_name == RootObjectType.refers_to or name_of_base is None):
+                the_set.update(self.ancestor_set(name_of_base))
+            entry.ancestors = frozenset(the_set)
+        return entry.ancestors
+
+    def vtable(self, class_name):
+        """Return the dispatch table of the class named `class_name`
+
+        The table maps the MethodKey of every method that can be invoked on the class to a tuple of the declaring
+        JvmClass and the BytecodeMethod. It is built from the table of the base class, with the methods that the
+        class declares replacing the ones it overrides. Keys that the class hierarchy does not implement are then
+        taken from the `itable`, which is how interface default methods are inherited.
+
+        Tables are built once per class, the first time a method is resolved on the class or on one of its
+        subclasses. Building them when the entry is created would load, and initialize, all the super classes and
+        interfaces of every class that is touched, before the JVM would have.
+        """
+        entry = self[class_name]
+        if entry.vtable is None:
+            jvm_class = entry.jvm_class
+            name_of_base = jvm_class.name_of_base
+            if class_name == RootObjectType.refers_to or name_of_base is None:
+                table = dict()
             else:
-                return loop(name_of_base, the_set)
-
-        return loop(class_name, set())
+                table = dict(self.vtable(name_of_base))
+            for key, method in jvm_class.methods.items():
+                table[key] = (jvm_class, method)
+            for key, declared in self.itable(class_name).items():
+                if key not in table or not _has_body(table[key][1]):
+                    table[key] = declared
+            entry.vtable = table
+        return entry.vtable
+
+    def itable(self, class_name):
+        """Return the interface default methods of the class named `class_name`
+
+        The table maps MethodKeys to a tuple of the declaring interface's JvmClass and the BytecodeMethod, for
+        every method with a body that is declared by an interface that the class implements, directly or through
+        its super classes and super interfaces. Methods of interfaces that are closer to the class come first.
+        """
+        entry = self[class_name]
+        if entry.itable is None:
+            jvm_class = entry.jvm_class
+            table = dict()
+            for interface in jvm_class.interfaces:
+                interface_class = self.get_the_class(interface)
+                for key, method in interface_class.methods.items():
+                    if _has_body(method) and not key.name.startswith('<'):
+                        table.setdefault(key, (interface_class, method))
+                for key, declared in self.itable(interface).items():
+                    table.setdefault(key, declared)
+            name_of_base = jvm_class.name_of_base
+            if not (class_name == RootObjectType.refers_to or name_of_base is None):
+                for key, declared in self.itable(name_of_base).items():
+                    table.setdefault(key, declared)
+            entry.itable = table
+        return entry.itable
+
+    def resolve(self, class_name, method_key):
+        """Return a tuple of the declaring JvmClass and the BytecodeMethod that `method_key` refers to in `class_name`
+
+        Virtual invocations resolve on the class of their receiver, other invocations on the class they refer to.
+        """
+        try:
+            return self.vtable(class_name)[method_key]
+        except KeyError:
+            raise KeyError(f'Cannot resolve method {class_name}#{method_key.name}{method_key.descriptor}') from None
 
     def resolve_method(self, class_name, method_key):
-        for name in self.super_classes(class_name):
-            class_ = self.get_the_class(name)
-            try:
-                return class_.methods[method_key]
-            except KeyError:
-                pass
-
-        raise KeyError(f'Cannot resolve method {class_name}#{method_key.name}{method_key.descriptor}')
+        """Return the BytecodeMethod that `method_key` refers to in `class_name`, see `resolve`"""
+        _, method = self.resolve(class_name, method_key)
+        return method
 
     def default_instance(self, class_name):
         """Returns an instance of the class with all fields initialized to their type's default value
@@ -181,48 +259,146 @@ class FixedClassLoader(ClassLoader):
 class TraditionalLoader(ClassLoader):
     """A loader that loads classes from JAR and .class files according to Java classpath conventions
 
-    Delegates work to jawa.classloader.ClassLoader, refer to that class for more info.
+    Class files are found through an index of the classpath, see core/class_path.py.
+
+    Classes can be parsed and converted ahead of time in a pool of processes, see `preload`.
 
-    Although there is no internal standard library support, this class implements a specific
-    native method which enables the construction of exception instances.
+    There is no internal standard library support. The native methods that the standard library needs,
+    such as the one that enables the construction of exception instances, are replaced by intrinsics,
+    see core/intrinsics.py.
     """
 
-    def __init__(self, cp_string):
+    def __init__(self, cp_string, cache_directory=None):
+        """Create a loader for the colon separated classpath `cp_string`
+
+        :param cache_directory: A directory for a `ClassCache` of converted classes, see core/class_cache.py.
+        Defaults to None, which means that classes are converted from their class files on every run
+        """
         super().__init__()
         parts = [cp.strip() for cp in cp_string.split(':')]
         parts = [cp for cp in parts if cp]
         parts.insert(0, path_to_std_lib_as_str())
-        self._jawa_loader = JawaLoader(*parts)
+        self.class_path = ClassPath(parts)
+        self.class_cache = None if cache_directory is None else ClassCache(cache_directory)
+        # The stamps of classpath entries, by path. Entries are not expected to change while the loader is in use
+        self._entry_stamps = dict()
+        # Classes that `preload` converted and that were not loaded yet, by name
+        self._preloaded = dict()
 
     def _load_jvm_class(self, name):
-        cf = self._jawa_loader[name]
-        class_ = convert_class_file(cf)
+        stamp = self._entry_stamp(name) if self.class_cache is not None else None
+        class_ = self._preloaded.pop(name, None)
+        if class_ is None:
+            if stamp is not None:
+                class_ = self.class_cache.get(stamp, name)
+                if class_ is not None:
+                    return class_
+            cf = ClassFile(io.BytesIO(self.class_path.read(name)))
+            class_ = convert_class_file(cf)
+        if stamp is not None:
+            self.class_cache.put(stamp, name, class_)
         return class_
 
-    def resolve_method(self, class_name, method_key):
-        if self._is_stack_trace(class_name, method_key):
-            return self._stack_trace_implementation()
-        else:
-            return super().resolve_method(class_name, method_key)
-
-    def _is_stack_trace(self, class_name, method_key):
-        key = MethodKey('fillInStackTrace', '(Ljava/lang/Throwable;)Ljava/lang/VMThrowable;')
-        return class_name == 'java/lang/VMThrowable' and method_key == key
-
-    def _stack_trace_implementation(self):
-        return BytecodeMethod(
-            name='fillInStackTrace',
-            descriptor='(Ljava/lang/Throwable;)Ljava/lang/VMThrowable;',
-            instructions=[
-                named_tuple_replace(Instruction.create('aload_0'), pos=1),
-                named_tuple_replace(Instruction.create('areturn'), pos=2)
-            ],
-            max_locals=1,
-            max_stack=1,
-            args=[ObjectReferenceType('java/lang/Throwable')],
-            is_native=False,
-            exception_handlers=Handlers()
-        )
+    def preload(self, names, transitive=False, workers=None):
+        """Parse and convert the classes `names` in a pool of processes, so that loading them later is quick
+
+        The workers send the data of the converted classes back, see `class_to_data`. Preloaded classes are kept
+        aside until they are loaded as usual, so their static initialization happens when the JVM specifies it.
+        Classes that are already loaded or preloaded, and names that are not on the classpath, are skipped.
+
+        :param names: Iterable[str], the names of the classes to preload
+        :param transitive: True to also preload the classes that the constant pools of preloaded classes refer to,
+        and the classes that theirs refer to, and so on. Preloading the main class transitively preloads every class
+        that the program can load by name
+        :param workers: The amount of processes to use. Defaults to the amount of processors
+        :return: The amount of classes that were preloaded
+        """
+        workers = workers or os.cpu_count() or 1
+        seen = set()
+        amount = 0
+        # ProcessPoolExecutor only accepts an initializer since Python 3.7, so every task carries the entries
+        preload_class = functools.partial(_preload_class, self.class_path.entries)
+        with ProcessPoolExecutor(workers) as executor:
+            pending = list(names)
+            while pending:
+                batch = [name for name in dict.fromkeys(pending) if self._should_preload(name, seen)]
+                seen.update(batch)
+                pending = []
+                # A few chunks per worker balance the load without sending every name separately
+                chunk_size = max(1, len(batch) // (4 * workers))
+                for name, data, references in executor.map(preload_class, batch, chunksize=chunk_size):
+                    self._preloaded[name] = class_from_data(marshal.loads(data))
+                    amount += 1
+                    if transitive:
+                        pending.extend(references)
+        return amount
+
+    def _should_preload(self, name, seen):
+        return not (name in seen or name in self._map or name in self._preloaded or name not in self.class_path)
+
+    def _entry_stamp(self, name):
+        """Return the `entry_stamp` of the JAR or .class file that holds the class `name`, or None if there is none"""
+        member = self.class_path.find(name)
+        if member is None:
+            return None
+        path = member.path
+        try:
+            return self._entry_stamps[path]
+        except KeyError:
+            stamp = entry_stamp(path)
+            self._entry_stamps[path] = stamp
+            return stamp
+
+
+# The ClassPaths of a preload worker process, by their entries, see `TraditionalLoader.preload`
+_worker_class_paths = dict()
+
+
+def _worker_class_path(entries):
+    try:
+        return _worker_class_paths[entries]
+    except KeyError:
+        class_path = ClassPath(entries)
+        _worker_class_paths[entries] = class_path
+        return class_path
+
+
+def _preload_class(entries, name):
+    """Parse and convert the class `name`, from the classpath `entries`, in a preload worker process
+
+    Return the name, the `marshal` data of the class, and the names of the classes that its constant pool refers to.
+    """
+    cf = ClassFile(io.BytesIO(_worker_class_path(entries).read(name)))
+    jvm_class = convert_class_file(cf)
+    references = [_referenced_class_name(constant.name.value) for constant in cf.constants.find(type_=ConstantClass)]
+    return name, marshal.dumps(class_to_data(jvm_class)), [reference for reference in references if reference]
+
+
+def _referenced_class_name(name):
+    """Return the name of the class that a class constant refers to, or None for arrays of primitives"""
+    if not name.startswith('['):
+        return name
+    element = name.lstrip('[')
+    if element.startswith('L') and element.endswith(';'):
+        return element[1:-1]
+    return None
+
+
+def dispatch_class_name(receiver, class_name):
+    """Return the name of the class that a virtual invocation of a method of `class_name` on `receiver` resolves on
+
+    That is the class of the receiver. Arrays do not have classes of their own, they inherit the methods of
+    java/lang/Object, so invocations on arrays resolve on `class_name`.
+    """
+    type_ = receiver.type
+    if type_.is_array_reference:
+        return class_name
+    return type_.refers_to
+
+
+def _has_body(method):
+    """Return False for abstract methods, which are the only ones with neither instructions nor native code"""
+    return method.is_native or method.has_code
 
 
 def _name_and_default_value(pair):
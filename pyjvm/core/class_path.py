@@ -0,0 +1,150 @@
+"""An index of the class files on a classpath
+
+A classpath is a sequence of entries, JAR (or zip) files and directories. When more than one entry has a class,
+the first one wins, as in Java.
+
+`ClassPath` reads the central directory of every JAR once, when it is created, and indexes the class files in them
+by class name. A `Member` records where a class file is: its archive, the offset of its local header and the size of
+its compressed data. Class files are read from a memory map of their archive and inflated with zlib, without going
+through `zipfile` again. Directories are not walked, they can be large and only a few of their files are used.
+Instead, their files are looked up when a class is first requested.
+
+The result of every lookup is remembered, including lookups of classes that are not on the classpath,
+so resolving a class name again is a single dictionary lookup.
+"""
+import mmap
+import os
+import struct
+import zlib
+from collections import namedtuple
+from zipfile import ZipFile, ZIP_STORED, ZIP_DEFLATED
+
+_CLASS_SUFFIX = '.class'
+_LOCAL_HEADER = struct.Struct('<4s22xHH')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+
+class Member(namedtuple('Member', 'position, path, offset, compressed_size, compression')):
+    """The location of a class file on a classpath
+
+    position: int, the index of the classpath entry that holds the class file
+    path: str, the path of the archive that holds the class file, or of the class file itself
+    offset: int, the offset of the local header of the class file in its archive. None for files in directories
+    compressed_size: int, the size of the compressed data of the class file. None for files in directories
+    compression: int, the zipfile compression constant of the class file. None for files in directories
+    """
+    # Archives hold thousands of members, a tuple is cheap to create
+    __slots__ = ()
+
+    @property
+    def in_archive(self):
+        return self.offset is not None
+
+
+# Members of directories only have a position and a path. namedtuple's `defaults` argument needs Python 3.7
+Member.__new__.__defaults__ = (None,) * 3
+
+
+def _is_archive(path):
+    return path.lower().endswith(('.jar', '.zip'))
+
+
+def _archive_members(position, path):
+    """Yield the class names and `Member` objects of the class files in the archive at `path`"""
+    with ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.filename.endswith(_CLASS_SUFFIX):
+                name = info.filename[:-len(_CLASS_SUFFIX)]
+                yield name, Member(position, path, info.header_offset, info.compress_size, info.compress_type)
+
+
+class ClassPath:
+    """The class files of a sequence of JARs and directories, see the module documentation
+
+    entries: Tuple[str], the paths of the classpath entries, in order
+    """
+
+    def __init__(self, entries):
+        self.entries = tuple(str(entry) for entry in entries)
+        # The members of all archives, the first archive wins
+        self._archived = dict()
+        # The positions and paths of directory entries
+        self._directories = []
+        # The results of `find`, None marks classes that are not on the classpath
+        self._found = dict()
+        self._maps = dict()
+
+        for position, entry in enumerate(self.entries):
+            if _is_archive(entry):
+                for name, member in _archive_members(position, entry):
+                    self._archived.setdefault(name, member)
+            elif os.path.isdir(entry):
+                self._directories.append((position, entry))
+
+    def find(self, name):
+        """Return the `Member` of the class `name`, or None if it is not on the classpath"""
+        try:
+            return self._found[name]
+        except KeyError:
+            member = self._search(name)
+            self._found[name] = member
+            return member
+
+    def _search(self, name):
+        member = self._archived.get(name)
+        for position, directory in self._directories:
+            if member is not None and member.position < position:
+                break
+            path = os.path.join(directory, *name.split('/')) + _CLASS_SUFFIX
+            if os.path.isfile(path):
+                return Member(position, path)
+        return member
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def read(self, name):
+        """Return the bytes of the class file of the class `name`
+
+        :raises FileNotFoundError: If the class is not on the classpath
+        """
+        member = self.find(name)
+        if member is None:
+            raise FileNotFoundError(f'Cannot find class {name} on the classpath')
+        if not member.in_archive:
+            with open(member.path, 'rb') as source:
+                return source.read()
+        return self._read_member(name, member)
+
+    def _read_member(self, name, member):
+        if member.compression not in (ZIP_STORED, ZIP_DEFLATED):
+            # Other compression methods are rare in JARs, zipfile supports them
+            with ZipFile(member.path) as archive:
+                return archive.read(name + _CLASS_SUFFIX)
+
+        memory = self._map(member.path)
+        signature, name_length, extra_length = _LOCAL_HEADER.unpack_from(memory, member.offset)
+        if signature != _LOCAL_HEADER_SIGNATURE:
+            raise ValueError(f'Bad local header for {name} in {member.path}')
+        start = member.offset + _LOCAL_HEADER.size + name_length + extra_length
+        data = memory[start:start + member.compressed_size]
+        if member.compression == ZIP_STORED:
+            return data
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+
+    def _map(self, path):
+        """Return a read only memory map of the archive at `path`, created on first use"""
+        try:
+            return self._maps[path]
+        except KeyError:
+            with open(path, 'rb') as source:
+                memory = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[path] = memory
+            return memory
+
+    def close(self):
+        """Close the memory maps of archives. Classes can still be read afterwards, the maps will be recreated"""
+        maps = self._maps
+        self._maps = dict()
+        for memory in maps.values():
+            memory.close()
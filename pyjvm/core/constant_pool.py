@@ -0,0 +1,185 @@
+"""Resolved constant pools
+
+Instructions refer to classes, fields, methods and constants through indices into the constant pool of their class.
+The jawa constants behind those indices are chains of objects: a method reference holds a class constant, which holds
+a utf8 constant with the name, and a name-and-type constant, which holds two more. Decoding them on every execution
+is wasteful, because the result never changes.
+
+`ResolvedConstants` decodes every index once, the first time it is used, and keeps the result.
+Every `JvmClass` has its own table, see `JvmClass.resolved_constants`, so instructions of all engines share it.
+
+Loadable constants are materialized through `SharedConstants`, a table that all the classes of a class loader share,
+see `ClassLoader.shared_constants`: equal string literals are the same String instance, like the JVM's interned
+strings, and equal numeric constants are the same JvmValue. Every loader has its own table, so machines do not share
+interned strings.
+
+Note that resolving an index does not load any classes. Loading a class runs its <clinit>, and the JVM only does that
+when an instruction that needs the class actually executes.
+"""
+import attr
+from jawa import constants as jawa_constants
+from jawa.util.descriptor import field_descriptor
+
+from pyjvm.core.jvm_types import Integer, Float, Long, Double
+from pyjvm.utils.bits import double_to_raw_long_bits
+from pyjvm.utils.jawa_conversions import key_from_method_ref, argument_count, string_instance, string_text, \
+    convert_type
+from pyjvm.utils.utils import class_as_descriptor, field_name_from_field_ref
+
+
+@attr.s(frozen=True)
+class ClassRef:
+    """A resolved class constant
+
+    name: str, the name of the class
+    descriptor: str, the descriptor of the class, as used by `hierarchies.is_value_instance_of`
+    """
+    name = attr.ib()
+    descriptor = attr.ib()
+
+
+@attr.s(frozen=True)
+class FieldRef:
+    """A resolved field reference constant
+
+    class_name: str, the name of the class that the reference refers to
+    name: str, the name of the field, which is the key of the field in the fields of objects and in statics
+    type_: JvmType, the declared type of the field
+    """
+    class_name = attr.ib()
+    name = attr.ib()
+    type_ = attr.ib()
+
+
+@attr.s(frozen=True)
+class MethodRef:
+    """A resolved method reference constant
+
+    class_name: str, the name of the class that the reference refers to
+    key: MethodKey, the name and descriptor of the method
+    argument_count: int, the amount of arguments that the method takes, not counting `this`
+    """
+    class_name = attr.ib()
+    key = attr.ib()
+    argument_count = attr.ib()
+
+
+# The types of the values of numeric constants, by jawa constant type
+_NUMERIC_TYPES = {
+    jawa_constants.Integer: Integer,
+    jawa_constants.Float: Float,
+    jawa_constants.Long: Long,
+    jawa_constants.Double: Double
+}
+
+
+class SharedConstants:
+    """Materialized constants that are shared by all the classes of a class loader, see `ClassLoader.shared_constants`
+
+    Strings are interned: there is a single String instance for every text, so literals can be compared by identity.
+    Numbers are kept by type and bits, so 0.0 and -0.0 (and NaNs with different bits) remain separate.
+    """
+
+    def __init__(self):
+        self._strings = dict()
+        self._numbers = dict()
+
+    def string(self, text):
+        """Return the interned String instance of the Python str `text`"""
+        try:
+            return self._strings[text]
+        except KeyError:
+            value = string_instance(text)
+            self._strings[text] = value
+            return value
+
+    def intern(self, string_value):
+        """``String.intern``, return the interned String that equals the String JvmValue `string_value`
+
+        `string_value` becomes the interned instance if its text was not interned yet.
+        """
+        return self._strings.setdefault(string_text(string_value.value), string_value)
+
+    def number(self, type_, value):
+        """Return the shared JvmValue of `type_` with the Python number `value`"""
+        bits = double_to_raw_long_bits(value) if type_ in (Float, Double) else value
+        key = (type_.name, bits)
+        try:
+            return self._numbers[key]
+        except KeyError:
+            result = type_.create_instance(value)
+            self._numbers[key] = result
+            return result
+
+    def constant(self, const):
+        """Return the JvmValue of the loadable jawa constant `const`"""
+        if isinstance(const, jawa_constants.String):
+            return self.string(const.string.value)
+        return self.number(_NUMERIC_TYPES[type(const)], const.value)
+
+    def __len__(self):
+        return len(self._strings) + len(self._numbers)
+
+
+class ResolvedConstants:
+    """The resolved entries of a ConstantPool, filled lazily, see the module documentation
+
+    Every kind of entry has its own method, which takes an index into the constant pool.
+    Materialized constants, the results of `value`, are shared by all the executions of all the instructions that
+    load them, just like the values of the `iconst_<n>` instructions are. They come from `shared`, the SharedConstants
+    of the class loader. A table without one gets a SharedConstants of its own.
+    """
+
+    def __init__(self, constants, shared=None):
+        self.constants = constants
+        self.shared = SharedConstants() if shared is None else shared
+        self._classes = dict()
+        self._fields = dict()
+        self._methods = dict()
+        self._values = dict()
+
+    def class_ref(self, index):
+        """Return a ClassRef for the class constant at `index`"""
+        return _lookup(self._classes, index, self._resolve_class)
+
+    def field(self, index):
+        """Return a FieldRef for the field reference at `index`"""
+        return _lookup(self._fields, index, self._resolve_field)
+
+    def method(self, index):
+        """Return a MethodRef for the method (or interface method) reference at `index`"""
+        return _lookup(self._methods, index, self._resolve_method)
+
+    def value(self, index):
+        """Return the JvmValue of the loadable constant at `index`, see `SharedConstants.constant`"""
+        return _lookup(self._values, index, self._resolve_value)
+
+    def __len__(self):
+        """Return the amount of indices that were resolved"""
+        return len(self._classes) + len(self._fields) + len(self._methods) + len(self._values)
+
+    def _resolve_class(self, index):
+        name = self.constants[index].name.value
+        return ClassRef(name, class_as_descriptor(name))
+
+    def _resolve_field(self, index):
+        ref = self.constants[index]
+        descriptor = field_descriptor(ref.name_and_type.descriptor.value)
+        return FieldRef(ref.class_.name.value, field_name_from_field_ref(ref), convert_type(descriptor))
+
+    def _resolve_method(self, index):
+        ref = self.constants[index]
+        key = key_from_method_ref(ref)
+        return MethodRef(ref.class_.name.value, key, argument_count(key))
+
+    def _resolve_value(self, index):
+        return self.shared.constant(self.constants[index])
+
+
+def _lookup(cache, index, resolve):
+    try:
+        return cache[index]
+    except KeyError:
+        result = resolve(index)
+        cache[index] = result
+        return result
@@ -4,14 +4,18 @@ import attr
 from jawa.util.bytecode import Instruction
 
 from pyjvm.core.frame_locals import Locals
-from pyjvm.core.jvm_class import JvmClass, BytecodeMethod, Handlers
+from pyjvm.core.jvm_class import JvmClass, BytecodeMethod, Handlers, InstructionTable
 from pyjvm.core.jvm_types import JvmValue
 from pyjvm.core.stack import Stack
 
 
 @attr.s
 class Frame:
-    """A runtime execution frame"""
+    """A runtime execution frame
+
+    `pc` is a byte offset into the method's code, as in the JVM spec.
+    All lookups from `pc` to an instruction go through `instruction_table`, so they take constant time.
+    """
     jvm_class = attr.ib(type=JvmClass)
     method_name = attr.ib(type=str)
     method_descriptor = attr.ib(type=str)
@@ -19,7 +23,12 @@ class Frame:
     locals = attr.ib(type=Locals)
     op_stack = attr.ib(type=Stack[JvmValue])
     exception_handlers = attr.ib(type=Handlers)
+    instruction_table = attr.ib(type=InstructionTable, repr=False)
     pc = attr.ib(type=int, default=0)
+    # Set by the Machine when it links the method, see Machine._link
+    bound_instructions = attr.ib(default=None, repr=False, cmp=False)
+    # Set by the Machine when the method is compiled, see instructions/compiler.py
+    compiled = attr.ib(default=None, repr=False, cmp=False)
 
     @classmethod
     def from_class_and_method(cls, jvm_class: JvmClass, method: BytecodeMethod):
@@ -30,13 +39,30 @@ class Frame:
             instructions=method.instructions,
             locals=Locals(method.max_locals),
             op_stack=Stack(max_depth=method.max_stack),
-            exception_handlers=method.exception_handlers
+            exception_handlers=method.exception_handlers,
+            instruction_table=method.instruction_table
         )
 
+    def current_index(self):
+        """Return the index of the instruction at `self.pc`, or `instruction_table.end` if there are none left"""
+        return self.instruction_table.index_at(self.pc)
+
+    def has_instructions(self):
+        """Return True if there is an instruction at `self.pc`, False if the method is done"""
+        return self.current_index() < self.instruction_table.end
+
     def next_instruction(self):
         """Return the first instruction with `pos` greater or equal to `self.pc`"""
-        for ins in self.instructions:
-            if ins.pos >= self.pc:
-                return ins
+        index = self.current_index()
+        if index >= self.instruction_table.end:
+            raise IndexError('No more instructions')
+        return self.instructions[index]
+
+    def advance(self):
+        """Move the program counter to the instruction that follows the current one"""
+        table = self.instruction_table
+        self.pc = table.pc_after(table.index_at(self.pc))
 
-        raise IndexError('No more instructions')
+    def jump(self, target):
+        """Move the program counter to `target`, an absolute position in the method's code"""
+        self.pc = target
@@ -1,3 +1,6 @@
+from pyjvm.core.jvm_types import JvmValue
+
+
 class Locals:
     """A local variable array for Frame objects
 
@@ -6,6 +9,9 @@ class Locals:
     This class aims to preserves that guarantee by using an internal `MISSING` object to mark inaccessible slots.
     It also prevents uninitialized access at runtime.
     However, a class that was emitted by a compliant Java compiler should already prevent such code from existing.
+
+    The frames of the unboxed engine also store plain ints and floats, which take a single slot,
+    see instructions/unboxed.py.
     """
 
     MISSING = object()
@@ -21,7 +27,7 @@ class Locals:
         if value is None:
             raise ValueError('Cannot store None in locals')
         self._locals[index] = value
-        if value.type.needs_two_slots:
+        if isinstance(value, JvmValue) and value.type.needs_two_slots:
             self._locals[index + 1] = self.MISSING
 
     def load(self, index):
@@ -1,12 +1,20 @@
 """Functions for establishing instance-of relationships
 
+Instance-of checks are common in hot code: every `instanceof` and `checkcast` instruction performs one, and so does
+every exception handler that a thrown exception passes through. The ancestor sets that answer them are memoized
+by the ClassLoader, and `TypeCheckCache` remembers the answers of a single site.
 """
+import functools
+
 from jawa.util.descriptor import field_descriptor
 
 from pyjvm.core.class_loaders import ClassLoader
-from pyjvm.core.jvm_types import JvmValue, Type, ObjectReferenceType
+from pyjvm.core.jvm_types import JvmValue, Type, ObjectReferenceType, RootObjectType
 from pyjvm.utils.jawa_conversions import convert_type
 
+# The classes and interfaces that every array is an instance of
+_ARRAY_ANCESTORS = frozenset([RootObjectType.refers_to, 'java/lang/Cloneable', 'java/io/Serializable'])
+
 
 def is_value_instance_of(instance: JvmValue, descriptor: str, loader: ClassLoader) -> bool:
     """Return a bool representing whether `instance` is an instance of the class represented by `descriptor`"""
@@ -21,10 +29,27 @@ def does_type_derive_from(instance_type: Type, descriptor_for_possible_parent: s
     if instance_type.is_value:
         raise ValueError('Cannot instance_of check value types. Only references')
 
-    descriptor_type = convert_type(field_descriptor(descriptor_for_possible_parent))
+    descriptor_type = _descriptor_type(descriptor_for_possible_parent)
     return _Checker(loader).is_instance_of(instance_type, descriptor_type)
 
 
+def is_assignable(instance_type: Type, parent_type: Type, loader: ClassLoader) -> bool:
+    """Return True if a reference of `instance_type` can be stored where `parent_type` is declared, as ``aastore`` does
+
+    Unlike `does_type_derive_from`, arrays are instances of java/lang/Object
+    and of the interfaces that arrays implement.
+    """
+    if type_key(instance_type) == type_key(parent_type):
+        return True
+    if instance_type.is_array_reference:
+        if parent_type.is_array_reference:
+            return is_assignable(instance_type.refers_to, parent_type.refers_to, loader)
+        return parent_type.is_class_reference and parent_type.refers_to in _ARRAY_ANCESTORS
+    if parent_type.is_class_reference and parent_type.refers_to == RootObjectType.refers_to:
+        return instance_type.is_reference
+    return _Checker(loader).is_instance_of(instance_type, parent_type)
+
+
 def simple_instance_check(class_name: str, parent_name: str, loader: ClassLoader) -> bool:
     """Return true if instance of the class named `class_name` are instances of the class named `parent_name`"""
     return _Checker(loader).is_instance_of(
@@ -33,6 +58,56 @@ def simple_instance_check(class_name: str, parent_name: str, loader: ClassLoader
     )
 
 
+class TypeCheckCache:
+    """The results of instance-of checks against a single class, at a single bytecode site or exception handler
+
+    The class hierarchy never changes once classes are loaded,
+    so the answer for a given class of instances is computed once, by `is_value_instance_of`.
+
+    descriptor: str, the descriptor of the class that instances are checked against
+    loader: ClassLoader, the loader of the classes
+    hits: int, the amount of checks that were answered by the cache
+    misses: int, the amount of checks that were not
+    """
+
+    def __init__(self, descriptor, loader):
+        self.descriptor = descriptor
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self._results = dict()
+
+    def is_instance(self, instance: JvmValue) -> bool:
+        """Return the result of `is_value_instance_of(instance, self.descriptor, self.loader)`"""
+        key = type_key(instance.type)
+        try:
+            result = self._results[key]
+        except KeyError:
+            self.misses += 1
+            result = is_value_instance_of(instance, self.descriptor, self.loader)
+            self._results[key] = result
+            return result
+        self.hits += 1
+        return result
+
+
+def type_key(type_: Type):
+    """Return a hashable value that identifies `type_`
+
+    Types compare by name, and all class reference types share the same name, so they cannot be used as keys.
+    """
+    if type_.is_array_reference:
+        return '[', type_key(type_.refers_to)
+    if type_.is_class_reference:
+        return type_.refers_to
+    return type_.name
+
+
+@functools.lru_cache(maxsize=None)
+def _descriptor_type(descriptor):
+    return convert_type(field_descriptor(descriptor))
+
+
 class _Checker:
     def __init__(self, loader):
         self.loader = loader
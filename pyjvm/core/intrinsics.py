@@ -0,0 +1,144 @@
+"""Methods that are implemented in Python
+
+An intrinsic is a Python function that replaces the bytecode (or the missing native code) of a JVM method.
+The Machine calls it with itself and the arguments of the invocation, and no frame is created for it.
+It returns the method's result as a JvmValue, or None for void methods.
+Intrinsics throw exceptions by raising `IntrinsicThrow`.
+
+An `IntrinsicRegistry` maps classes and MethodKeys to intrinsics. `Machine.resolve` looks methods up in its registry
+before it asks the class loader, so a registered intrinsic replaces the method of any class loader.
+The registry that ships with pyjvm is `REGISTRY`, see `default_registry`. Its intrinsics are registered by:
+ - core/array_intrinsics.py: bulk array operations, ``System.arraycopy``, ``java.util.Arrays`` and array ``clone``
+ - core/jdk_intrinsics.py: ``java.lang.Math``, bit conversions and utilities of the number classes,
+   ``Character`` classification, number parsing and formatting, stack traces and string interning
+
+Most intrinsics are optional, a Machine can be created without them, see the `intrinsics` argument of `Machine`.
+Required intrinsics replace native methods that the Machine cannot run without.
+"""
+import jawa.util.descriptor
+
+from pyjvm.core.jvm_class import BytecodeMethod, MethodKey
+from pyjvm.utils.jawa_conversions import convert_type
+
+# The class name that the intrinsics of all array classes are registered with, see `IntrinsicRegistry.find`
+ARRAY_CLASS = '['
+
+
+class IntrinsicThrow(Exception):
+    """Raised by an intrinsic to throw a new instance of the class named `class_name`"""
+
+    def __init__(self, class_name):
+        super().__init__(class_name)
+        self.class_name = class_name
+
+
+def intrinsic_method(key, function):
+    """Return a BytecodeMethod for the method with the MethodKey `key`, that is implemented by `function`"""
+    descriptor = jawa.util.descriptor.method_descriptor(key.descriptor)
+    return BytecodeMethod(
+        name=key.name,
+        descriptor=key.descriptor,
+        instructions=[],
+        max_locals=0,
+        max_stack=0,
+        args=[convert_type(t) for t in descriptor.args],
+        intrinsic=function
+    )
+
+
+class Intrinsic:
+    """A registered intrinsic, callable like the function that implements it
+
+    class_name: str, the name of the class whose method the intrinsic replaces
+    key: MethodKey, the key of the method
+    function: the implementation, see the module documentation
+    required: bool, True if the Machine cannot run the method without the intrinsic
+    """
+
+    def __init__(self, class_name, key, function, required=False):
+        self.class_name = class_name
+        self.key = key
+        self.function = function
+        self.required = required
+
+    def __call__(self, machine, arguments):
+        return self.function(machine, arguments)
+
+    def __str__(self):
+        return f'{self.class_name}#{self.key.name}{self.key.descriptor}'
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self}>'
+
+
+class IntrinsicRegistry:
+    """A mapping from class names and MethodKeys to `Intrinsic`s"""
+
+    def __init__(self):
+        self._intrinsics = dict()
+        # The BytecodeMethods of intrinsics, by Intrinsic
+        self._methods = dict()
+
+    def add(self, class_name, key, function, required=False):
+        """Register `function` as the implementation of `class_name`#`key`
+
+        Raises a ValueError if the method already has an intrinsic.
+        """
+        if (class_name, key) in self._intrinsics:
+            raise ValueError(f'{class_name}#{key.name}{key.descriptor} already has an intrinsic')
+        self._intrinsics[(class_name, key)] = Intrinsic(class_name, key, function, required)
+
+    def register(self, class_name, name, descriptor, required=False):
+        """Return a decorator that registers a function as an intrinsic, like `add` does"""
+
+        def wrapper(function):
+            self.add(class_name, MethodKey(name, descriptor), function, required)
+            return function
+
+        return wrapper
+
+    def find(self, class_name, key, optional=True):
+        """Return the Intrinsic that replaces `class_name`#`key`, or None if there is none
+
+        Array classes, whose names start with '[', share the intrinsics of `ARRAY_CLASS`.
+        :param optional: False to only find required intrinsics
+        """
+        if class_name.startswith(ARRAY_CLASS):
+            class_name = ARRAY_CLASS
+        intrinsic = self._intrinsics.get((class_name, key))
+        if intrinsic is None or not (optional or intrinsic.required):
+            return None
+        return intrinsic
+
+    def method(self, class_name, key, optional=True):
+        """Return a BytecodeMethod that runs the intrinsic that `find` finds, or None if there is none"""
+        intrinsic = self.find(class_name, key, optional)
+        if intrinsic is None:
+            return None
+        try:
+            return self._methods[intrinsic]
+        except KeyError:
+            method = intrinsic_method(key, intrinsic)
+            self._methods[intrinsic] = method
+            return method
+
+    def __iter__(self):
+        return iter(self._intrinsics.values())
+
+    def __len__(self):
+        return len(self._intrinsics)
+
+
+REGISTRY = IntrinsicRegistry()
+
+
+def default_registry():
+    """Return `REGISTRY`, with the intrinsics that ship with pyjvm"""
+    # Imported here, since these modules register their intrinsics in REGISTRY, which they import from this module
+    from pyjvm.core import array_intrinsics, jdk_intrinsics  # noqa: F401
+    return REGISTRY
+
+
+def report(counts):
+    """Return a list of lines that describe `counts`, a mapping from Intrinsics to the times they were invoked"""
+    return [f'{intrinsic}: {count}' for intrinsic, count in sorted(counts.items(), key=lambda item: -item[1])]
@@ -0,0 +1,615 @@
+"""Intrinsics for hot methods of the JDK
+
+These replace small static methods that programs call often, and that take many instructions in bytecode:
+ - ``java.lang.Math``
+ - The bit conversions of ``Float`` and ``Double``, and the bit utilities of ``Integer`` and ``Long``
+ - The classification and case conversion methods of ``Character``
+ - Number parsing and formatting: ``parseInt``, ``toString``, ``toHexString``, ``String.valueOf`` and so on
+
+They also include required intrinsics that replace native methods: ``VMString.intern``, and
+``VMThrowable.fillInStackTrace`` and ``getStackTrace``, which capture stack traces lazily (see core/stack_traces.py).
+
+Most intrinsics here are registered with `_static`, which passes them the values of the arguments as Python numbers
+(or JvmObjects for references) and converts their results to the return type of the method.
+
+The intrinsics are registered in `intrinsics.REGISTRY`, see core/intrinsics.py.
+"""
+import math
+import random
+import re
+import unicodedata
+from decimal import Decimal
+from fractions import Fraction
+
+import jawa.util.descriptor
+
+from pyjvm.core.intrinsics import IntrinsicThrow, REGISTRY
+from pyjvm.core.jvm_class import MethodKey
+from pyjvm.core.jvm_types import Integer, Long, Float, Double, NULL_OBJECT
+from pyjvm.core.stack_traces import StackTrace, VM_THROWABLE
+from pyjvm.utils.bits import to_int, to_long, float_to_int_bits, float_to_raw_int_bits, int_bits_to_float, \
+    double_to_long_bits, double_to_raw_long_bits, long_bits_to_double, round_to_float
+from pyjvm.utils.jawa_conversions import string_instance, string_text
+from pyjvm.utils.utils import bool_to_num
+
+MATH = 'java/lang/Math'
+FLOAT = 'java/lang/Float'
+DOUBLE = 'java/lang/Double'
+INTEGER = 'java/lang/Integer'
+LONG = 'java/lang/Long'
+CHARACTER = 'java/lang/Character'
+STRING = 'java/lang/String'
+VM_STRING = 'java/lang/VMString'
+
+_STRING_DESCRIPTOR = f'L{STRING};'
+_NULL_POINTER = 'java/lang/NullPointerException'
+_NUMBER_FORMAT = 'java/lang/NumberFormatException'
+
+# Functions that turn the result of an intrinsic into a JvmValue, by the descriptor of the return type
+_RESULTS = {
+    'Z': bool_to_num,
+    'B': lambda value: Integer.create_instance(to_int(value)),
+    'C': lambda value: Integer.create_instance(value & 0xFFFF),
+    'S': lambda value: Integer.create_instance(to_int(value)),
+    'I': lambda value: Integer.create_instance(to_int(value)),
+    'J': lambda value: Long.create_instance(to_long(value)),
+    'F': lambda value: Float.create_instance(float(value)),
+    'D': lambda value: Double.create_instance(float(value)),
+    'V': lambda value: None,
+    _STRING_DESCRIPTOR: string_instance
+}
+
+
+def _static(class_name, name, descriptor):
+    """Return a decorator that registers a function of the values of the arguments as an intrinsic
+
+    The decorated function is returned unchanged, so it can be registered for several methods.
+    """
+    to_result = _RESULTS[jawa.util.descriptor.method_descriptor(descriptor).returns_descriptor]
+
+    def wrapper(function):
+        def intrinsic(machine, args):
+            return to_result(function(*(arg.value for arg in args)))
+
+        REGISTRY.add(class_name, MethodKey(name, descriptor), intrinsic)
+        return function
+
+    return wrapper
+
+
+def _text(string):
+    """Return the Python str of the String JvmObject `string`, throwing a NullPointerException if it is null"""
+    if string is NULL_OBJECT:
+        raise IntrinsicThrow(_NULL_POINTER)
+    return string_text(string)
+
+
+@REGISTRY.register(VM_THROWABLE, 'fillInStackTrace', '(Ljava/lang/Throwable;)Ljava/lang/VMThrowable;', required=True)
+def fill_in_stack_trace(machine, args):
+    """Record the frames of the machine, see core/stack_traces.py"""
+    throwable, = args
+    return StackTrace.capture(machine, throwable)
+
+
+@REGISTRY.register(
+    VM_THROWABLE, 'getStackTrace', '(Ljava/lang/Throwable;)[Ljava/lang/StackTraceElement;', required=True
+)
+def get_stack_trace(machine, args):
+    """Create the StackTraceElements of the frames that `fill_in_stack_trace` recorded"""
+    vm_throwable, throwable = args
+    return vm_throwable.value.elements(machine)
+
+
+@REGISTRY.register(VM_STRING, 'intern', f'({_STRING_DESCRIPTOR}){_STRING_DESCRIPTOR}', required=True)
+@REGISTRY.register(STRING, 'intern', f'(){_STRING_DESCRIPTOR}')
+def intern(machine, args):
+    """Strings are interned in the loader's table of string constants, so interned strings are identical to literals"""
+    string, = args
+    if string.is_null:
+        raise IntrinsicThrow(_NULL_POINTER)
+    return machine.class_loader.shared_constants.intern(string)
+
+
+# java.lang.Math
+
+def _nan_on_error(function):
+    """Wrap a function of floats to return NaN where Python raises a ValueError, and infinity on overflow"""
+
+    def wrapper(*args):
+        try:
+            return function(*args)
+        except ValueError:
+            return math.nan
+        except OverflowError:
+            return math.inf
+
+    return wrapper
+
+
+def _logarithm(function, zero):
+    """Wrap a logarithm function to return -infinity at `zero` and NaN below it, like Java does"""
+
+    def wrapper(value):
+        if value == zero:
+            return -math.inf
+        if math.isnan(value) or value < zero:
+            return math.nan
+        return function(value)
+
+    return wrapper
+
+
+def _is_odd_integer(value):
+    return math.isfinite(value) and value == math.floor(value) and math.fmod(value, 2) != 0
+
+
+def power(base, exponent):
+    """``Math.pow``"""
+    if math.isnan(exponent) or (abs(base) == 1 and math.isinf(exponent)):
+        return math.nan
+    try:
+        return math.pow(base, exponent)
+    except (ValueError, OverflowError):
+        if math.isnan(base) or (base < 0 and exponent != math.floor(exponent)):
+            return math.nan
+        negative = math.copysign(1.0, base) < 0 and _is_odd_integer(exponent)
+        return -math.inf if negative else math.inf
+
+
+def _sinh(value):
+    try:
+        return math.sinh(value)
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+def floor(value):
+    """``Math.floor``, which keeps the sign of zeros"""
+    if not math.isfinite(value) or value == 0:
+        return value
+    return float(math.floor(value))
+
+
+def ceil(value):
+    """``Math.ceil``, which returns -0.0 for values between -1 and 0"""
+    if not math.isfinite(value) or value == 0:
+        return value
+    if -1 < value < 0:
+        return -0.0
+    return float(math.ceil(value))
+
+
+def rint(value):
+    """``Math.rint``, which rounds halves to the even integer"""
+    if not math.isfinite(value) or value == 0:
+        return value
+    return math.copysign(float(round(value)), value)
+
+
+def _rounder(bits):
+    """Return ``Math.round`` for a result of `bits` bits, which rounds halves up and saturates"""
+    low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+
+    def round_(value):
+        if math.isnan(value):
+            return 0
+        if math.isinf(value):
+            return high if value > 0 else low
+        integer = math.floor(value)
+        # value - integer is exact, unlike value + 0.5
+        if value - integer >= 0.5:
+            integer += 1
+        return max(low, min(high, integer))
+
+    return round_
+
+
+def _maximum(first, second):
+    """``Math.max`` for floating point values, where NaN wins and 0.0 is greater than -0.0"""
+    if math.isnan(first) or math.isnan(second):
+        return math.nan
+    if first == second == 0:
+        return second if math.copysign(1.0, first) < 0 else first
+    return max(first, second)
+
+
+def _minimum(first, second):
+    """``Math.min`` for floating point values, where NaN wins and -0.0 is less than 0.0"""
+    if math.isnan(first) or math.isnan(second):
+        return math.nan
+    if first == second == 0:
+        return first if math.copysign(1.0, first) < 0 else second
+    return min(first, second)
+
+
+def _signum(value):
+    if math.isnan(value) or value == 0:
+        return value
+    return math.copysign(1.0, value)
+
+
+def _cube_root(value):
+    if not math.isfinite(value) or value == 0:
+        return value
+    return math.copysign(abs(value) ** (1 / 3), value)
+
+
+def _remainder(dividend, divisor):
+    """``Math.IEEEremainder``, for Pythons without `math.remainder`
+
+    The remainder of IEEE 754 is always exact, so it is computed exactly, with the quotient rounded half to even.
+    """
+    if math.isnan(dividend) or math.isnan(divisor) or math.isinf(dividend) or divisor == 0:
+        return math.nan
+    if math.isinf(divisor):
+        return dividend
+    quotient = round(Fraction(dividend) / Fraction(divisor))
+    result = float(Fraction(dividend) - quotient * Fraction(divisor))
+    return math.copysign(0.0, dividend) if result == 0 else result
+
+
+_DOUBLE_FUNCTIONS = {
+    'sin': _nan_on_error(math.sin),
+    'cos': _nan_on_error(math.cos),
+    'tan': _nan_on_error(math.tan),
+    'asin': _nan_on_error(math.asin),
+    'acos': _nan_on_error(math.acos),
+    'atan': math.atan,
+    'sinh': _sinh,
+    'cosh': _nan_on_error(math.cosh),
+    'tanh': math.tanh,
+    'exp': _nan_on_error(math.exp),
+    'expm1': _nan_on_error(math.expm1),
+    'log': _logarithm(math.log, 0),
+    'log10': _logarithm(math.log10, 0),
+    'log1p': _logarithm(math.log1p, -1),
+    'sqrt': _nan_on_error(math.sqrt),
+    'cbrt': getattr(math, 'cbrt', _cube_root),
+    'floor': floor,
+    'ceil': ceil,
+    'rint': rint,
+    'toRadians': math.radians,
+    'toDegrees': math.degrees,
+    'signum': _signum
+}
+
+_DOUBLE_PAIR_FUNCTIONS = {
+    'pow': power,
+    'atan2': math.atan2,
+    'hypot': math.hypot,
+    'IEEEremainder': _nan_on_error(getattr(math, 'remainder', _remainder))
+}
+
+
+def _register_math():
+    for name, function in _DOUBLE_FUNCTIONS.items():
+        _static(MATH, name, '(D)D')(function)
+    for name, function in _DOUBLE_PAIR_FUNCTIONS.items():
+        _static(MATH, name, '(DD)D')(function)
+    _static(MATH, 'signum', '(F)F')(_signum)
+    _static(MATH, 'round', '(D)J')(_rounder(64))
+    _static(MATH, 'round', '(F)I')(_rounder(32))
+    _static(MATH, 'random', '()D')(random.random)
+    for letter in 'IJ':
+        _static(MATH, 'abs', f'({letter}){letter}')(abs)
+        _static(MATH, 'max', f'({letter}{letter}){letter}')(max)
+        _static(MATH, 'min', f'({letter}{letter}){letter}')(min)
+    for letter in 'FD':
+        _static(MATH, 'abs', f'({letter}){letter}')(math.fabs)
+        _static(MATH, 'max', f'({letter}{letter}){letter}')(_maximum)
+        _static(MATH, 'min', f'({letter}{letter}){letter}')(_minimum)
+
+
+# Float and Double
+
+def _register_floating_point():
+    _static(FLOAT, 'floatToIntBits', '(F)I')(float_to_int_bits)
+    _static(FLOAT, 'floatToRawIntBits', '(F)I')(float_to_raw_int_bits)
+    _static(FLOAT, 'intBitsToFloat', '(I)F')(int_bits_to_float)
+    _static(DOUBLE, 'doubleToLongBits', '(D)J')(double_to_long_bits)
+    _static(DOUBLE, 'doubleToRawLongBits', '(D)J')(double_to_raw_long_bits)
+    _static(DOUBLE, 'longBitsToDouble', '(J)D')(long_bits_to_double)
+    for class_name, letter in [(FLOAT, 'F'), (DOUBLE, 'D')]:
+        _static(class_name, 'isNaN', f'({letter})Z')(math.isnan)
+        _static(class_name, 'isInfinite', f'({letter})Z')(math.isinf)
+
+
+# Integer and Long
+
+def _register_bit_utilities(class_name, letter, bits):
+    """Register the bit utilities of the class named `class_name`, whose values are `bits` wide"""
+    mask = (1 << bits) - 1
+
+    def add(name, args, returns):
+        return _static(class_name, name, f'({args}){returns}')
+
+    @add('bitCount', letter, 'I')
+    def bit_count(value):
+        return bin(value & mask).count('1')
+
+    @add('highestOneBit', letter, letter)
+    def highest_one_bit(value):
+        value &= mask
+        return 1 << (value.bit_length() - 1) if value else 0
+
+    @add('lowestOneBit', letter, letter)
+    def lowest_one_bit(value):
+        return value & -value
+
+    @add('numberOfLeadingZeros', letter, 'I')
+    def number_of_leading_zeros(value):
+        return bits - (value & mask).bit_length()
+
+    @add('numberOfTrailingZeros', letter, 'I')
+    def number_of_trailing_zeros(value):
+        return (value & -value).bit_length() - 1 if value else bits
+
+    @add('reverse', letter, letter)
+    def reverse(value):
+        return int(format(value & mask, f'0{bits}b')[::-1], 2)
+
+    @add('reverseBytes', letter, letter)
+    def reverse_bytes(value):
+        return int.from_bytes((value & mask).to_bytes(bits // 8, 'little'), 'big')
+
+    @add('rotateLeft', letter + 'I', letter)
+    def rotate_left(value, distance):
+        value &= mask
+        distance &= bits - 1
+        return (value << distance) | (value >> (bits - distance))
+
+    @add('rotateRight', letter + 'I', letter)
+    def rotate_right(value, distance):
+        return rotate_left(value, -distance)
+
+    @add('signum', letter, 'I')
+    def signum(value):
+        return (value > 0) - (value < 0)
+
+
+# Character
+
+def _character(code):
+    """Return the character of the code point `code`, or None if it is not a valid code point"""
+    if 0 <= code <= 0x10FFFF:
+        return chr(code)
+    return None
+
+
+def _classifier(predicate):
+    """Return a function of a code point that applies `predicate` to its character, False for invalid code points"""
+
+    def classify(code):
+        character = _character(code)
+        return character is not None and predicate(character)
+
+    return classify
+
+
+def _is_whitespace(character):
+    """``Character.isWhitespace``, which excludes non breaking spaces"""
+    if character in '\t\n\u000b\f\r\u001c\u001d\u001e\u001f':
+        return True
+    return unicodedata.category(character) in ('Zs', 'Zl', 'Zp') and character not in '\u00a0\u2007\u202f'
+
+
+def _is_space_char(character):
+    return unicodedata.category(character) in ('Zs', 'Zl', 'Zp')
+
+
+def _converter(convert):
+    """Return a case conversion of code points, which keeps characters whose conversion is not a single character"""
+
+    def convert_code(code):
+        character = _character(code)
+        if character is None:
+            return code
+        converted = convert(character)
+        return ord(converted) if len(converted) == 1 else code
+
+    return convert_code
+
+
+def digit(code, radix):
+    """``Character.digit``, the value of the digit `code` in `radix`, or -1"""
+    character = _character(code)
+    if character is None or not 2 <= radix <= 36:
+        return -1
+    value = unicodedata.decimal(character, None)
+    if value is None:
+        lowered = character.lower()
+        if 'a' <= lowered <= 'z':
+            value = ord(lowered) - ord('a') + 10
+        elif '\uff41' <= lowered <= '\uff5a':
+            # Fullwidth Latin letters
+            value = ord(lowered) - ord('\uff41') + 10
+        else:
+            return -1
+    return value if value < radix else -1
+
+
+def for_digit(value, radix):
+    """``Character.forDigit``, the character of the digit `value` in `radix`, or 0"""
+    if not 2 <= radix <= 36 or not 0 <= value < radix:
+        return 0
+    return ord('0123456789abcdefghijklmnopqrstuvwxyz'[value])
+
+
+_CHARACTER_CLASSIFIERS = {
+    'isDigit': lambda character: unicodedata.category(character) == 'Nd',
+    'isLetter': lambda character: unicodedata.category(character).startswith('L'),
+    'isLetterOrDigit': lambda character: unicodedata.category(character).startswith('L')
+    or unicodedata.category(character) == 'Nd',
+    'isWhitespace': _is_whitespace,
+    'isSpaceChar': _is_space_char,
+    'isUpperCase': lambda character: unicodedata.category(character) == 'Lu',
+    'isLowerCase': lambda character: unicodedata.category(character) == 'Ll'
+}
+
+
+def _register_character():
+    for letter in 'CI':
+        for name, predicate in _CHARACTER_CLASSIFIERS.items():
+            _static(CHARACTER, name, f'({letter})Z')(_classifier(predicate))
+        _static(CHARACTER, 'toUpperCase', f'({letter}){letter}')(_converter(str.upper))
+        _static(CHARACTER, 'toLowerCase', f'({letter}){letter}')(_converter(str.lower))
+        _static(CHARACTER, 'digit', f'({letter}I)I')(digit)
+    _static(CHARACTER, 'forDigit', '(II)C')(for_digit)
+
+
+# Parsing
+
+def _integer_parser(bits):
+    """Return ``parseInt`` or ``parseLong``, for values of `bits` bits"""
+    low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+
+    def parse(string, radix=10):
+        if string is NULL_OBJECT:
+            raise IntrinsicThrow(_NUMBER_FORMAT)
+        text = _text(string)
+        if not 2 <= radix <= 36 or not text:
+            raise IntrinsicThrow(_NUMBER_FORMAT)
+        negative = text[0] == '-'
+        digits = text[1:] if text[0] in '+-' else text
+        if not digits:
+            raise IntrinsicThrow(_NUMBER_FORMAT)
+        result = 0
+        for character in digits:
+            value = digit(ord(character), radix)
+            if value < 0:
+                raise IntrinsicThrow(_NUMBER_FORMAT)
+            result = result * radix + value
+        result = -result if negative else result
+        if not low <= result <= high:
+            raise IntrinsicThrow(_NUMBER_FORMAT)
+        return result
+
+    return parse
+
+
+_DECIMAL_FLOAT = re.compile(r'[+-]?(NaN|Infinity|(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?)[fFdD]?')
+_HEXADECIMAL_FLOAT = re.compile(r'([+-]?0[xX]([0-9a-fA-F]+\.?[0-9a-fA-F]*|\.[0-9a-fA-F]+)[pP][+-]?\d+)[fFdD]?')
+
+
+def parse_double(string):
+    """``Double.parseDouble``"""
+    # Like String.trim, which removes all characters up to the space
+    text = _text(string).strip(''.join(map(chr, range(0x21))))
+    if _DECIMAL_FLOAT.fullmatch(text):
+        return float(text.rstrip('fFdD'))
+    hexadecimal = _HEXADECIMAL_FLOAT.fullmatch(text)
+    if hexadecimal:
+        return float.fromhex(hexadecimal.group(1))
+    raise IntrinsicThrow(_NUMBER_FORMAT)
+
+
+def parse_float(string):
+    """``Float.parseFloat``"""
+    return round_to_float(parse_double(string))
+
+
+# Formatting
+
+def _integer_string(value, radix=10):
+    """``Integer.toString`` and ``Long.toString``, which use radix 10 for invalid radixes"""
+    if not 2 <= radix <= 36:
+        radix = 10
+    digits = []
+    magnitude = abs(value)
+    while True:
+        magnitude, remainder = divmod(magnitude, radix)
+        digits.append('0123456789abcdefghijklmnopqrstuvwxyz'[remainder])
+        if not magnitude:
+            break
+    sign = '-' if value < 0 else ''
+    return sign + ''.join(reversed(digits))
+
+
+def _unsigned_string(bits, format_spec):
+    """Return ``toHexString``, ``toOctalString`` or ``toBinaryString`` for values of `bits` bits"""
+    mask = (1 << bits) - 1
+    return lambda value: format(value & mask, format_spec)
+
+
+def _shortest_float_digits(value):
+    """Return the shortest decimal representation of `value` that rounds to the same 32 bit float"""
+    for precision in range(1, 10):
+        text = f'{value:.{precision}e}'
+        if round_to_float(float(text)) == value:
+            return text
+    return repr(value)
+
+
+def _floating_point_string(value, digits_text):
+    """Format the decimal digits of the finite `value` like ``Double.toString`` does
+
+    :param digits_text: a representation of `value` that Decimal accepts, with the digits that should be shown
+    """
+    if value == 0:
+        return '-0.0' if math.copysign(1.0, value) < 0 else '0.0'
+    sign, digits, exponent = Decimal(digits_text).as_tuple()
+    digits = list(digits)
+    while len(digits) > 1 and digits[-1] == 0:
+        digits.pop()
+        exponent += 1
+    # The power of ten of the first digit
+    scientific = exponent + len(digits) - 1
+    text = ''.join(map(str, digits))
+    if 1e-3 <= abs(value) < 1e7:
+        if scientific >= 0:
+            integer = text[:scientific + 1].ljust(scientific + 1, '0')
+            fraction = text[scientific + 1:] or '0'
+        else:
+            integer = '0'
+            fraction = '0' * (-scientific - 1) + text
+        result = f'{integer}.{fraction}'
+    else:
+        result = f'{text[0]}.{text[1:] or "0"}E{scientific}'
+    return '-' + result if sign else result
+
+
+def _special_string(value):
+    """Return the string of NaN and the infinities, or None for finite values"""
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    return None
+
+
+def double_string(value):
+    """``Double.toString``"""
+    return _special_string(value) or _floating_point_string(value, repr(value))
+
+
+def float_string(value):
+    """``Float.toString``, which shows the digits that tell the value apart from other 32 bit floats"""
+    return _special_string(value) or _floating_point_string(value, _shortest_float_digits(value))
+
+
+def _register_numbers():
+    for class_name, letter, bits in [(INTEGER, 'I', 32), (LONG, 'J', 64)]:
+        _register_bit_utilities(class_name, letter, bits)
+        name = 'parseInt' if letter == 'I' else 'parseLong'
+        parse = _integer_parser(bits)
+        _static(class_name, name, f'({_STRING_DESCRIPTOR}){letter}')(parse)
+        _static(class_name, name, f'({_STRING_DESCRIPTOR}I){letter}')(parse)
+        _static(class_name, 'toString', f'({letter}){_STRING_DESCRIPTOR}')(_integer_string)
+        _static(class_name, 'toString', f'({letter}I){_STRING_DESCRIPTOR}')(_integer_string)
+        for name, format_spec in [('toHexString', 'x'), ('toOctalString', 'o'), ('toBinaryString', 'b')]:
+            _static(class_name, name, f'({letter}){_STRING_DESCRIPTOR}')(_unsigned_string(bits, format_spec))
+        _static(STRING, 'valueOf', f'({letter}){_STRING_DESCRIPTOR}')(_integer_string)
+    _static(DOUBLE, 'parseDouble', f'({_STRING_DESCRIPTOR})D')(parse_double)
+    _static(FLOAT, 'parseFloat', f'({_STRING_DESCRIPTOR})F')(parse_float)
+    _static(DOUBLE, 'toString', f'(D){_STRING_DESCRIPTOR}')(double_string)
+    _static(FLOAT, 'toString', f'(F){_STRING_DESCRIPTOR}')(float_string)
+    _static(STRING, 'valueOf', f'(D){_STRING_DESCRIPTOR}')(double_string)
+    _static(STRING, 'valueOf', f'(F){_STRING_DESCRIPTOR}')(float_string)
+    _static(STRING, 'valueOf', f'(Z){_STRING_DESCRIPTOR}')(lambda value: 'true' if value else 'false')
+    _static(STRING, 'valueOf', f'(C){_STRING_DESCRIPTOR}')(chr)
+
+
+_register_math()
+_register_floating_point()
+_register_character()
+_register_numbers()
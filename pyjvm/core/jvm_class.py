@@ -1,6 +1,12 @@
 import attr
 
 
+def _resolve_constants(jvm_class):
+    # Imported here, since resolving constants uses jawa_conversions, which imports this module
+    from pyjvm.core.constant_pool import ResolvedConstants
+    return ResolvedConstants(jvm_class.constants)
+
+
 @attr.s(frozen=True)
 class JvmClass:
     """A class at runtime
@@ -11,6 +17,7 @@ class JvmClass:
     fields: Mapping[str, JvmType], the names and types of the instance fields in this class
     methods: Mapping[MethodKey, BytecodeMethod], the keys and corresponding methods in this class
     static_fields: Mapping[str, JvmType], the names and types of the static fields in this class
+    resolved_constants: ResolvedConstants, the lazily resolved entries of `constants`, see core/constant_pool.py
 
     Note that `fields` holds only instance fields, static fields go into `static_fields`.
     However, `methods` holds all methods, including static methods.
@@ -22,6 +29,7 @@ class JvmClass:
     fields = attr.ib(converter=dict, default=())
     methods = attr.ib(converter=dict, default=())
     static_fields = attr.ib(converter=dict, default=())
+    resolved_constants = attr.ib(default=attr.Factory(_resolve_constants, takes_self=True), cmp=False, repr=False)
 
 
 @attr.s(frozen=True)
@@ -44,7 +52,25 @@ class ExceptionHandler:
 
     def relevant_to_pc(self, pc):
         """Return True if this handler should handle exception thrown at `pc`, False otherwise."""
-        return pc in range(self.start_pc, self.end_pc)
+        return self.start_pc <= pc < self.end_pc
+
+
+def _handlers_by_pc(handlers):
+    """Return the relevant handlers of every program counter value that any handler covers, see `Handlers.by_pc`"""
+    handlers = handlers.handlers
+    end = max((handler.end_pc for handler in handlers), default=0)
+    boundaries = sorted({
+        0,
+        end,
+        *(handler.start_pc for handler in handlers),
+        *(handler.end_pc for handler in handlers)
+    })
+    by_pc = []
+    # The relevant handlers only change at the boundaries of handlers, so they are computed once per interval
+    for start, stop in zip(boundaries, boundaries[1:]):
+        relevant = tuple(handler for handler in handlers if handler.relevant_to_pc(start))
+        by_pc.extend([relevant] * (stop - start))
+    return tuple(by_pc)
 
 
 @attr.s(frozen=True)
@@ -53,12 +79,85 @@ class Handlers:
 
     The JVM 8 specification states that the order of handlers matters.
     This class does not change the order and respect it in lookups.
+
+    by_pc: Tuple[Tuple[ExceptionHandler]], the relevant handlers of every program counter value, in order.
+      Computed once per method, so that finding the handlers of a throw is a single lookup.
+      Program counter values past its end have no handlers
     """
     handlers = attr.ib(converter=tuple, factory=tuple)
+    by_pc = attr.ib(default=attr.Factory(_handlers_by_pc, takes_self=True), init=False, cmp=False, repr=False)
 
     def find_handlers(self, pc):
         """Return the handlers that are relevant to `pc`, in order"""
-        return tuple(handler for handler in self.handlers if handler.relevant_to_pc(pc))
+        by_pc = self.by_pc
+        if pc < len(by_pc):
+            return by_pc[pc]
+        return ()
+
+
+class InstructionTable:
+    """Constant time lookups from program counter values to instructions
+
+    A frame's program counter is a byte offset into the method's code, but the frame keeps its instructions in a list.
+    The instruction to execute is the first one with a `pos` greater or equal to the program counter.
+    This class precomputes that relation for every possible program counter value, once per method.
+
+    positions: Tuple[int], the `pos` of every instruction, followed by `end_pc`
+    by_pc: Tuple[int], for every program counter value up to and including `end_pc`, the index of the instruction
+      that should execute when the frame reaches it. `len(positions) - 1` marks the end of the method.
+    successors: Tuple[int], for every instruction index, the index of the instruction that executes after it
+    end_pc: int, a program counter value that is past the last instruction
+    """
+
+    def __init__(self, instructions):
+        positions = [ins.pos for ins in instructions]
+        amount = len(positions)
+        self.end_pc = positions[-1] + 1 if positions else 0
+
+        by_pc = []
+        index = 0
+        for pc in range(self.end_pc + 1):
+            while index < amount and positions[index] < pc:
+                index += 1
+            by_pc.append(index)
+
+        self.by_pc = tuple(by_pc)
+        self.successors = tuple(by_pc[pos + 1] for pos in positions)
+        self.positions = tuple(positions) + (self.end_pc,)
+        self.end = amount
+
+    def index_at(self, pc):
+        """Return the index of the instruction that should execute when the program counter is `pc`
+
+        The result is equal to `self.end` if there are no more instructions at `pc`.
+        """
+        by_pc = self.by_pc
+        if 0 <= pc < len(by_pc):
+            return by_pc[pc]
+        return self.end
+
+    def pc_after(self, index):
+        """Return the program counter value that follows the instruction at `index`"""
+        return self.positions[self.successors[index]]
+
+
+# The attributes of a BytecodeMethod that `BytecodeMethod.deferred` loads on first use
+_CODE_FIELDS = ('instructions', 'max_locals', 'max_stack', 'exception_handlers', 'instruction_table')
+
+
+@attr.s(frozen=True)
+class MethodCode:
+    """The code of a method, as returned by the `load_code` function of a deferred BytecodeMethod
+
+    instructions: Iterable[Instruction], the instructions for the method
+    max_locals: int, the size of the Locals array
+    max_stack: int, the maximum size of the frame's op stack
+    exception_handlers: Handlers, the exception handlers of the method
+    """
+    instructions = attr.ib(converter=tuple)
+    max_locals = attr.ib(converter=int)
+    max_stack = attr.ib(converter=int)
+    exception_handlers = attr.ib(factory=Handlers)
 
 
 @attr.s(frozen=True)
@@ -72,6 +171,11 @@ class BytecodeMethod:
     max_stack: int, the maximum size of the frame's op stack
     args: Iterable[JvmType], the types of arguments this method expects.
     exception_handler: Handlers, the exception handlers of the method. Defaults to an empty Handlers object.
+    instruction_table: InstructionTable, program counter lookups for `instructions`. Computed if not provided.
+    intrinsic: A Python function that implements this method instead of its instructions, see core/intrinsics.py.
+    Defaults to None.
+    has_code: bool, True if this method has instructions. Computed if not provided.
+    load_code: A function that returns the MethodCode of a deferred method, see `deferred`. None for other methods.
     """
     name = attr.ib(converter=str)
     descriptor = attr.ib(converter=str)
@@ -81,6 +185,65 @@ class BytecodeMethod:
     args = attr.ib(converter=tuple)
     is_native = attr.ib(default=False, converter=bool)
     exception_handlers = attr.ib(factory=Handlers)
+    instruction_table = attr.ib(cmp=False, repr=False)
+    intrinsic = attr.ib(default=None, cmp=False, repr=False)
+    has_code = attr.ib(cmp=False, repr=False)
+    load_code = attr.ib(default=None, cmp=False, repr=False)
+
+    @instruction_table.default
+    def _instruction_table_default(self):
+        return InstructionTable(self.instructions)
+
+    @has_code.default
+    def _has_code_default(self):
+        return len(self.instructions) > 0
+
+    @classmethod
+    def deferred(cls, name, descriptor, args, is_native, has_code, load_code):
+        """Return a method whose code is loaded when one of its code attributes is first used
+
+        Most methods of a loaded class are never invoked, so the work of disassembling them is postponed.
+        The code attributes are `instructions`, `max_locals`, `max_stack`, `exception_handlers` and
+        `instruction_table`, the other attributes are available immediately.
+
+        :param has_code: True if the method has instructions, which is the case if it is neither abstract nor native
+        :param load_code: A function that takes no arguments and returns the MethodCode of the method
+        """
+        return cls(
+            name=name,
+            descriptor=descriptor,
+            instructions=(),
+            max_locals=0,
+            max_stack=0,
+            args=args,
+            is_native=is_native,
+            exception_handlers=_NO_HANDLERS,
+            instruction_table=_NO_INSTRUCTIONS,
+            has_code=has_code,
+            load_code=load_code
+        )
+
+    def __attrs_post_init__(self):
+        if self.load_code is not None:
+            # The code attributes are missing until they are first used, see `__getattr__`
+            for name in _CODE_FIELDS:
+                del self.__dict__[name]
+
+    def __getattr__(self, name):
+        # Only called for missing attributes, which are the code attributes of a deferred method until they are loaded
+        load_code = self.__dict__.get('load_code')
+        if name not in _CODE_FIELDS or load_code is None:
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        code = load_code()
+        values = attr.asdict(code, recurse=False)
+        values['instruction_table'] = InstructionTable(code.instructions)
+        for field, value in values.items():
+            object.__setattr__(self, field, value)
+        return values[name]
+
+
+_NO_HANDLERS = Handlers()
+_NO_INSTRUCTIONS = InstructionTable(())
 
 
 @attr.s(frozen=True)
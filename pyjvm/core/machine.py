@@ -1,12 +1,32 @@
-from pyjvm.core.class_loaders import ClassLoader
+from collections import Counter
+from functools import partial
+
+from pyjvm.core import tracing
+from pyjvm.core.actions import Action
+from pyjvm.core.call_sites import CallSites
+from pyjvm.core.class_loaders import ClassLoader, dispatch_class_name
 from pyjvm.core.frame import Frame
-from pyjvm.core.hierarchies import is_value_instance_of
+from pyjvm.core.hierarchies import TypeCheckCache
+from pyjvm.core.intrinsics import IntrinsicThrow, default_registry
 from pyjvm.core.jvm_class import MethodKey
 from pyjvm.core.stack import Stack
-from pyjvm.instructions.instructions import execute_instruction, InstructorInputs
+from pyjvm.instructions import direct, compiler, unboxed
+from pyjvm.instructions import superinstructions as superinstructions_module
+from pyjvm.instructions.instructions import bind_instruction
 from pyjvm.utils.utils import class_as_descriptor
 
 
+# The engine that translates instructions to `Actions` and executes them. The readable reference implementation.
+ACTIONS_ENGINE = 'actions'
+# The engine that executes instructions by changing the current frame directly, see instructions/direct.py
+DIRECT_ENGINE = 'direct'
+# A variant of the direct engine that keeps ints and floats unboxed in frames, see instructions/unboxed.py
+UNBOXED_ENGINE = 'unboxed'
+ENGINES = (ACTIONS_ENGINE, DIRECT_ENGINE, UNBOXED_ENGINE)
+# The engines that execute handlers, functions that change the frame directly
+HANDLER_ENGINES = (DIRECT_ENGINE, UNBOXED_ENGINE)
+
+
 class Unhandled(Exception):
     """An JVM exception that propagated all the way up"""
 
@@ -25,6 +45,7 @@ class Machine:
     In other words, an object that runs JVM class files.
 
     See the `act` method documentation for information in how actions are dispatched to their corresponding method.
+    Action types that are defined outside of this project can plug in using `register_executor`.
 
     Many of the action methods are `self` explanatory when taken together with the corresponding Action sub class.
     See action.py for more information.
@@ -33,74 +54,263 @@ class Machine:
     The actions `Invoke`, `ThrowObject` and `CreateAndThrow` need not be used with the `IncrementProgramCounter` action.
     See the corresponding methods `_invoke`, `_throw_object` and `_create_and_throw` for the implementation details
     that handle the program counter in these situations.
+
+    Instructions can be executed by one of three engines, see `ENGINES`.
+    The actions engine is the one described above.
+    The direct engine skips the actions and changes the current frame directly,
+    using the public methods of this class (`invoke`, `throw` and so on) for operations that involve other frames.
+    The direct engine can also execute common instruction sequences as superinstructions,
+    see instructions/superinstructions.py.
+    The unboxed engine is a direct engine that keeps int and float values in frames as plain Python numbers,
+    see instructions/unboxed.py.
+    The direct engine can also compile methods that are invoked often enough to Python functions,
+    see instructions/compiler.py.
     """
 
-    def __init__(self, class_loader: ClassLoader, echo=None):
+    # Executors for Action types that do not have a corresponding method, see `register_executor`
+    _external_executors = dict()
+
+    def __init__(self, class_loader: ClassLoader, echo=None, engine=ACTIONS_ENGINE, superinstructions=None,
+                 pair_profile=None, compile_threshold=None, compiled_cache_size=128, polymorphic_limit=4,
+                 tracer=None, intrinsics=True, intrinsic_registry=None):
         """Return a new Machine instance
 
         Note that Machine will change the `class_loader.first_load_function`
         :param class_loader: the ClassLoader this machine should use
-        :param echo: A `print` like function for reports during execution
+        :param echo: A `print` like function for reports during execution, a shorthand for an `EchoTracer`
+        :param engine: One of `ENGINES`, the way instructions should be executed
+        :param superinstructions: Patterns of instructions to fuse, only supported by the direct and unboxed engines.
+        Defaults to `superinstructions.DEFAULT_PATTERNS` for these engines, unless the machine is traced or records
+        a pair profile, since superinstructions are reported and recorded as their first instruction.
+        :param pair_profile: A `superinstructions.PairProfile` that will record the executed instructions
+        :param compile_threshold: The amount of invocations after which a method is compiled.
+        Defaults to None, which means that methods are never compiled. Only supported by the direct engine
+        :param compiled_cache_size: The maximal amount of compiled methods to keep
+        :param polymorphic_limit: The amount of receiver types a call site caches before it becomes megamorphic.
+        Call sites are used by the direct and unboxed engines, see core/call_sites.py
+        :param tracer: A `tracing.Tracer` that receives the events of the execution, see core/tracing.py.
+        Cannot be combined with `echo`
+        :param intrinsics: False to run the methods that have optional intrinsics as bytecode.
+        Required intrinsics are always used, see core/intrinsics.py
+        :param intrinsic_registry: The `IntrinsicRegistry` to look intrinsics up in, defaults to `default_registry()`
         """
+        if engine not in ENGINES:
+            raise ValueError(f'Unknown engine {engine}, expected one of {", ".join(ENGINES)}')
+        if echo is not None:
+            if tracer is not None:
+                raise ValueError('A machine can either echo or use a tracer, not both')
+            tracer = tracing.EchoTracer(echo)
+        if superinstructions is None:
+            if engine in HANDLER_ENGINES and tracer is None and pair_profile is None:
+                superinstructions = superinstructions_module.DEFAULT_PATTERNS
+            else:
+                superinstructions = ()
+        elif superinstructions and engine not in HANDLER_ENGINES:
+            raise ValueError(f'Superinstructions are only supported by the {" and ".join(HANDLER_ENGINES)} engines')
+        self.engine = engine
+        self.superinstructions = superinstructions_module.validate_patterns(superinstructions)
+        self.pair_profile = pair_profile
+        if compile_threshold is not None and engine != DIRECT_ENGINE:
+            raise ValueError(f'Compilation is only supported by the {DIRECT_ENGINE} engine')
+        self.compile_threshold = compile_threshold
+        self.compiled_methods = compiler.CompiledMethods(compiled_cache_size)
+        self._invocation_counts = Counter()
+        self.call_sites = CallSites(polymorphic_limit)
         self.class_loader = class_loader
         self.class_loader.first_load_function = self._first_class_load
         self.frames = Stack()
-        self.echo = echo
-        if self.echo is None:
-            self.echo = _default_echo
+        self._linked_methods = dict()
+        # TypeCheckCaches of exception handlers, by handler
+        self._catch_type_checks = dict()
+        self._executors = self._create_executors()
+        self.tracer = tracer
+        self.use_intrinsics = intrinsics
+        self.intrinsic_registry = default_registry() if intrinsic_registry is None else intrinsic_registry
+        # The amount of times each Intrinsic was invoked, see `intrinsics.report`
+        self.intrinsic_counts = Counter()
+        # The amount of frames that are hidden by running <clinit> methods on temporary stacks, for trace depths
+        self._hidden_depth = 0
+        if tracer is not None:
+            self._run_instruction = self._run_traced_instruction
+
+    @classmethod
+    def register_executor(cls, action_type):
+        """Return a decorator that registers a function as the executor of `action_type`
+
+        The function will be called with the machine and the action.
+        Registration affects machines that are created after it.
+
+            .. code::
+
+                @Machine.register_executor(SomeAction)
+                def execute_some_action(machine, action):
+                    pass
+        """
+
+        def wrapper(func):
+            cls._external_executors[action_type] = func
+            return func
+
+        return wrapper
+
+    def _create_executors(self):
+        """Return a dictionary from every Action sub class that has an executor to the callable that executes it
+
+        Action types without an executor are left out, `act` raises a TypeError if one of them is executed.
+        """
+        executors = dict()
+        for action_type in Action.action_types():
+            executor = self._find_executor(action_type)
+            if executor is not None:
+                executors[action_type] = executor
+        return executors
+
+    def _find_executor(self, action_type):
+        """Return the callable that executes actions of `action_type`, or None if there is none"""
+        try:
+            return partial(self._external_executors[action_type], self)
+        except KeyError:
+            return getattr(self, _to_snake_case(action_type.__name__), None)
 
     def run(self):
         """Start running"""
-        while True:
-            try:
-                frame = self.frames.peek()
-                instruction = frame.next_instruction()
-            except IndexError:
-                # If there are no more frames, or no more instructions - we're done
+        frames = self.frames
+        while frames.size() > 0:
+            frame = frames.peek()
+            if not frame.has_instructions():
+                # If there are no more instructions - we're done
                 return
-            else:
-                self._run_instruction(instruction)
+            self._run_instruction(frame)
+
+    def step(self):
+        """Execute the current instruction of the current frame"""
+        self._run_instruction(self.frames.peek())
+
+    def _run_instruction(self, frame):
+        """Execute the current instruction of `frame` using the machine's engine"""
+        index = frame.current_index()
+        bound_instructions = frame.bound_instructions
+        if bound_instructions is None:
+            bound_instructions = self._link(frame)
+        if self.pair_profile is not None:
+            self.pair_profile.record(frame, index)
+
+        if self.engine != ACTIONS_ENGINE:
+            compiled = frame.compiled
+            if compiled is None or not compiled(frame):
+                bound_instructions[index](frame)
+        else:
+            for action in bound_instructions[index].execute(frame.locals, frame.op_stack):
+                self.act(action)
 
-    def _run_instruction(self, instruction):
-        """Translate `instruction` into `Actions` and execute them"""
-        frame = self.frames.peek()
-        inputs = InstructorInputs(
-            instruction=instruction,
-            locals=frame.locals,
-            op_stack=frame.op_stack,
-            constants=frame.jvm_class.constants,
-            loader=self.class_loader
-        )
-
-        self._echo(f'{frame.jvm_class.name}#{frame.method_name}{frame.method_descriptor}, {instruction}')
-        actions = execute_instruction(inputs)
-        for action in actions:
-            self._echo('  ' + str(action))
-            self.act(action)
-
-        self._echo('')
+    def _run_traced_instruction(self, frame):
+        """Like `_run_instruction`, but also reports the execution to the tracer
+
+        Replaces `_run_instruction` when the machine has a tracer, so untraced machines do not check for one.
+        """
+        tracer = self.tracer
+        depth = self._trace_depth()
+        index = frame.current_index()
+        bound_instructions = frame.bound_instructions
+        if bound_instructions is None:
+            bound_instructions = self._link(frame)
+            tracer.method_enter(frame, depth)
+        if self.pair_profile is not None:
+            self.pair_profile.record(frame, index)
+
+        tracer.instruction(frame, index, depth)
+        if self.engine != ACTIONS_ENGINE:
+            compiled = frame.compiled
+            if compiled is None or not compiled(frame):
+                bound_instructions[index](frame)
+        else:
+            for action in bound_instructions[index].execute(frame.locals, frame.op_stack):
+                tracer.action(frame, index, action, depth)
+                self.act(action)
+
+    def _trace_depth(self):
+        return self._hidden_depth + self.frames.size()
+
+    def _pop_frame(self):
+        """Pop the current frame, reporting the exit to the tracer if the frame was entered"""
+        frame = self.frames.pop()
+        tracer = self.tracer
+        if tracer is not None and frame.bound_instructions is not None:
+            tracer.method_exit(frame, self._trace_depth() + 1)
+
+    def _link(self, frame):
+        """Bind the instructions of the frame's method and attach them to `frame`
+
+        Binding happens once per method, the result is shared by all frames of that method.
+        Every frame is linked once, so this is also where invocations are counted for compilation.
+        """
+        key = (frame.jvm_class.name, frame.method_name, frame.method_descriptor)
+        try:
+            bound_instructions = self._linked_methods[key]
+        except KeyError:
+            constants = frame.jvm_class.constants
+            resolved_constants = frame.jvm_class.resolved_constants
+            if self.engine != ACTIONS_ENGINE:
+                bind = unboxed.bind_instruction if self.engine == UNBOXED_ENGINE else direct.bind_instruction
+                bound_instructions = tuple(
+                    bind(instruction, constants, self, key, resolved_constants)
+                    for instruction in frame.instructions
+                )
+                if self.superinstructions:
+                    bound_instructions = superinstructions_module.fuse(
+                        frame.instructions, bound_instructions, self.superinstructions
+                    )
+            else:
+                bound_instructions = tuple(
+                    bind_instruction(instruction, constants, self.class_loader, resolved_constants)
+                    for instruction in frame.instructions
+                )
+            self._linked_methods[key] = bound_instructions
+
+        frame.bound_instructions = bound_instructions
+        if self.compile_threshold is not None:
+            frame.compiled = self._compiled_method(key, frame)
+        return bound_instructions
+
+    def _compiled_method(self, key, frame):
+        """Return the compiled function of the frame's method, or None if it should not be compiled (yet)"""
+        counts = self._invocation_counts
+        counts[key] += 1
+        if counts[key] < self.compile_threshold:
+            return None
+        compiled = self.compiled_methods.get(key)
+        if compiled is None and compiler.can_compile(frame):
+            compiled = compiler.compile_method(frame, frame.bound_instructions)
+            self.compiled_methods.put(key, compiled)
+        return compiled
 
     def act(self, action):
         """Execute `action`
 
-        The action's type name will be translated to snake case and prefixed with an underscore.
+        The action's type name is translated to snake case and prefixed with an underscore.
         The method with the snake cased name will be called using the action.
         For example:
          - The action `IncrementProgramCounter()` will be converted to the name '_increment_program_counter'
          - The call will be `self._increment_program_counter(action)`
+
+        The translation happens once for every Action type, when the machine is created,
+        or when an action of a type without an executor at that time is first executed.
         """
-        action_class = action.__class__.__name__
-        snake_case = _to_snake_case(action_class)
-        getattr(self, snake_case)(action)
+        action_type = action.__class__
+        try:
+            executor = self._executors[action_type]
+        except KeyError:
+            executor = self._find_executor(action_type)
+            if executor is None:
+                raise TypeError(f'There is no executor for the action {action_type.__name__}') from None
+            self._executors[action_type] = executor
+        executor(action)
 
     # noinspection PyUnusedLocal
     def _increment_program_counter(self, action):
-        try:
-            frame = self.frames.peek()
-        except IndexError:
+        if self.frames.size() == 0:
             return
-        current_instruction = frame.next_instruction()
-        frame.pc = current_instruction.pos + 1
+        self.frames.peek().advance()
 
     def _push(self, action):
         value = action.value
@@ -119,7 +329,7 @@ class Machine:
         So we will only need to initialize the instance fields to their default values according to type.
         """
         class_ = action.class_
-        instance = self._create_instance(class_.name)
+        instance = self.create_instance(class_.name)
         self.frames.peek().op_stack.push(instance)
 
     def _duplicate_top(self, action):
@@ -147,9 +357,28 @@ class Machine:
         self.class_loader.get_the_statics(action.class_name)[action.field_name] = action.value
 
     def _go_to(self, action):
-        self.frames.peek().pc = action.target
+        self.frames.peek().jump(action.target)
 
     def _invoke(self, action):
+        if action.virtual:
+            self.invoke_virtual(action.class_name, action.method_key, action.arguments)
+        else:
+            self.invoke(action.class_name, action.method_key, action.arguments)
+
+    # noinspection PyUnusedLocal
+    def _return_void(self, action):
+        self.return_void()
+
+    def _return_result(self, action):
+        self.return_result(action.result)
+
+    def _throw_object(self, action):
+        self.throw(action.value)
+
+    def _create_and_throw(self, action):
+        self.create_and_throw(action.class_name)
+
+    def invoke(self, class_name, method_key, arguments):
         """Invoke a method
 
         The structure of Machine makes this simple.
@@ -159,13 +388,37 @@ class Machine:
 
         Don't forget to populate the frame's Locals array with the parameters.
         """
-        class_name = action.class_name
-        method_key = action.method_key
+        class_, method = self.resolve(class_name, method_key)
+        self.invoke_method(class_, method, arguments)
+
+    def invoke_virtual(self, class_name, method_key, arguments):
+        """Invoke a method on the class of the receiver, the first argument, like `invokevirtual` does
+
+        Throws a NullPointerException if the receiver is null.
+        """
+        receiver = arguments[0]
+        if receiver.is_null:
+            self.create_and_throw('java/lang/NullPointerException')
+        else:
+            self.invoke(dispatch_class_name(receiver, class_name), method_key, arguments)
 
-        loader = self.class_loader
-        class_ = loader.get_the_class(class_name)
-        method = loader.resolve_method(class_name, method_key)
+    def resolve(self, class_name, method_key):
+        """Return the class and the method that an invocation of `class_name`#`method_key` should execute
 
+        The returned class is the one that declares the method, and the frame of the method is created with it.
+        See `ClassLoader.vtable` for the way methods are looked up.
+        Methods that have intrinsics are resolved without a class (and without loading it), see core/intrinsics.py.
+        """
+        method = self.intrinsic_registry.method(class_name, method_key, optional=self.use_intrinsics)
+        if method is not None:
+            return None, method
+        return self.class_loader.resolve(class_name, method_key)
+
+    def invoke_method(self, class_, method, arguments):
+        """Invoke a method that was already resolved, see `invoke` and `resolve`"""
+        if method.intrinsic is not None:
+            self._invoke_intrinsic(method, arguments)
+            return
         if method.is_native:
             raise NativeNotSupported(
                 f'Cannot invoke method {class_.name}#{method.name} because native methods are not supported'
@@ -175,18 +428,37 @@ class Machine:
         self.frames.push(frame)
 
         if len(method.instructions) < 1:
-            self._return_void(None)
+            self.return_void()
         else:
-            for index, value in enumerate(action.arguments):
+            for index, value in enumerate(arguments):
                 frame.locals.store(index, value)
 
-    # noinspection PyUnusedLocal
-    def _return_void(self, action):
+    def _invoke_intrinsic(self, method, arguments):
+        """Call the Python function that implements `method` and advance the current frame, see core/intrinsics.py
+
+        No frame is created for the method. The unboxed engine's values are boxed for the call, see `unboxed.box`.
+        """
+        self.intrinsic_counts[method.intrinsic] += 1
+        unboxed_engine = self.engine == UNBOXED_ENGINE
+        if unboxed_engine:
+            arguments = [unboxed.box(argument) for argument in arguments]
+        try:
+            result = method.intrinsic(self, arguments)
+        except IntrinsicThrow as e:
+            self.create_and_throw(e.class_name)
+            return
+
+        frame = self.frames.peek()
+        if result is not None:
+            frame.op_stack.push(unboxed.unbox(result) if unboxed_engine else result)
+        frame.advance()
+
+    def return_void(self):
         """Return from the current frame without a value and increment the program counter"""
-        self.frames.pop()
+        self._pop_frame()
         self._increment_program_counter(None)
 
-    def _return_result(self, action):
+    def return_result(self, result):
         """Return from the current frame with a value and increment the program counter
 
         This is achieved like this:
@@ -195,47 +467,46 @@ class Machine:
          - Push the value onto the new current frame's op stack
          - Increment the program counter
         """
-        frames = self.frames
-        frames.pop()
-        frames.peek().op_stack.push(action.result)
+        self._pop_frame()
+        self.frames.peek().op_stack.push(result)
         self._increment_program_counter(None)
 
-    def _throw_object(self, action):
-        self._throw_instance(action.value)
-
-    def _create_and_throw(self, action):
-        class_name = action.class_name
-        instance = self._create_instance(class_name)
-        self._throw_instance(instance)
+    def create_and_throw(self, class_name):
+        """Create an instance of the class named `class_name` and throw it"""
+        self.throw(self.create_instance(class_name))
 
-    def _throw_instance(self, instance):
+    def throw(self, instance):
         """Throw an exception instance
 
-        We do this recursively:
-        If the current frame has a relevant handler we jump to its handler_pc.
-        If not we pop the current frame, and repeat the process for the new current frame using a recursive call.
+        The frames are unwound in a loop, from the current frame down:
+        If a frame has a relevant handler we jump to its handler_pc, and the exception is handled.
+        If not we pop the frame, and continue with the new current frame.
         If there are no more frames to pop this exception is unhandled and execution should stop.
         """
         frames = self.frames
-        frame = frames.peek()
-        handlers = frame.exception_handlers.find_handlers(frame.pc)
-        for handler in handlers:
-            class_name = handler.catch_type
-            type_match = is_value_instance_of(instance, class_as_descriptor(class_name), self.class_loader)
-            if type_match:
-                stack = frame.op_stack
-                stack.clear()
-                stack.push(instance)
-                frame.pc = handler.handler_pc
-                return
-
-        frames.pop()
-        if frames.size() == 0:
-            raise Unhandled(instance)
-        else:
-            self._throw_instance(instance)
+        while frames.size() > 0:
+            frame = frames.peek()
+            for handler in frame.exception_handlers.find_handlers(frame.pc):
+                if self._catch_type_check(handler).is_instance(instance):
+                    stack = frame.op_stack
+                    stack.clear()
+                    stack.push(instance)
+                    frame.jump(handler.handler_pc)
+                    return
+            self._pop_frame()
+        raise Unhandled(instance)
+
+    def _catch_type_check(self, handler):
+        """Return the TypeCheckCache of the exception handler `handler`"""
+        try:
+            return self._catch_type_checks[handler]
+        except KeyError:
+            check = TypeCheckCache(class_as_descriptor(handler.catch_type), self.class_loader)
+            self._catch_type_checks[handler] = check
+            return check
 
-    def _create_instance(self, class_name):
+    def create_instance(self, class_name):
+        """Return a new instance of the class named `class_name` with default field values"""
         return self.class_loader.default_instance(class_name)
 
     def _first_class_load(self, class_):
@@ -254,14 +525,12 @@ class Machine:
         temp_stack.push(Frame.from_class_and_method(class_, method))
 
         old_stack = self.frames
+        hidden_depth = self._hidden_depth
+        self._hidden_depth += old_stack.size()
         self.frames = temp_stack
         self.run()
         self.frames = old_stack
-
-    def _echo(self, text):
-        depth = self.frames.size()
-        prefix = '|  ' * depth
-        self.echo(prefix + str(text))
+        self._hidden_depth = hidden_depth
 
 
 def _to_snake_case(text):
@@ -269,19 +538,31 @@ def _to_snake_case(text):
     return ''.join(new_letters)
 
 
-# noinspection PyUnusedLocal
-def _default_echo(*args, **kwargs):
-    pass
-
-
-def run(loader, main_class_name, echo=None):
+def run(loader, main_class_name, echo=None, engine=ACTIONS_ENGINE, superinstructions=None, pair_profile=None,
+        compile_threshold=None, tracer=None, intrinsics=True):
     """Run the class named `main_class_name` using `loader`
 
     :param loader: ClassLoader, the loader to use
     :param main_class_name: str, the name of the main class
     :param echo: a print-like method that, if provided, will be used for tracing execution
+    :param engine: one of `ENGINES`, the way instructions should be executed
+    :param superinstructions: patterns of instructions to fuse, see `Machine`
+    :param pair_profile: a `PairProfile` that will record the executed instructions, see `Machine`
+    :param compile_threshold: the amount of invocations after which a method is compiled, see `Machine`
+    :param tracer: a `tracing.Tracer` that receives the events of the execution, see `Machine`
+    :param intrinsics: False to only use required intrinsics, see `Machine`
+    :return: the Machine that ran the class
     """
-    machine = Machine(loader, echo=echo)
+    machine = Machine(
+        loader,
+        echo=echo,
+        engine=engine,
+        superinstructions=superinstructions,
+        pair_profile=pair_profile,
+        compile_threshold=compile_threshold,
+        tracer=tracer,
+        intrinsics=intrinsics
+    )
 
     class_ = loader.get_the_class(main_class_name)
     key = MethodKey('main', '([Ljava/lang/String;)V')
@@ -290,3 +571,4 @@ def run(loader, main_class_name, echo=None):
 
     machine.frames.push(frame)
     machine.run()
+    return machine
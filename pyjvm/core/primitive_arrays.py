@@ -0,0 +1,96 @@
+"""Compact storage for arrays of primitive values
+
+Arrays of references are Python lists of JvmValues. Arrays of primitives are `PrimitiveArray`s instead,
+which store their elements as raw numbers in an `array.array` buffer. The buffer's typecode gives every element
+the width that it has in the JVM, see `value_array_type_indicators.typecode_by_indicator`,
+so an int[] of a million elements takes 4MB rather than a million JvmValue objects.
+
+Since the type of the elements of byte, short, char, int and boolean arrays is `Integer`, the typecode is the only
+thing that distinguishes them. Stores truncate integral values to the width of the array, like ``bastore``,
+``castore`` and ``sastore`` do.
+
+A PrimitiveArray supports the sequence operations that instructions use with lists: indexing with JvmValues
+(elements are boxed when they are read), `len` and iteration. `load` and `store` access the raw elements.
+"""
+from array import array
+
+from pyjvm.utils import value_array_type_indicators
+
+
+def _integral(bits, signed):
+    """Return a function that truncates an int to `bits` bits, like a JVM narrowing conversion"""
+    mask = (1 << bits) - 1
+    half = 1 << (bits - 1)
+    if signed:
+        return lambda value: ((int(value) + half) & mask) - half
+    return lambda value: int(value) & mask
+
+
+# Functions that turn a Python number into a value that fits the buffer, by typecode
+_NARROWING = {
+    'b': _integral(8, True),
+    'h': _integral(16, True),
+    'H': _integral(16, False),
+    'i': _integral(32, True),
+    'q': _integral(64, True),
+    'f': float,
+    'd': float
+}
+
+
+class PrimitiveArray:
+    """The value of a primitive array at runtime, to be used as the value of an ArrayReferenceType instance
+
+    element_type: Type, the type of the array's elements
+    typecode: str, the `array` typecode of the buffer
+    buffer: array, the raw elements
+    """
+
+    __slots__ = ('element_type', 'typecode', 'buffer', 'narrow')
+
+    def __init__(self, element_type, typecode, buffer):
+        self.element_type = element_type
+        self.typecode = typecode
+        self.buffer = buffer
+        # Turns a Python number into an element of the buffer, truncating integral values to the width of the array
+        self.narrow = _NARROWING[typecode]
+
+    @classmethod
+    def create(cls, indicator, size):
+        """Return an array of `size` default elements, of the type that the ``newarray`` `indicator` describes"""
+        element_type = value_array_type_indicators.type_by_indicator(indicator)
+        typecode = value_array_type_indicators.typecode_by_indicator(indicator)
+        return cls(element_type, typecode, array(typecode, bytes(array(typecode).itemsize * size)))
+
+    def load(self, index):
+        """Return the raw element at `index`"""
+        return self.buffer[index]
+
+    def store(self, index, value):
+        """Store the raw number `value` at `index`, truncated to the width of the array"""
+        self.buffer[index] = self.narrow(value)
+
+    def __getitem__(self, index):
+        return self.element_type.create_instance(self.buffer[index])
+
+    def __setitem__(self, index, value):
+        self.buffer[index] = self.narrow(value.value)
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def __iter__(self):
+        create_instance = self.element_type.create_instance
+        return (create_instance(element) for element in self.buffer)
+
+    def __eq__(self, other):
+        """Arrays are equal to other arrays and to sequences of JvmValues with the same elements"""
+        if isinstance(other, PrimitiveArray):
+            return self.typecode == other.typecode and self.buffer == other.buffer
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.element_type!r}, {self.buffer!r})'
@@ -4,7 +4,14 @@ T = TypeVar('T')
 
 
 class Stack(Generic[T]):
-    """A simple stack implementation"""
+    """A simple stack implementation
+
+    The values are kept in a list whose end is the top of the stack, so pushing and popping take amortized
+    constant time. Index 0 in the public API (`peek`, `peek_many`, `insert_at_offset`) still refers to the top.
+
+    A stack with a maximum size preallocates its slots and keeps track of its size separately.
+    The size is only validated when the preallocated slots run out.
+    """
 
     def __init__(self, values=None, max_depth=None):
         """Return a new Stack instance
@@ -13,22 +20,36 @@ class Stack(Generic[T]):
         :param max_depth: int, a possible maximum size to conform to at runtime. Defaults to None
         """
         self.max_depth = max_depth
-        self._values = []
+        self._values = [] if max_depth is None else [None] * self._capacity()
+        self._size = 0
         if values is not None:
             for value in reversed(values):
                 self.push(value)
 
     def pop(self) -> T:
         """Removes and returns the value on top-of-stack"""
-        return self._values.pop(0)
+        size = self._size - 1
+        if size < 0:
+            raise IndexError('Cannot pop from an empty stack')
+        values = self._values
+        value = values[size]
+        values[size] = None
+        self._size = size
+        return value
 
     def push(self, value: T):
         """Push `value` onto stack
 
         If this stack has a maximum size, and that size is exceeded this method throws a `OverflowError`.
         """
-        self._values.insert(0, value)
-        self._validate_size()
+        size = self._size
+        values = self._values
+        if size < len(values):
+            values[size] = value
+        else:
+            self._validate_size(size + 1)
+            values.append(value)
+        self._size = size + 1
 
     def insert_at_offset(self, offset, value):
         """Insert `value` directly at `offset` from top
@@ -37,34 +58,50 @@ class Stack(Generic[T]):
         """
         if offset < 0:
             raise ValueError('Offset must be >= 0')
-        current_size = self.size()
+        current_size = self._size
         if current_size < offset - 1:
             raise IndexError(f'Cannot insert to stack at offset {offset} '
                              f'because the current size of the stack is {current_size}')
-        self._values.insert(offset, value)
-        self._validate_size()
+        position = max(current_size - offset, 0)
+        values = self._values
+        if current_size == len(values):
+            self._validate_size(current_size + 1)
+            values.append(None)
+        values[position + 1:current_size + 1] = values[position:current_size]
+        values[position] = value
+        self._size = current_size + 1
 
     def peek(self, index=0) -> T:
         """Return the value at `index` without removing it"""
-        return self._values[index]
+        if not 0 <= index < self._size:
+            raise IndexError(f'Cannot peek at index {index} of a stack of size {self._size}')
+        return self._values[self._size - 1 - index]
 
     def peek_many(self, amount):
         """Return a list with the first `amount` values on the stack"""
         if amount < 0:
             raise ValueError('Peek amount must be >= 0')
-        return self._values[:amount]
+        size = self._size
+        return self._values[max(size - amount, 0):size][::-1]
 
     def clear(self):
-        self._values = []
+        values = self._values
+        for index in range(self._size):
+            values[index] = None
+        self._size = 0
 
     def size(self) -> int:
         """Return the amount of values that are currently stored in this stack"""
-        return len(self._values)
+        return self._size
 
     def __iter__(self):
         """Return an iterator yielding the values in this stack"""
-        return iter(self._values)
+        return reversed(self._values[:self._size])
+
+    def _capacity(self):
+        # The stack has always tolerated a single value beyond its maximum depth
+        return self.max_depth + 1
 
-    def _validate_size(self):
-        if self.max_depth is not None and len(self._values) > self.max_depth + 1:
+    def _validate_size(self, new_size):
+        if self.max_depth is not None and new_size > self._capacity():
             raise OverflowError('Max amount of values in stack, cannot add more')
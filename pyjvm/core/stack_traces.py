@@ -0,0 +1,70 @@
+"""Lazily materialized stack traces
+
+Every Throwable constructor calls ``fillInStackTrace``, which asks the native ``VMThrowable.fillInStackTrace``
+for the state of the stack. Most exceptions are caught without anyone looking at their stack trace,
+so `StackTrace.capture` only records the class, method and program counter of every frame.
+The ``StackTraceElement`` objects are created by `StackTrace.elements`, which ``VMThrowable.getStackTrace`` calls
+when ``getStackTrace`` or ``printStackTrace`` need them.
+
+See the intrinsics of VMThrowable in core/jdk_intrinsics.py.
+"""
+from itertools import dropwhile
+
+from pyjvm.core.jvm_types import JvmObject, ObjectReferenceType, ArrayReferenceType, Integer, NULL_VALUE
+from pyjvm.utils.jawa_conversions import string_instance
+
+VM_THROWABLE = 'java/lang/VMThrowable'
+STACK_TRACE_ELEMENT = 'java/lang/StackTraceElement'
+
+_CONSTRUCTION_METHODS = ('<init>', 'fillInStackTrace')
+
+
+def _constructs(frame, throwable):
+    """Return True if `frame` is a constructor or ``fillInStackTrace`` of `throwable`"""
+    if frame.method_name not in _CONSTRUCTION_METHODS:
+        return False
+    try:
+        receiver = frame.locals.load(0)
+    except (ValueError, IndexError):
+        return False
+    return getattr(receiver, 'value', None) is throwable.value
+
+
+class StackTrace(JvmObject):
+    """The value of a VMThrowable instance, a snapshot of the frames of a machine
+
+    frames: Tuple[Tuple[str, str, int]], the class name, method name and program counter of every frame,
+      the innermost frame first
+    """
+
+    def __init__(self, frames):
+        super().__init__(())
+        self.frames = frames
+
+    @classmethod
+    def capture(cls, machine, throwable):
+        """Return a VMThrowable instance with the frames of `machine`, except the ones that construct `throwable`"""
+        frames = dropwhile(lambda frame: _constructs(frame, throwable), machine.frames)
+        snapshot = tuple((frame.jvm_class.name, frame.method_name, frame.pc) for frame in frames)
+        return ObjectReferenceType(VM_THROWABLE).create_instance(cls(snapshot))
+
+    def elements(self, machine):
+        """Return a new ``StackTraceElement[]`` with an element for every frame"""
+        elements = [self._element(machine, *frame) for frame in self.frames]
+        return ArrayReferenceType(ObjectReferenceType(STACK_TRACE_ELEMENT)).create_instance(elements)
+
+    @staticmethod
+    def _element(machine, class_name, method_name, pc):
+        element = machine.create_instance(STACK_TRACE_ELEMENT)
+        fields = element.value.fields
+        # Source files and line numbers are not kept, -1 marks an unknown line
+        values = {
+            'declaringClass': string_instance(class_name.replace('/', '.')),
+            'methodName': string_instance(method_name),
+            'fileName': NULL_VALUE,
+            'lineNumber': Integer.create_instance(-1)
+        }
+        for name, value in values.items():
+            if name in fields:
+                fields[name] = value
+        return element
@@ -0,0 +1,346 @@
+"""Structured tracing of executions
+
+A Machine that is created with a `Tracer` reports four kinds of events to it:
+ - Method enter: a frame is about to execute its first instruction
+ - Method exit: a frame that was entered is popped, by a return or while an exception unwinds
+ - Instruction: an instruction is about to execute
+ - Action: an Action is about to be executed, only reported by the actions engine
+
+Every event carries the call depth, the amount of frames on the frame stack (including the frames of the classes whose
+<clinit> is running). The Machine only checks for a tracer when it is created and when frames are popped,
+so machines without a tracer pay nothing for this module.
+
+A `TraceFilter` chooses the events that a tracer records, by method glob, by opcode and by call depth.
+
+There are two tracers:
+ - `EchoTracer` prints a line per event, it implements the ``--report`` flag of ``pyjvm run``
+ - `BinaryTracer` writes a compact binary event stream, that `read_trace` reads and `summarize` summarizes.
+   See ``pyjvm trace-dump``
+
+The binary stream starts with `MAGIC` and a little endian, unsigned short version number. Records follow. Each record
+starts with a byte that holds its kind, followed by little endian fields:
+ - String: id (uint32), length (uint16), UTF-8 bytes. Defines the text that later records refer to by id
+ - Enter and exit: depth (uint32), method id (uint32)
+ - Instruction: depth (uint32), method id (uint32), program counter (uint32), opcode (uint8)
+ - Action: depth (uint32), method id (uint32), the id of the Action's type name (uint32)
+
+Methods are referred to by the id of a string of the form ``class#name(descriptor)``.
+"""
+import struct
+from collections import Counter
+from fnmatch import fnmatchcase
+
+import attr
+from jawa.util.bytecode import opcode_table
+
+MAGIC = b'PYJVMTRC'
+VERSION = 1
+
+STRING = 0
+METHOD_ENTER = 1
+METHOD_EXIT = 2
+INSTRUCTION = 3
+ACTION = 4
+
+EVENT_NAMES = {
+    METHOD_ENTER: 'enter',
+    METHOD_EXIT: 'exit',
+    INSTRUCTION: 'instruction',
+    ACTION: 'action'
+}
+
+_KIND = struct.Struct('<B')
+_VERSION = struct.Struct('<H')
+_STRING = struct.Struct('<IH')
+_METHOD = struct.Struct('<II')
+_INSTRUCTION = struct.Struct('<IIIB')
+_ACTION = struct.Struct('<III')
+
+_BODIES = {
+    METHOD_ENTER: _METHOD,
+    METHOD_EXIT: _METHOD,
+    INSTRUCTION: _INSTRUCTION,
+    ACTION: _ACTION
+}
+
+
+def method_name(frame):
+    """Return the name that traces use for the method of `frame`"""
+    return f'{frame.jvm_class.name}#{frame.method_name}{frame.method_descriptor}'
+
+
+class TraceFilter:
+    """Chooses the events that a Tracer records
+
+    methods: Iterable[str], globs that are matched against ``class#name(descriptor)``, see `fnmatch`.
+    An event is recorded if its method matches one of them. Defaults to all methods
+    opcodes: Iterable[str], the names of the instructions whose instruction and action events are recorded.
+    Defaults to all instructions
+    max_depth: int, events at a deeper call depth are not recorded. Defaults to None, which means any depth
+    """
+
+    def __init__(self, methods=('*',), opcodes=None, max_depth=None):
+        self.methods = tuple(methods)
+        self.opcodes = None if opcodes is None else frozenset(opcodes)
+        self.max_depth = max_depth
+        self._method_matches = dict()
+
+    def matches_method(self, name):
+        """Return True if events of the method named `name` should be recorded"""
+        try:
+            return self._method_matches[name]
+        except KeyError:
+            result = any(fnmatchcase(name, pattern) for pattern in self.methods)
+            self._method_matches[name] = result
+            return result
+
+    def matches_depth(self, depth):
+        return self.max_depth is None or depth <= self.max_depth
+
+    def matches_instruction(self, mnemonic):
+        return self.opcodes is None or mnemonic in self.opcodes
+
+
+class Tracer:
+    """An abstract receiver of trace events, see the module documentation
+
+    The public methods are called by the Machine. They apply the filter and call the underscored methods,
+    which sub classes implement.
+    """
+
+    def __init__(self, trace_filter=None):
+        if trace_filter is None:
+            trace_filter = TraceFilter()
+        self.trace_filter = trace_filter
+        # Method names and whether they match the filter, by (class name, method name, descriptor)
+        self._methods = dict()
+
+    def _method(self, frame):
+        key = (frame.jvm_class.name, frame.method_name, frame.method_descriptor)
+        try:
+            return self._methods[key]
+        except KeyError:
+            name = method_name(frame)
+            result = name, self.trace_filter.matches_method(name)
+            self._methods[key] = result
+            return result
+
+    def method_enter(self, frame, depth):
+        name, matches = self._method(frame)
+        if matches and self.trace_filter.matches_depth(depth):
+            self._method_enter(name, depth)
+
+    def method_exit(self, frame, depth):
+        name, matches = self._method(frame)
+        if matches and self.trace_filter.matches_depth(depth):
+            self._method_exit(name, depth)
+
+    def instruction(self, frame, index, depth):
+        name, matches = self._method(frame)
+        instruction = frame.instructions[index]
+        trace_filter = self.trace_filter
+        if matches and trace_filter.matches_depth(depth) and trace_filter.matches_instruction(instruction.mnemonic):
+            self._instruction(name, instruction, depth)
+
+    def action(self, frame, index, action, depth):
+        name, matches = self._method(frame)
+        trace_filter = self.trace_filter
+        mnemonic = frame.instructions[index].mnemonic
+        if matches and trace_filter.matches_depth(depth) and trace_filter.matches_instruction(mnemonic):
+            self._action(name, action, depth)
+
+    def close(self):
+        """Release the resources of this tracer"""
+        pass
+
+    def _method_enter(self, name, depth):
+        raise NotImplementedError()
+
+    def _method_exit(self, name, depth):
+        raise NotImplementedError()
+
+    def _instruction(self, name, instruction, depth):
+        raise NotImplementedError()
+
+    def _action(self, name, action, depth):
+        raise NotImplementedError()
+
+
+class EchoTracer(Tracer):
+    """A Tracer that reports events as indented lines of text, using a `print` like function"""
+
+    def __init__(self, echo, trace_filter=None):
+        super().__init__(trace_filter)
+        self.echo = echo
+
+    def _line(self, depth, text):
+        self.echo('|  ' * depth + text)
+
+    def _method_enter(self, name, depth):
+        self._line(depth, f'-> {name}')
+
+    def _method_exit(self, name, depth):
+        self._line(depth, f'<- {name}')
+
+    def _instruction(self, name, instruction, depth):
+        self._line(depth, f'{name}, {instruction}')
+
+    def _action(self, name, action, depth):
+        self._line(depth, f'  {action}')
+
+
+class BinaryTracer(Tracer):
+    """A Tracer that writes the binary stream described in the module documentation to the binary file `file`"""
+
+    def __init__(self, file, trace_filter=None):
+        super().__init__(trace_filter)
+        self.file = file
+        self._strings = dict()
+        file.write(MAGIC + _VERSION.pack(VERSION))
+
+    @classmethod
+    def open(cls, path, trace_filter=None):
+        """Return a tracer that writes to a new file at `path`, which `close` closes"""
+        return cls(open(path, 'wb'), trace_filter)
+
+    def _string(self, text):
+        try:
+            return self._strings[text]
+        except KeyError:
+            string_id = len(self._strings)
+            self._strings[text] = string_id
+            encoded = text.encode('utf-8')
+            self.file.write(_KIND.pack(STRING) + _STRING.pack(string_id, len(encoded)) + encoded)
+            return string_id
+
+    def _write(self, kind, *fields):
+        self.file.write(_KIND.pack(kind) + _BODIES[kind].pack(*fields))
+
+    def _method_enter(self, name, depth):
+        self._write(METHOD_ENTER, depth, self._string(name))
+
+    def _method_exit(self, name, depth):
+        self._write(METHOD_EXIT, depth, self._string(name))
+
+    def _instruction(self, name, instruction, depth):
+        opcode = opcode_table[instruction.mnemonic]['op']
+        self._write(INSTRUCTION, depth, self._string(name), instruction.pos, opcode)
+
+    def _action(self, name, action, depth):
+        self._write(ACTION, depth, self._string(name), self._string(type(action).__name__))
+
+    def close(self):
+        self.file.close()
+
+
+@attr.s(frozen=True)
+class TraceEvent:
+    """An event that was read from a binary trace
+
+    kind: int, one of METHOD_ENTER, METHOD_EXIT, INSTRUCTION and ACTION
+    depth: int, the call depth of the event
+    method: str, the name of the method, see `method_name`
+    pc: int, the program counter of instruction events, None for other events
+    mnemonic: str, the name of the instruction of instruction events, None for other events
+    action: str, the name of the Action type of action events, None for other events
+    """
+    kind = attr.ib()
+    depth = attr.ib()
+    method = attr.ib()
+    pc = attr.ib(default=None)
+    mnemonic = attr.ib(default=None)
+    action = attr.ib(default=None)
+
+    def __str__(self):
+        details = {
+            METHOD_ENTER: '',
+            METHOD_EXIT: '',
+            INSTRUCTION: f' {self.pc} {self.mnemonic}',
+            ACTION: f' {self.action}'
+        }[self.kind]
+        return f'{self.depth:>4} {EVENT_NAMES[self.kind]:<11} {self.method}{details}'
+
+
+def read_trace(file):
+    """Yield the `TraceEvent`s in the binary file `file`, see the module documentation for the format
+
+    Raises a ValueError if the file is not a trace, or if it is truncated or corrupt.
+    """
+    header = file.read(len(MAGIC) + _VERSION.size)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a pyjvm trace')
+    version, = _VERSION.unpack(header[len(MAGIC):])
+    if version != VERSION:
+        raise ValueError(f'Unsupported trace version {version}, expected {VERSION}')
+
+    strings = dict()
+    while True:
+        kind_bytes = file.read(_KIND.size)
+        if not kind_bytes:
+            return
+        kind, = _KIND.unpack(kind_bytes)
+        if kind == STRING:
+            string_id, length = _STRING.unpack(_read_exactly(file, _STRING.size))
+            strings[string_id] = _read_exactly(file, length).decode('utf-8')
+            continue
+
+        try:
+            body = _BODIES[kind]
+        except KeyError:
+            raise ValueError(f'Unknown trace record kind {kind}') from None
+        fields = body.unpack(_read_exactly(file, body.size))
+        depth, method = fields[0], _defined_string(strings, fields[1])
+        if kind == INSTRUCTION:
+            yield TraceEvent(kind, depth, method, pc=fields[2], mnemonic=opcode_table[fields[3]]['mnemonic'])
+        elif kind == ACTION:
+            yield TraceEvent(kind, depth, method, action=_defined_string(strings, fields[2]))
+        else:
+            yield TraceEvent(kind, depth, method)
+
+
+def _defined_string(strings, string_id):
+    try:
+        return strings[string_id]
+    except KeyError:
+        raise ValueError(f'The trace refers to an undefined string {string_id}') from None
+
+
+def _read_exactly(file, size):
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError('Truncated trace')
+    return data
+
+
+def summarize(events, limit=10):
+    """Return a list of lines that summarize `events`
+
+    The summary holds the amount of events of every kind, the maximal call depth,
+    and the `limit` most common methods (by instruction events), instructions and actions.
+    """
+    kinds = Counter()
+    methods = Counter()
+    instructions = Counter()
+    actions = Counter()
+    entries = Counter()
+    max_depth = 0
+    for event in events:
+        kinds[event.kind] += 1
+        max_depth = max(max_depth, event.depth)
+        if event.kind == INSTRUCTION:
+            methods[event.method] += 1
+            instructions[event.mnemonic] += 1
+        elif event.kind == ACTION:
+            actions[event.action] += 1
+        elif event.kind == METHOD_ENTER:
+            entries[event.method] += 1
+
+    lines = [f'{sum(kinds.values())} events, maximal depth {max_depth}']
+    for kind, name in EVENT_NAMES.items():
+        lines.append(f'  {name}: {kinds[kind]}')
+    for title, counter in [('Methods by instructions', methods), ('Methods by entries', entries),
+                           ('Instructions', instructions), ('Actions', actions)]:
+        if counter:
+            lines.append(f'{title}:')
+            lines.extend(f'  {count:>10} {name}' for name, count in counter.most_common(limit))
+    return lines
@@ -71,7 +71,11 @@ def _create_instruction_dict_for_branch_comparisons():
     return dic
 
 
-@bytecode_dict(_create_instruction_dict_for_branch_comparisons())
+# Instruction names and the arguments `BranchComparison` expects, also used by the direct engine (see direct.py)
+BRANCH_COMPARISONS = _create_instruction_dict_for_branch_comparisons()
+
+
+@bytecode_dict(BRANCH_COMPARISONS)
 class BranchComparison(Instructor):
     """ An instructor for branching comparisons
 
@@ -0,0 +1,321 @@
+"""A baseline compiler for the direct engine
+
+The direct engine executes one handler per instruction, and the Machine's run loop pays for fetching and dispatching
+every one of them. This module translates a whole method into the source of a single Python function,
+compiles it with `compile` and returns the result. The function executes the method's instructions
+from the current program counter of a frame.
+
+The generated function is a dispatch loop over the method's basic blocks. Blocks start at the first instruction,
+at branch targets, at exception handlers and after instructions that leave the generated code.
+Instructions that only involve the current frame, such as loads, stores, math and branches, are inlined into the
+blocks. All other instructions, such as invocations, returns, field access and anything that might throw, are
+executed by calling their direct handler, after which the function returns to the Machine. This is how compiled
+methods interoperate with the frame stack: invocations push a frame, returns pop it and advance the caller,
+and exceptions unwind frames exactly as they do for interpreted methods. When the Machine returns to the frame
+it calls the function again, and execution resumes at the block that starts after the instruction.
+
+A compiled function takes a Frame and returns True if it executed anything.
+It returns False if the frame's program counter is not the start of a block, which can happen when a handler jumps
+to an unexpected position. The Machine then executes a single instruction with its handler and tries again.
+
+The inlined code must have exactly the same effects as the direct handlers, so it uses the same instruction tables.
+It also keeps their quirks, for example `iinc` pushes its result like the Increment Instructor.
+
+See `Machine` for the invocation count threshold that triggers compilation, and `CompiledMethods` for the cache.
+"""
+from collections import OrderedDict
+
+from pyjvm.core.jvm_types import Integer
+from pyjvm.instructions.comparisons import BRANCH_COMPARISONS, BOOLEAN_COMPARISONS
+from pyjvm.instructions.constant_instructions import CONSTANT_VALUES
+from pyjvm.instructions.conversions import CONVERSION_DICT
+from pyjvm.instructions.loads_and_stores import STORE_INSTRUCTIONS, LOAD_INSTRUCTIONS
+from pyjvm.instructions.math import OPERATORS
+from pyjvm.utils.utils import bool_to_num
+
+_NULL_BRANCHES = {
+    'ifnull': True,
+    'ifnonnull': False
+}
+_GO_TO = frozenset(['goto', 'goto_w'])
+_CONSTANT_POOL_LOADS = frozenset(['ldc', 'ldc_w', 'ldc2_w'])
+
+
+def _math_operations():
+    dic = {}
+    for op in OPERATORS:
+        dic.update(op.bytecode_args())
+    return dic
+
+
+_MATH_OPERATIONS = _math_operations()
+
+_PRELUDE = [
+    'def {name}(frame):',
+    '    stack = frame.op_stack',
+    '    push = stack.push',
+    '    pop = stack.pop',
+    '    locals_ = frame.locals',
+    '    load = locals_.load',
+    '    store = locals_.store',
+    '    pc = frame.pc',
+    '    while True:',
+]
+
+_BLOCK_INDENT = ' ' * 12
+
+
+class CompiledMethods:
+    """A cache of compiled methods that holds at most `max_size` methods, evicting the least recently used"""
+
+    def __init__(self, max_size=128):
+        if max_size < 1:
+            raise ValueError('The compiled methods cache must be able to hold at least one method')
+        self.max_size = max_size
+        self._functions = OrderedDict()
+
+    def get(self, key):
+        """Return the compiled function that was stored under `key`, or None"""
+        try:
+            self._functions.move_to_end(key)
+        except KeyError:
+            return None
+        return self._functions[key]
+
+    def put(self, key, function):
+        """Store `function` under `key`, possibly evicting the least recently used function"""
+        self._functions[key] = function
+        self._functions.move_to_end(key)
+        while len(self._functions) > self.max_size:
+            self._functions.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._functions
+
+    def __len__(self):
+        return len(self._functions)
+
+
+class _Method:
+    """The state of a single compilation"""
+
+    def __init__(self, frame, handlers):
+        self.instructions = frame.instructions
+        self.table = frame.instruction_table
+        self.resolved_constants = frame.jvm_class.resolved_constants
+        self.exception_handlers = frame.exception_handlers
+        self.handlers = handlers
+        self.namespace = {
+            'Integer_create': Integer.create_instance,
+            'bool_to_num': bool_to_num,
+        }
+        self._names = {}
+
+    def name_for(self, value, prefix='k'):
+        """Return a name that refers to `value` inside the generated code"""
+        key = id(value)
+        try:
+            return self._names[key]
+        except KeyError:
+            name = f'{prefix}_{len(self._names)}'
+            self._names[key] = name
+            self.namespace[name] = value
+            return name
+
+    def resolve(self, target):
+        """Return the position of the instruction that the machine would execute after jumping to `target`"""
+        return self.table.positions[self.table.index_at(target)]
+
+    def position_after(self, index):
+        return self.table.positions[index + 1]
+
+
+def _branch_target(instruction):
+    return instruction.pos + int(instruction.operands[0].value)
+
+
+def _operand(instruction, index=0):
+    return int(instruction.operands[index].value)
+
+
+def _inline(method, index):
+    """Return the lines of inlined code for the instruction at `index`, or None if it cannot be inlined
+
+    Inlined code that transfers control ends with `continue`, after setting `pc`.
+    Other inlined code falls through to the next instruction.
+    """
+    instruction = method.instructions[index]
+    name = instruction.mnemonic
+
+    if name in LOAD_INSTRUCTIONS:
+        local_index, = LOAD_INSTRUCTIONS[name]
+        if local_index is None:
+            local_index = _operand(instruction)
+        return [f'push(load({local_index}))']
+
+    if name in STORE_INSTRUCTIONS:
+        local_index, = STORE_INSTRUCTIONS[name]
+        if local_index is None:
+            local_index = _operand(instruction)
+        return [f'store({local_index}, pop())']
+
+    if name in CONSTANT_VALUES:
+        return [f'push({method.name_for(CONSTANT_VALUES[name])})']
+
+    if name in ('bipush', 'sipush'):
+        return [f'push(Integer_create({_operand(instruction)}))']
+
+    if name in _CONSTANT_POOL_LOADS:
+        return [f'push({method.name_for(method.resolved_constants.value(_operand(instruction)))})']
+
+    if name in CONVERSION_DICT:
+        source, target = CONVERSION_DICT[name]
+        return [f'push({method.name_for(target, "t")}.create_instance(pop().value))']
+
+    if name in _MATH_OPERATIONS:
+        op, type_, operands = _MATH_OPERATIONS[name]
+        op_name = method.name_for(op, 'op')
+        type_name = method.name_for(type_, 't')
+        if operands == 1:
+            return [f'push({type_name}.create_instance({op_name}(pop().value)))']
+        return [
+            'right = pop()',
+            'left = pop()',
+            f'push({type_name}.create_instance({op_name}(left.value, right.value)))'
+        ]
+
+    if name == 'iinc':
+        local_index, amount_to_add = [op.value for op in instruction.operands]
+        # Follows the Increment Instructor, see math.py
+        return [f'push(Integer_create(load({local_index}).value + {amount_to_add}))']
+
+    if name in BOOLEAN_COMPARISONS:
+        op_name = method.name_for(BOOLEAN_COMPARISONS[name], 'op')
+        return [
+            'first = pop()',
+            'second = pop()',
+            f'push(bool_to_num({op_name}(first.value, second.value)))'
+        ]
+
+    if name == 'nop':
+        return []
+
+    if name in ('pop', 'pop2'):
+        return ['pop()'] * (1 if name == 'pop' else 2)
+
+    if name == 'swap':
+        return [
+            'first = pop()',
+            'second = pop()',
+            'push(first)',
+            'push(second)'
+        ]
+
+    next_pc = method.position_after(index)
+    if name in _GO_TO:
+        return [f'pc = {method.resolve(_branch_target(instruction))}', 'continue']
+
+    if name in BRANCH_COMPARISONS:
+        pops, op = BRANCH_COMPARISONS[name]
+        op_name = method.name_for(op, 'op')
+        target = method.resolve(_branch_target(instruction))
+        if pops == 1:
+            condition = f'{op_name}(pop().value)'
+            lines = []
+        else:
+            lines = ['first = pop()', 'second = pop()']
+            condition = f'{op_name}(first.value, second.value)'
+        return lines + [f'pc = {target} if {condition} else {next_pc}', 'continue']
+
+    if name in _NULL_BRANCHES:
+        target = method.resolve(_branch_target(instruction))
+        negation = '' if _NULL_BRANCHES[name] else 'not '
+        return [f'pc = {target} if {negation}pop().is_null else {next_pc}', 'continue']
+
+    return None
+
+
+def _leaders(method):
+    """Return the positions at which basic blocks start"""
+    instructions = method.instructions
+    leaders = {instructions[0].pos}
+    for handler in method.exception_handlers.handlers:
+        leaders.add(method.resolve(handler.handler_pc))
+    for index, instruction in enumerate(instructions):
+        name = instruction.mnemonic
+        if name in _GO_TO or name in BRANCH_COMPARISONS or name in _NULL_BRANCHES:
+            leaders.add(method.resolve(_branch_target(instruction)))
+            leaders.add(method.position_after(index))
+        elif _inline(method, index) is None:
+            leaders.add(method.position_after(index))
+    leaders.discard(method.table.end_pc)
+    return leaders
+
+
+def _block_lines(method, start_index, leaders):
+    """Return the lines of the block that starts at `start_index`"""
+    lines = []
+    index = start_index
+    end = method.table.end
+    while True:
+        instruction = method.instructions[index]
+        inlined = _inline(method, index)
+        if inlined is None:
+            handler_name = method.name_for(method.handlers[index], 'h')
+            return lines + [f'frame.pc = {instruction.pos}', f'{handler_name}(frame)', 'return True']
+
+        lines.extend(inlined)
+        if inlined and inlined[-1] == 'continue':
+            return lines
+
+        index += 1
+        if index == end:
+            return lines + [f'frame.pc = {method.table.end_pc}', 'return True']
+        next_pos = method.instructions[index].pos
+        if next_pos in leaders:
+            return lines + [f'pc = {next_pos}', 'continue']
+
+
+def generate_source(method, name):
+    """Return the source of a function named `name` that executes `method`, see the module documentation"""
+    lines = [line.format(name=name) for line in _PRELUDE]
+    leaders = _leaders(method)
+    keyword = 'if'
+    for index, instruction in enumerate(method.instructions):
+        if instruction.pos in leaders:
+            lines.append(f'        {keyword} pc == {instruction.pos}:')
+            lines.extend(_BLOCK_INDENT + line for line in _block_lines(method, index, leaders))
+            keyword = 'elif'
+
+    lines.append('        frame.pc = pc')
+    lines.append('        return False')
+    return '\n'.join(lines) + '\n'
+
+
+def can_compile(frame):
+    """Return True if the method of `frame` can be compiled
+
+    Methods without instructions have nothing to compile. Methods whose instructions do not have increasing positions
+    do not come from class files (tests create such methods) and cannot be split into blocks by position.
+    """
+    positions = [instruction.pos for instruction in frame.instructions]
+    return len(positions) > 0 and all(a < b for a, b in zip(positions, positions[1:]))
+
+
+def compile_method(frame, handlers):
+    """Return a compiled function that executes the method of `frame`, see the module documentation
+
+    The method must be compilable, see `can_compile`.
+    The generated source is available as the `source` attribute of the function.
+    :param frame: a Frame of the method to compile, only its method related attributes are used
+    :param handlers: the direct handlers of the method's instructions
+    """
+    method = _Method(frame, handlers)
+    name = 'compiled'
+    source = generate_source(method, name)
+    code = compile(source, f'<compiled {frame.jvm_class.name}#{frame.method_name}{frame.method_descriptor}>', 'exec')
+    namespace = method.namespace
+    exec(code, namespace)
+    function = namespace[name]
+    function.source = source
+    return function
@@ -2,7 +2,6 @@ from pyjvm.core import actions
 from pyjvm.core.actions import IncrementProgramCounter
 from pyjvm.core.jvm_types import Integer, NULL_VALUE, Long, Float, Double
 from pyjvm.instructions.instructions import Instructor, bytecode_dict, bytecode_list
-from pyjvm.utils.jawa_conversions import convert_constant
 
 
 def _create_push_constants_dict():
@@ -73,8 +72,6 @@ class LoadFromConstantPool(Instructor):
     """Pushes a constant from `self.constants`"""
 
     def execute(self):
-        index = self.operand_as_int()
-        constant = self.constants[index]
         return IncrementProgramCounter.after(
-            actions.Push(convert_constant(constant))
+            actions.Push(self.operand_as_value())
         )
@@ -62,13 +62,12 @@ class Switch(Instructor):
     def __init__(self, inputs, switch_class):
         super().__init__(inputs)
         self.switch_class = switch_class
+        # Decoded once, instructors are bound once per method
+        self.find_target = switch_class.from_instruction(self.instruction).jump_table(self.instruction.pos)
 
     def execute(self):
-        source = self.instruction.pos
         value = self.peek_op_stack()
-        switch = self.switch_class.from_instruction(self.instruction)
-        offset = switch.find_offset(value.value)
-        target = source + offset
+        target = self.find_target(value.value)
         return Actions(
             actions.Pop(),
             actions.GoTo(target)
@@ -0,0 +1,713 @@
+"""An engine that executes instructions by changing the current Frame directly
+
+The Instructors in this package describe the effects of an instruction as `Actions`, which the Machine then executes.
+That design is easy to read and to test, but every instruction pays for the creation and interpretation of its
+actions. This module implements the same instructions as handlers: functions that take the current `Frame` and
+change its op stack, locals and program counter in place. Operations that involve other frames, such as invocations,
+returns and exceptions, go through the public methods of the Machine.
+
+The handlers must have exactly the same effects as the corresponding Instructors,
+so they reuse the instruction tables that the Instructor modules define.
+The Instructors remain the reference implementation.
+
+Handlers are created by factories, that are registered by instruction name using `handles`.
+A factory is called once per instruction, when a method is linked, and decodes the instruction's operands.
+    .. code::
+
+        @handles({'iload_0': [0]})
+        def load(context, index):
+            def handler(frame):
+                ...
+
+            return handler
+
+See `bind_instruction` for the way the Machine uses this module.
+"""
+from functools import partial
+
+from jawa.util.bytecode import opcode_table
+
+from pyjvm.core.call_sites import NO_RECEIVER
+from pyjvm.core.class_loaders import dispatch_class_name
+from pyjvm.core.constant_pool import ResolvedConstants
+from pyjvm.core.hierarchies import TypeCheckCache
+from pyjvm.core.jvm_types import Integer, ArrayReferenceType, ObjectReferenceType
+from pyjvm.core.primitive_arrays import PrimitiveArray
+from pyjvm.instructions.comparisons import BRANCH_COMPARISONS, BOOLEAN_COMPARISONS
+from pyjvm.instructions.constant_instructions import CONSTANT_VALUES
+from pyjvm.instructions.control import RETURN_RESULT_INSTRUCTIONS
+from pyjvm.instructions.conversions import CONVERSION_DICT
+from pyjvm.instructions.instructions import WIDE_OPCODE
+from pyjvm.instructions.loads_and_stores import STORE_INSTRUCTIONS, LOAD_INSTRUCTIONS, \
+    STORE_INTO_ARRAY_INSTRUCTIONS, LOAD_FROM_ARRAY_INSTRUCTIONS
+from pyjvm.instructions.math import OPERATORS
+from pyjvm.instructions.references import create_levels, default_elements
+from pyjvm.instructions.stack_instructions import DUPLICATION_SPECS, matches_comp_types
+from pyjvm.instructions.switches import TABLE_SWITCH, LOOKUP_SWITCH, TableSwitch, LookupSwitch
+from pyjvm.utils import value_array_type_indicators
+from pyjvm.utils.utils import bool_to_num
+
+_NULL_POINTER = 'java/lang/NullPointerException'
+_CHECK_CAST = 'java/lang/CheckCastException'
+_NEGATIVE_ARRAY_SIZE = 'java/lang/NegativeArraySizeException'
+
+# Handler factories by numeric opcode
+_factories = dict()
+
+
+class HandlerContext:
+    """The inputs of a handler factory
+
+    instruction: the Instruction to create a handler for
+    constants: the ConstantPool of the class that the instruction belongs to
+    machine: the Machine that will execute the handler
+    location: the class name, method name and method descriptor of the method that the instruction belongs to
+    resolved_constants: the ResolvedConstants of the class, a new table is created if None is provided
+    """
+
+    def __init__(self, instruction, constants, machine, location=(None, None, None), resolved_constants=None):
+        self.instruction = instruction
+        self.constants = constants
+        self.machine = machine
+        self.loader = machine.class_loader
+        self.location = location
+        if resolved_constants is None:
+            resolved_constants = ResolvedConstants(constants)
+        self.resolved_constants = resolved_constants
+
+    def operand_as_int(self, index=0):
+        """Return an `int` value from the literal `operand` at `index`"""
+        return int(self.instruction.operands[index].value)
+
+    def operand_as_constant(self, index=0):
+        """Return a constant using the operand at `index` as an index into the `self.constants`"""
+        return self.constants[self.operand_as_int(index)]
+
+    def operand_as_class(self, index=0):
+        """Return the resolved class constant that the operand at `index` refers to, see core/constant_pool.py"""
+        return self.resolved_constants.class_ref(self.operand_as_int(index))
+
+    def operand_as_field(self, index=0):
+        """Return the resolved field reference that the operand at `index` refers to"""
+        return self.resolved_constants.field(self.operand_as_int(index))
+
+    def operand_as_method(self, index=0):
+        """Return the resolved method reference that the operand at `index` refers to"""
+        return self.resolved_constants.method(self.operand_as_int(index))
+
+    def operand_as_value(self, index=0):
+        """Return the materialized constant that the operand at `index` refers to"""
+        return self.resolved_constants.value(self.operand_as_int(index))
+
+
+def handles(names_and_args):
+    """Return a decorator that registers a handler factory for instructions
+
+    :param names_and_args: A mapping from instruction names to a list of extra arguments for the factory,
+    similar to `instructions.bytecode_dict`
+    """
+
+    def wrapper(factory):
+        for name, args in dict(names_and_args).items():
+            opcode = opcode_table[name]['op']
+            if opcode in _factories:
+                raise ValueError(f'{name} already has a handler')
+            _factories[opcode] = (factory, tuple(args))
+        return factory
+
+    return wrapper
+
+
+def handles_list(names):
+    """Like `handles`, for factories that do not need extra arguments"""
+    return handles({name: [] for name in names})
+
+
+def bind_instruction(instruction, constants, machine, location=(None, None, None), resolved_constants=None):
+    """Return a handler, a function that takes a Frame and executes `instruction` on it
+
+    :param instruction: the Instruction to bind
+    :param constants: the ConstantPool of the class that the instruction belongs to
+    :param machine: the Machine that will execute the handler
+    :param location: the class name, method name and method descriptor of the method that the instruction belongs to
+    :param resolved_constants: the ResolvedConstants of the class that the instruction belongs to
+    """
+    opcode = instruction.opcode
+    if opcode == WIDE_OPCODE:
+        opcode = opcode_table[instruction.mnemonic]['op']
+    try:
+        factory, args = _factories[opcode]
+    except KeyError as e:
+        raise KeyError(f'{instruction.mnemonic} does not have a registered handler') from e
+    return factory(HandlerContext(instruction, constants, machine, location, resolved_constants), *args)
+
+
+def get_handled_instructions():
+    """Return the names of the instructions that have handlers"""
+    return [opcode_table[opcode]['mnemonic'] for opcode in _factories]
+
+
+def _pop_many(stack, amount):
+    for _ in range(amount):
+        stack.pop()
+
+
+@handles_list([
+    'nop',
+    'monitorenter',
+    'monitorexit',
+    'breakpoint',
+    'impdep1',
+    'impdep2'
+])
+def no_op(context):
+    def handler(frame):
+        frame.advance()
+
+    return handler
+
+
+@handles_list([
+    'jsr',
+    'jsr_w',
+    'ret',
+    'invokedynamic',
+    'wide'
+])
+def not_implemented(context):
+    name = context.instruction.mnemonic
+
+    # noinspection PyUnusedLocal
+    def handler(frame):
+        raise NotImplementedError(f'The {name} instruction is not implemented by this jvm')
+
+    return handler
+
+
+# Loads and stores
+
+@handles(STORE_INSTRUCTIONS)
+def store_into_locals(context, index_in_locals):
+    if index_in_locals is None:
+        index_in_locals = context.operand_as_int()
+
+    def handler(frame):
+        frame.locals.store(index_in_locals, frame.op_stack.pop())
+        frame.advance()
+
+    return handler
+
+
+@handles(LOAD_INSTRUCTIONS)
+def load_from_locals(context, index_in_locals):
+    if index_in_locals is None:
+        index_in_locals = context.operand_as_int()
+
+    def handler(frame):
+        frame.op_stack.push(frame.locals.load(index_in_locals))
+        frame.advance()
+
+    return handler
+
+
+@handles_list(STORE_INTO_ARRAY_INSTRUCTIONS)
+def store_into_array(context):
+    machine = context.machine
+
+    def handler(frame):
+        stack = frame.op_stack
+        array = stack.peek(2)
+        if array.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        value = stack.pop()
+        index = stack.pop()
+        stack.pop()
+        array.value[index.value] = value
+        frame.advance()
+
+    return handler
+
+
+@handles_list(LOAD_FROM_ARRAY_INSTRUCTIONS)
+def load_from_array(context):
+    machine = context.machine
+
+    def handler(frame):
+        stack = frame.op_stack
+        array = stack.peek(1)
+        if array.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        index = stack.pop()
+        stack.pop()
+        stack.push(array.value[index.value])
+        frame.advance()
+
+    return handler
+
+
+# Stack instructions
+
+@handles({name: [specs] for name, specs in DUPLICATION_SPECS.items()})
+def duplicate(context, specs):
+    def handler(frame):
+        stack = frame.op_stack
+        for comp_type_string, amount_to_take, index_for_insertion in specs:
+            if matches_comp_types(stack, comp_type_string):
+                copies = [v.duplicate() for v in stack.peek_many(amount_to_take)]
+                for copy in reversed(copies):
+                    stack.insert_at_offset(index_for_insertion, copy)
+                frame.advance()
+                return
+
+        raise ValueError('No comp type case match')
+
+    return handler
+
+
+@handles({
+    'pop': [1],
+    'pop2': [2]
+})
+def pop(context, amount):
+    def handler(frame):
+        _pop_many(frame.op_stack, amount)
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['swap'])
+def swap(context):
+    def handler(frame):
+        stack = frame.op_stack
+        first = stack.pop()
+        second = stack.pop()
+        stack.push(first)
+        stack.push(second)
+        frame.advance()
+
+    return handler
+
+
+# Constants
+
+@handles({name: [value] for name, value in CONSTANT_VALUES.items()})
+def push_constant(context, value):
+    def handler(frame):
+        frame.op_stack.push(value)
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['sipush', 'bipush'])
+def push_operand(context):
+    literal = context.operand_as_int()
+
+    def handler(frame):
+        frame.op_stack.push(Integer.create_instance(literal))
+        frame.advance()
+
+    return handler
+
+
+@handles_list([
+    'ldc',
+    'ldc_w',
+    'ldc2_w'
+])
+def load_from_constant_pool(context):
+    value = context.operand_as_value()
+
+    def handler(frame):
+        frame.op_stack.push(value)
+        frame.advance()
+
+    return handler
+
+
+# Conversions
+
+@handles({name: [target] for name, (source, target) in CONVERSION_DICT.items()})
+def convert(context, target):
+    def handler(frame):
+        stack = frame.op_stack
+        stack.push(target.create_instance(stack.pop().value))
+        frame.advance()
+
+    return handler
+
+
+# Math
+
+def _math_handlers():
+    dic = {}
+    for op in OPERATORS:
+        dic.update(op.bytecode_args())
+    return dic
+
+
+@handles(_math_handlers())
+def math(context, op, type_, operands):
+    if operands == 1:
+        def handler(frame):
+            stack = frame.op_stack
+            stack.push(type_.create_instance(op(stack.pop().value)))
+            frame.advance()
+    else:
+        def handler(frame):
+            stack = frame.op_stack
+            right = stack.pop()
+            left = stack.pop()
+            stack.push(type_.create_instance(op(left.value, right.value)))
+            frame.advance()
+
+    return handler
+
+
+@handles_list(['iinc'])
+def increment(context):
+    local_index, amount_to_add = [op.value for op in context.instruction.operands]
+
+    def handler(frame):
+        # Follows the Increment Instructor, see math.py
+        original_value = frame.locals.load(local_index).value
+        frame.op_stack.push(Integer.create_instance(original_value + amount_to_add))
+        frame.advance()
+
+    return handler
+
+
+# Comparisons
+
+@handles(BRANCH_COMPARISONS)
+def branch_comparison(context, pops, op):
+    pos = context.instruction.pos
+    target = pos + context.operand_as_int()
+    next_target = pos + 1
+
+    if pops == 1:
+        def handler(frame):
+            value = frame.op_stack.pop()
+            frame.jump(target if op(value.value) else next_target)
+    else:
+        def handler(frame):
+            stack = frame.op_stack
+            first = stack.pop()
+            second = stack.pop()
+            frame.jump(target if op(first.value, second.value) else next_target)
+
+    return handler
+
+
+@handles({
+    'ifnull': [lambda v: v.is_null],
+    'ifnonnull': [lambda v: not v.is_null]
+})
+def null_branch_comparison(context, op):
+    pos = context.instruction.pos
+    target = pos + context.operand_as_int()
+    next_target = pos + 1
+
+    def handler(frame):
+        frame.jump(target if op(frame.op_stack.pop()) else next_target)
+
+    return handler
+
+
+@handles({name: [op] for name, op in BOOLEAN_COMPARISONS.items()})
+def boolean_comparison(context, op):
+    def handler(frame):
+        stack = frame.op_stack
+        first = stack.pop()
+        second = stack.pop()
+        stack.push(bool_to_num(op(first.value, second.value)))
+        frame.advance()
+
+    return handler
+
+
+# Control
+
+@handles_list(RETURN_RESULT_INSTRUCTIONS)
+def return_result(context):
+    machine = context.machine
+
+    def handler(frame):
+        machine.return_result(frame.op_stack.peek())
+
+    return handler
+
+
+@handles_list(['return'])
+def return_void(context):
+    machine = context.machine
+
+    # noinspection PyUnusedLocal
+    def handler(frame):
+        machine.return_void()
+
+    return handler
+
+
+@handles_list([
+    'goto',
+    'goto_w'
+])
+def go_to(context):
+    target = context.instruction.pos + context.operand_as_int()
+
+    def handler(frame):
+        frame.jump(target)
+
+    return handler
+
+
+@handles({
+    TABLE_SWITCH: [TableSwitch],
+    LOOKUP_SWITCH: [LookupSwitch]
+})
+def switch(context, switch_class):
+    instruction = context.instruction
+    find_target = switch_class.from_instruction(instruction).jump_table(instruction.pos)
+
+    def handler(frame):
+        frame.jump(find_target(frame.op_stack.pop().value))
+
+    return handler
+
+
+# Invocations
+
+@handles({
+    'invokevirtual': [1, True],
+    'invokespecial': [1, False],
+    'invokeinterface': [1, True],
+    'invokestatic': [0, False]
+})
+def invoke(context, args_to_add, dispatches_on_receiver):
+    """Invocations resolve their method through the inline cache of their call site, see core/call_sites.py"""
+    machine = context.machine
+    method_ref = context.operand_as_method()
+    class_name = method_ref.class_name
+    key = method_ref.key
+    num_args = method_ref.argument_count + args_to_add
+    site = machine.call_sites.create(context.location + (context.instruction.pos,), class_name, key)
+    lookup = site.lookup
+
+    def resolve(receiver_type):
+        return machine.resolve(class_name if receiver_type is NO_RECEIVER else receiver_type, key)
+
+    def handler(frame):
+        stack = frame.op_stack
+        args = [stack.pop() for _ in range(num_args)]
+        args.reverse()
+        if dispatches_on_receiver:
+            receiver = args[0]
+            if receiver.is_null:
+                machine.create_and_throw(_NULL_POINTER)
+                return
+            receiver_type = dispatch_class_name(receiver, class_name)
+        else:
+            receiver_type = NO_RECEIVER
+        jvm_class, method = lookup(receiver_type, resolve)
+        machine.invoke_method(jvm_class, method, args)
+
+    return handler
+
+
+# References
+
+@handles_list(['instanceof'])
+def instance_of(context):
+    is_instance = TypeCheckCache(context.operand_as_class().descriptor, context.loader).is_instance
+
+    def handler(frame):
+        stack = frame.op_stack
+        obj = stack.pop()
+        answer = not obj.is_null and is_instance(obj)
+        stack.push(Integer.create_instance(1 if answer else 0))
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['checkcast'])
+def check_cast(context):
+    machine = context.machine
+    is_instance = TypeCheckCache(context.operand_as_class().descriptor, context.loader).is_instance
+
+    def handler(frame):
+        obj = frame.op_stack.peek()
+        if obj.is_null or is_instance(obj):
+            frame.advance()
+        else:
+            machine.create_and_throw(_CHECK_CAST)
+
+    return handler
+
+
+@handles_list(['arraylength'])
+def array_length(context):
+    machine = context.machine
+
+    def handler(frame):
+        stack = frame.op_stack
+        array = stack.peek()
+        if array.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        stack.pop()
+        stack.push(Integer.create_instance(len(array.value)))
+        frame.advance()
+
+    return handler
+
+
+def _new_array_handler(machine, type_, create_elements):
+    array_type = ArrayReferenceType(type_)
+
+    def handler(frame):
+        stack = frame.op_stack
+        size = stack.peek().value
+        if size < 0:
+            machine.create_and_throw(_NEGATIVE_ARRAY_SIZE)
+            return
+        elements = create_elements(size)
+        stack.pop()
+        stack.push(array_type.create_instance(elements))
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['newarray'])
+def new_value_array(context):
+    indicator = context.operand_as_int()
+    type_ = value_array_type_indicators.type_by_indicator(indicator)
+    return _new_array_handler(context.machine, type_, partial(PrimitiveArray.create, indicator))
+
+
+@handles_list(['anewarray'])
+def new_ref_array(context):
+    type_ = ObjectReferenceType(refers_to=context.operand_as_class().name)
+    return _new_array_handler(context.machine, type_, partial(default_elements, type_))
+
+
+@handles_list(['multianewarray'])
+def new_multi_array(context):
+    machine = context.machine
+    base_type = ObjectReferenceType(context.operand_as_class().name)
+    num_dimensions = context.operand_as_int(index=1)
+    array_type = base_type
+    for _ in range(num_dimensions):
+        array_type = ArrayReferenceType(array_type)
+
+    def handler(frame):
+        stack = frame.op_stack
+        dimensions = [v.value for v in stack.peek_many(num_dimensions)]
+        if any(d < 0 for d in dimensions):
+            machine.create_and_throw(_NEGATIVE_ARRAY_SIZE)
+            return
+        array_value = create_levels(dimensions, lambda: base_type.create_instance(base_type.default_value))
+        _pop_many(stack, num_dimensions)
+        stack.push(array_type.create_instance(array_value))
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['athrow'])
+def throw(context):
+    machine = context.machine
+
+    def handler(frame):
+        obj = frame.op_stack.peek()
+        if obj.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+        else:
+            machine.throw(obj)
+
+    return handler
+
+
+@handles_list(['new'])
+def new(context):
+    machine = context.machine
+    loader = context.loader
+    class_name = context.operand_as_class().name
+
+    def handler(frame):
+        class_ = loader.get_the_class(class_name)
+        frame.op_stack.push(machine.create_instance(class_.name))
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['getfield'])
+def get_field(context):
+    machine = context.machine
+    name = context.operand_as_field().name
+
+    def handler(frame):
+        stack = frame.op_stack
+        obj = stack.peek()
+        if obj.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        stack.pop()
+        stack.push(obj.value.fields[name])
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['putfield'])
+def put_field(context):
+    machine = context.machine
+    name = context.operand_as_field().name
+
+    def handler(frame):
+        stack = frame.op_stack
+        obj = stack.peek(1)
+        if obj.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        value = stack.pop()
+        stack.pop()
+        obj.value.fields[name] = value
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['putstatic'])
+def put_static(context):
+    loader = context.loader
+    field_ref = context.operand_as_field()
+    field_name = field_ref.name
+    class_name = field_ref.class_name
+
+    def handler(frame):
+        value = frame.op_stack.pop()
+        loader.get_the_statics(class_name)[field_name] = value
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['getstatic'])
+def get_static(context):
+    loader = context.loader
+    field_ref = context.operand_as_field()
+    field_name = field_ref.name
+    class_name = field_ref.class_name
+
+    def handler(frame):
+        frame.op_stack.push(loader.get_the_statics(class_name)[field_name])
+        frame.advance()
+
+    return handler
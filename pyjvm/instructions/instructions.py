@@ -15,15 +15,37 @@ resulting `Actions`
 
 They leverage the `decorator` method of `ClassRegistry`, so refer to that class for more information.
 
+Instructors are looked up by numeric opcode. `execute_instruction` creates a new Instructor for every call,
+which is convenient for tests. The Machine instead calls `bind_instruction` once per instruction when it links a
+method, and reuses the resulting `BoundInstruction` whenever that instruction executes.
 """
 from collections import OrderedDict
 
+from jawa.util.bytecode import opcode_table
+
 from pyjvm.core.actions import IncrementProgramCounter, Action, Actions
+from pyjvm.core.constant_pool import ResolvedConstants
 from pyjvm.utils.class_registry import ClassRegistry
 
 _registry = ClassRegistry()
 
-bytecode = _registry.decorator
+# Instructor factories by numeric opcode, populated by `bytecode`
+_by_opcode = dict()
+
+# jawa keeps the opcode of the wide prefix on instructions that were read with that prefix
+WIDE_OPCODE = opcode_table['wide']['op']
+
+
+def bytecode(name, *args, **kwargs):
+    """A decorator that registers an Instructor for the instruction `name` with the provided arguments"""
+    register = _registry.decorator(name, *args, **kwargs)
+
+    def wrapper(a_class):
+        register(a_class)
+        _by_opcode[opcode_table[name]['op']] = _registry.factory(name)
+        return a_class
+
+    return wrapper
 
 
 def bytecode_dict(names_and_args):
@@ -87,12 +109,16 @@ class InstructorInputs:
     """
 
     # noinspection PyShadowingBuiltins
-    def __init__(self, *, instruction, locals, op_stack, constants, loader):
+    def __init__(self, *, instruction, locals, op_stack, constants, loader, resolved_constants=None):
+        """`resolved_constants` should be the table of the class that owns `constants`, when there is one"""
         self.instruction = instruction
         self.locals = locals
         self.op_stack = op_stack
         self.constants = constants
         self.loader = loader
+        if resolved_constants is None:
+            resolved_constants = ResolvedConstants(constants)
+        self.resolved_constants = resolved_constants
 
 
 class Instructor:
@@ -104,6 +130,7 @@ class Instructor:
         self.op_stack = inputs.op_stack
         self.constants = inputs.constants
         self.loader = inputs.loader
+        self.resolved_constants = inputs.resolved_constants
 
     def execute(self):
         """Return `Actions` or an `Action` that correspond to the `instruction`"""
@@ -118,6 +145,22 @@ class Instructor:
         const_index = self.operand_as_int(index)
         return self.constants[const_index]
 
+    def operand_as_class(self, index=0):
+        """Return the resolved class constant that the operand at `index` refers to, see core/constant_pool.py"""
+        return self.resolved_constants.class_ref(self.operand_as_int(index))
+
+    def operand_as_field(self, index=0):
+        """Return the resolved field reference that the operand at `index` refers to"""
+        return self.resolved_constants.field(self.operand_as_int(index))
+
+    def operand_as_method(self, index=0):
+        """Return the resolved method reference that the operand at `index` refers to"""
+        return self.resolved_constants.method(self.operand_as_int(index))
+
+    def operand_as_value(self, index=0):
+        """Return the materialized constant that the operand at `index` refers to"""
+        return self.resolved_constants.value(self.operand_as_int(index))
+
     def peek_op_stack(self, *args, **kwargs):
         """Return top-of-stack"""
         return self.op_stack.peek(*args, **kwargs)
@@ -127,11 +170,67 @@ class Instructor:
         return [self.peek_op_stack(i) for i in range(amount)]
 
 
+class BoundInstruction:
+    """An Instructor that is created once for an instruction and reused every time the instruction executes
+
+    The Instructor decodes its operands when it is created.
+    The frame dependent inputs, the locals and the op stack, are provided for each execution.
+    """
+
+    def __init__(self, instructor):
+        self.instructor = instructor
+
+    # noinspection PyShadowingBuiltins
+    def execute(self, locals, op_stack):
+        """Return `Actions` that simulate the execution of the instruction with `locals` and `op_stack`"""
+        instructor = self.instructor
+        # Executing an instruction can load a class, which runs its <clinit> and possibly this very instruction.
+        # So the previous inputs are restored instead of assuming that nobody else is using this instance.
+        previous_locals, previous_op_stack = instructor.locals, instructor.op_stack
+        instructor.locals, instructor.op_stack = locals, op_stack
+        try:
+            return _as_actions(instructor.execute())
+        finally:
+            instructor.locals, instructor.op_stack = previous_locals, previous_op_stack
+
+
+def instructor_factory(instruction):
+    """Return a function that takes `InstructorInputs` and creates the Instructor for `instruction`"""
+    opcode = instruction.opcode
+    if opcode == WIDE_OPCODE:
+        opcode = opcode_table[instruction.mnemonic]['op']
+    try:
+        return _by_opcode[opcode]
+    except KeyError as e:
+        raise KeyError(f'{instruction.mnemonic} does not have a registered Instructor') from e
+
+
 def execute_instruction(inputs):
     """Return `Actions` that simulate the execution of `inputs.instruction`"""
-    instruction_name = inputs.instruction.mnemonic
-    executor = _registry.get(instruction_name, inputs)
-    action_or_actions = executor.execute()
+    executor = instructor_factory(inputs.instruction)(inputs)
+    return _as_actions(executor.execute())
+
+
+def bind_instruction(instruction, constants, loader, resolved_constants=None):
+    """Return a `BoundInstruction` for `instruction`
+
+    :param instruction: the Instruction to bind
+    :param constants: the ConstantPool of the class that the instruction belongs to
+    :param loader: the ClassLoader to use when the instruction executes
+    :param resolved_constants: the ResolvedConstants of the class, see `InstructorInputs`
+    """
+    inputs = InstructorInputs(
+        instruction=instruction,
+        locals=None,
+        op_stack=None,
+        constants=constants,
+        loader=loader,
+        resolved_constants=resolved_constants
+    )
+    return BoundInstruction(instructor_factory(instruction)(inputs))
+
+
+def _as_actions(action_or_actions):
     if isinstance(action_or_actions, Action):
         return Actions(action_or_actions)
     else:
@@ -1,40 +1,40 @@
 from pyjvm.core import actions
 from pyjvm.core.actions import Actions
 from pyjvm.instructions.instructions import bytecode, Instructor
-from pyjvm.utils.jawa_conversions import key_from_method_ref
 
 
-@bytecode('invokevirtual', 1)
-@bytecode('invokespecial', 1)
-@bytecode('invokeinterface', 1)
-@bytecode('invokestatic', 0)
+@bytecode('invokevirtual', 1, True)
+@bytecode('invokespecial', 1, False)
+@bytecode('invokeinterface', 1, True)
+@bytecode('invokestatic', 0, False)
 class InvokeVirtual(Instructor):
     """Invokes methods
 
     This Instructor uses the method's details to figure out how many parameters should be popped of the stack.
     It also provides an `args_to_add` method to enable popping off the implicit `this` parameter for instance methods.
+    `virtual` marks the instructions that select the method by the class of their receiver, the implicit `this`.
 
     So the general process is:
      - Get a reference to the method via the details in the instruction
-     - Extract number of parameters and add `args_to_add` to it
+     - Extract number of parameters from the method's descriptor and add `args_to_add` to it
      - Pop parameters and invoke with them
+
+    The descriptor is enough to count the parameters, so the method is only resolved once, by the Machine.
+    The reference itself is decoded once per class, see core/constant_pool.py.
     """
 
-    def __init__(self, inputs, args_to_add):
+    def __init__(self, inputs, args_to_add, virtual):
         super().__init__(inputs)
         self.args_to_add = args_to_add
+        self.virtual = virtual
 
     def execute(self):
-        method_ref = self.operand_as_constant()
-        class_name = method_ref.class_.name.value
-        key = key_from_method_ref(method_ref)
+        method_ref = self.operand_as_method()
 
-        class_ = self.loader.get_the_class(class_name)
-        method = class_.methods[key]
-        num_args = len(method.args) + self.args_to_add
+        num_args = method_ref.argument_count + self.args_to_add
         args = reversed(self.peek_many(num_args))
 
         return Actions(
             actions.Pop(num_args),
-            actions.Invoke(class_name, key, args)
+            actions.Invoke(method_ref.class_name, method_ref.key, args, self.virtual)
         )
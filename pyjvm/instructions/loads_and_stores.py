@@ -51,10 +51,16 @@ def _create_into_array_list(phrase):
     return [letter + phrase for letter in 'lfdibcsa']
 
 
-_STORE = bytecode_dict(_create_store_load_dict('store'))
-_LOAD = bytecode_dict(_create_store_load_dict('load'))
-_STORE_INTO_ARRAY = bytecode_list(_create_into_array_list('astore'))
-_LOAD_FROM_ARRAY = bytecode_list(_create_into_array_list('aload'))
+# Instruction names and their arguments, also used by the direct engine (see direct.py)
+STORE_INSTRUCTIONS = _create_store_load_dict('store')
+LOAD_INSTRUCTIONS = _create_store_load_dict('load')
+STORE_INTO_ARRAY_INSTRUCTIONS = _create_into_array_list('astore')
+LOAD_FROM_ARRAY_INSTRUCTIONS = _create_into_array_list('aload')
+
+_STORE = bytecode_dict(STORE_INSTRUCTIONS)
+_LOAD = bytecode_dict(LOAD_INSTRUCTIONS)
+_STORE_INTO_ARRAY = bytecode_list(STORE_INTO_ARRAY_INSTRUCTIONS)
+_LOAD_FROM_ARRAY = bytecode_list(LOAD_FROM_ARRAY_INSTRUCTIONS)
 
 
 @_STORE
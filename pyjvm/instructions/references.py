@@ -1,26 +1,40 @@
 from pyjvm.core import actions
 from pyjvm.core.actions import IncrementProgramCounter, Actions
-from pyjvm.core.hierarchies import is_value_instance_of
+from pyjvm.core.hierarchies import TypeCheckCache
 from pyjvm.core.jvm_types import Integer, ArrayReferenceType, ObjectReferenceType
+from pyjvm.core.primitive_arrays import PrimitiveArray
 from pyjvm.instructions.instructions import bytecode, Instructor
 from pyjvm.utils import value_array_type_indicators
-from pyjvm.utils.utils import class_as_descriptor, field_name_from_field_ref
+
+
+class TypeCheckInstructor(Instructor):
+    """An Instructor that checks instances against the class that its operand refers to
+
+    The results are cached by a `TypeCheckCache`, which lives as long as the Instructor does.
+    So a `BoundInstruction` keeps the cache of its instruction across executions.
+    """
+
+    def __init__(self, inputs):
+        super().__init__(inputs)
+        self._type_check = None
+
+    def type_check(self):
+        """Return the TypeCheckCache of this instruction"""
+        if self._type_check is None:
+            self._type_check = TypeCheckCache(self.operand_as_class().descriptor, self.loader)
+        return self._type_check
 
 
 @bytecode('instanceof')
-class InstanceOf(Instructor):
+class InstanceOf(TypeCheckInstructor):
     """Pushes Integer value 1 if top-of-stack is an instance of the provided class, else, pushes Integer value 0"""
 
     def execute(self):
-        constant_index = self.operand_as_int()
-        constant = self.constants[constant_index]
-        class_name = constant.name.value
-
         obj = self.peek_op_stack()
         if obj.is_null:
             answer = False
         else:
-            answer = is_value_instance_of(obj, class_as_descriptor(class_name), self.loader)
+            answer = self.type_check().is_instance(obj)
 
         if answer:
             result = Integer.create_instance(1)
@@ -34,16 +48,12 @@ class InstanceOf(Instructor):
 
 
 @bytecode('checkcast')
-class CheckCast(Instructor):
+class CheckCast(TypeCheckInstructor):
     """Throws CheckCastException if top-of-stack is not an instance of the provided class"""
 
     def execute(self):
-        constant_index = self.operand_as_int()
-        constant = self.constants[constant_index]
-        class_name = constant.name.value
-
         obj = self.peek_op_stack()
-        answer = obj.is_null or is_value_instance_of(obj, class_as_descriptor(class_name), self.loader)
+        answer = obj.is_null or self.type_check().is_instance(obj)
         if answer:
             return IncrementProgramCounter()
         else:
@@ -73,7 +83,7 @@ class CreateNewArray(Instructor):
 
     The size of the array is popped of the stack.
     The type of the array is found via the abstract method `_get_type'.
-    The array is populated with instances of the default value for the type.
+    The array is populated with instances of the default value for the type, see `_create_elements`.
     """
 
     def execute(self):
@@ -82,7 +92,7 @@ class CreateNewArray(Instructor):
         if size < 0:
             return actions.throw_negative_array_size()
         else:
-            elements = [type_.create_instance(type_.default_value) for _ in range(size)]
+            elements = self._create_elements(type_, size)
             result = ArrayReferenceType(type_).create_instance(elements)
             return IncrementProgramCounter.after(
                 actions.Pop(),
@@ -92,13 +102,19 @@ class CreateNewArray(Instructor):
     def _get_type(self):
         raise NotImplementedError()
 
+    # noinspection PyMethodMayBeStatic
+    def _create_elements(self, type_, size):
+        """Return the value of a new array of `size` default `type_` elements"""
+        return default_elements(type_, size)
+
 
 @bytecode('newarray')
 class NewValueArray(CreateNewArray):
     """Creates a new array of primitive type
 
     The type is provided in the instruction as number.
-    See ../utils/value_array_type_indicators.py for more information
+    See ../utils/value_array_type_indicators.py for more information.
+    The elements are stored in a compact buffer, see core/primitive_arrays.py
     """
 
     def _get_type(self):
@@ -106,15 +122,16 @@ class NewValueArray(CreateNewArray):
         type_ = value_array_type_indicators.type_by_indicator(type_indicator)
         return type_
 
+    def _create_elements(self, type_, size):
+        return PrimitiveArray.create(self.operand_as_int(), size)
+
 
 @bytecode('anewarray')
 class NewRefArray(CreateNewArray):
     """Creates a new array of reference type instances"""
 
     def _get_type(self):
-        index = self.operand_as_int()
-        const = self.constants[index]
-        class_name = const.name.value
+        class_name = self.operand_as_class().name
         type_ = ObjectReferenceType(refers_to=class_name)
         return type_
 
@@ -128,8 +145,7 @@ class NewMultiArray(Instructor):
     """
 
     def execute(self):
-        class_ = self.operand_as_constant()
-        class_name = class_.name.value
+        class_name = self.operand_as_class().name
         base_type = ObjectReferenceType(class_name)
 
         num_dimensions = self.operand_as_int(index=1)
@@ -170,9 +186,7 @@ class New(Instructor):
     """Push a new instance of the provided class onto the stack"""
 
     def execute(self):
-        class_constant_index = self.operand_as_int()
-        class_constant = self.constants[class_constant_index]
-        class_name = class_constant.name.value
+        class_name = self.operand_as_class().name
         class_ = self.loader.get_the_class(class_name)
         return IncrementProgramCounter.after(
             actions.PushNewInstance(class_)
@@ -187,8 +201,7 @@ class GetField(Instructor):
     """
 
     def execute(self):
-        field_ref = self.operand_as_constant()
-        name = field_name_from_field_ref(field_ref)
+        name = self.operand_as_field().name
         obj = self.peek_op_stack()
         if obj.is_null:
             return actions.throw_null_pointer()
@@ -208,8 +221,7 @@ class PutField(Instructor):
     """
 
     def execute(self):
-        field_ref = self.operand_as_constant()
-        name = field_name_from_field_ref(field_ref)
+        name = self.operand_as_field().name
         value = self.peek_op_stack(0)
         obj = self.peek_op_stack(1)
 
@@ -230,9 +242,9 @@ class PutStatic(Instructor):
     """
 
     def execute(self):
-        field_ref = self.operand_as_constant()
-        field_name = field_name_from_field_ref(field_ref)
-        class_name = field_ref.class_.name.value
+        field_ref = self.operand_as_field()
+        field_name = field_ref.name
+        class_name = field_ref.class_name
         value = self.peek_op_stack()
         return IncrementProgramCounter.after(
             actions.Pop(),
@@ -248,9 +260,9 @@ class GetStatic(Instructor):
     """
 
     def execute(self):
-        field_ref = self.operand_as_constant()
-        field_name = field_name_from_field_ref(field_ref)
-        class_name = field_ref.class_.name.value
+        field_ref = self.operand_as_field()
+        field_name = field_ref.name
+        class_name = field_ref.class_name
 
         value = self.loader.get_the_statics(class_name)[field_name]
         return IncrementProgramCounter.after(
@@ -258,6 +270,11 @@ class GetStatic(Instructor):
         )
 
 
+def default_elements(type_, size):
+    """Return a list of `size` instances of the default value of `type_`, the value of a new reference array"""
+    return [type_.create_instance(type_.default_value) for _ in range(size)]
+
+
 def create_levels(levels, base_factory):
     """Create a multidimensional array
 
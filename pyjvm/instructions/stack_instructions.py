@@ -8,7 +8,8 @@ def _single_iterable_byte_code_dict(specs):
     return bytecode_dict({k: [v] for k, v in specs.items()})
 
 
-@_single_iterable_byte_code_dict({
+# The specs of the duplication instructions, see `DuplicationInstructor` for details
+DUPLICATION_SPECS = {
     'dup': [
         ('1', 1, 1)
     ],
@@ -34,7 +35,29 @@ def _single_iterable_byte_code_dict(specs):
         ('112', 2, 3),
         ('22', 1, 2)
     ]
-})
+}
+
+
+def matches_comp_types(op_stack, numbers):
+    """Return True if the computational types at the top of `op_stack` match `numbers`
+
+    `numbers` is a string of '1's and '2's, see `DuplicationInstructor` for details.
+    """
+    numbers = [int(i) for i in numbers]
+    for index, num in enumerate(numbers):
+        try:
+            stack_value = op_stack.peek(index)
+            comp = CompType(stack_value)
+        except (TypeError, IndexError):
+            return False
+        bool_value = comp.is_one if num == 1 else comp.is_two
+        if not bool_value:
+            return False
+
+    return True
+
+
+@_single_iterable_byte_code_dict(DUPLICATION_SPECS)
 class DuplicationInstructor(Instructor):
     """Duplicate a certain amount of values from the top of the stack
 
@@ -79,18 +102,7 @@ class DuplicationInstructor(Instructor):
         raise ValueError('No comp type case match')
 
     def matches_comp_types(self, numbers):
-        numbers = [int(i) for i in numbers]
-        for index, num in enumerate(numbers):
-            try:
-                stack_value = self.peek_op_stack(index)
-                comp = CompType(stack_value)
-            except (TypeError, IndexError):
-                return False
-            bool_value = comp.is_one if num == 1 else comp.is_two
-            if not bool_value:
-                return False
-
-        return True
+        return matches_comp_types(self.op_stack, numbers)
 
 
 @bytecode('pop', 1)
@@ -0,0 +1,188 @@
+"""Superinstructions for the direct engine
+
+Code that is compiled by javac is full of short idioms, such as ``iload, iload, iadd, istore``.
+When the direct engine executes such an idiom, the Machine's run loop pays its dispatch cost once for every
+instruction. A superinstruction is a single handler that executes a whole sequence of handlers,
+so the dispatch cost is paid once for the sequence.
+
+Fusing happens when a method is linked, see `fuse`. The handler of the first instruction in a matching sequence is
+replaced by the superinstruction, all other handlers stay as they are. Branches that target the middle of a sequence
+and exception handlers that cover a part of it keep working, because every handler still updates the program counter
+as it normally would.
+
+Since a superinstruction runs its handlers one after the other, every instruction in a pattern but the last must
+fall through to the next instruction. Branches, invocations, returns and instructions that might throw can only
+appear at the end of a pattern, see `FALL_THROUGH_INSTRUCTIONS`.
+
+The patterns are configurable. They can be derived from a `PairProfile` of a real workload:
+    .. code::
+
+        profile = PairProfile()
+        run(loader, main_class_name, engine=DIRECT_ENGINE, superinstructions=(), pair_profile=profile)
+        patterns = profile.patterns(limit=16)
+"""
+import json
+from collections import Counter
+
+from pyjvm.instructions.comparisons import BOOLEAN_COMPARISONS
+from pyjvm.instructions.constant_instructions import CONSTANT_VALUES
+from pyjvm.instructions.conversions import CONVERSION_DICT
+from pyjvm.instructions.loads_and_stores import STORE_INSTRUCTIONS, LOAD_INSTRUCTIONS
+from pyjvm.instructions.math import OPERATORS
+from pyjvm.instructions.stack_instructions import DUPLICATION_SPECS
+
+
+def _fall_through_instructions():
+    names = {'nop', 'iinc', 'pop', 'pop2', 'swap', 'bipush', 'sipush'}
+    names.update(STORE_INSTRUCTIONS)
+    names.update(LOAD_INSTRUCTIONS)
+    names.update(CONSTANT_VALUES)
+    names.update(CONVERSION_DICT)
+    names.update(DUPLICATION_SPECS)
+    names.update(BOOLEAN_COMPARISONS)
+    for op in OPERATORS:
+        names.update(op.bytecode_args())
+    return frozenset(names)
+
+
+# Instructions that always continue to the next instruction, and can therefore appear anywhere in a pattern
+FALL_THROUGH_INSTRUCTIONS = _fall_through_instructions()
+
+# Idioms that are common in loops that javac emits
+DEFAULT_PATTERNS = (
+    ('iload', 'iload', 'iadd', 'istore'),
+    ('aload_0', 'getfield'),
+    ('iinc', 'goto'),
+    ('iload', 'if_icmpge'),
+)
+
+
+def validate_patterns(patterns):
+    """Return `patterns` as a tuple of tuples, raise a ValueError if one of them cannot be fused
+
+    Patterns must have at least two elements, and all elements but the last must fall through.
+    A pattern element is either a mnemonic, such as ``iload_1``, or the name of an instruction family,
+    such as ``iload``, which matches ``iload`` and ``iload_0`` through ``iload_3``.
+    """
+    result = []
+    for pattern in patterns:
+        pattern = tuple(pattern)
+        if len(pattern) < 2:
+            raise ValueError(f'A superinstruction pattern needs at least two instructions, got {pattern}')
+        for element in pattern[:-1]:
+            if element not in FALL_THROUGH_INSTRUCTIONS:
+                raise ValueError(f'{element} does not fall through, it can only be last in a pattern. Got {pattern}')
+        result.append(pattern)
+    return tuple(result)
+
+
+def _family(mnemonic):
+    name, _, suffix = mnemonic.rpartition('_')
+    if name and suffix.isdigit():
+        return name
+    return mnemonic
+
+
+def _matches(pattern, mnemonics, start):
+    if start + len(pattern) > len(mnemonics):
+        return False
+    for offset, element in enumerate(pattern):
+        mnemonic = mnemonics[start + offset]
+        if element != mnemonic and element != _family(mnemonic):
+            return False
+    return True
+
+
+def _superinstruction(handlers):
+    """Return a single handler that executes `handlers` in order"""
+    if len(handlers) == 2:
+        first, second = handlers
+
+        def handler(frame):
+            first(frame)
+            second(frame)
+    elif len(handlers) == 3:
+        first, second, third = handlers
+
+        def handler(frame):
+            first(frame)
+            second(frame)
+            third(frame)
+    else:
+        def handler(frame):
+            for h in handlers:
+                h(frame)
+
+    return handler
+
+
+def fuse(instructions, handlers, patterns):
+    """Return a tuple of handlers in which sequences that match `patterns` are executed by superinstructions
+
+    :param instructions: the instructions of a method
+    :param handlers: the handlers of these instructions, in the same order
+    :param patterns: validated patterns, see `validate_patterns`. Earlier patterns take precedence.
+    """
+    mnemonics = [instruction.mnemonic for instruction in instructions]
+    positions = [instruction.pos for instruction in instructions]
+    result = list(handlers)
+    for index in range(len(mnemonics)):
+        for pattern in patterns:
+            end = index + len(pattern)
+            # Instructions with identical positions do not form a real method, see InstructionTable
+            if _matches(pattern, mnemonics, index) and len(set(positions[index:end])) == len(pattern):
+                result[index] = _superinstruction(tuple(handlers[index:end]))
+                break
+
+    return tuple(result)
+
+
+class PairProfile:
+    """Counts pairs of consecutive instructions that are executed one after the other
+
+    A pair is counted when an instruction is followed by the next instruction in the same method,
+    which is exactly when the two could be executed by a superinstruction.
+    Profiles are best recorded without superinstructions, since a superinstruction is recorded as its first instruction.
+    """
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+        self._last_frame = None
+        self._last_index = None
+        self._last_mnemonic = None
+
+    def record(self, frame, index):
+        """Record the execution of the instruction at `index` in `frame`"""
+        mnemonic = frame.instructions[index].mnemonic
+        if frame is self._last_frame and index == self._last_index + 1:
+            self.counts[(self._last_mnemonic, mnemonic)] += 1
+        self._last_frame = frame
+        self._last_index = index
+        self._last_mnemonic = mnemonic
+
+    def patterns(self, limit=16, min_count=1):
+        """Return the most frequent pairs that can be fused, in order of frequency
+
+        :param limit: the maximal amount of patterns to return
+        :param min_count: pairs that were executed less times are ignored
+        """
+        result = []
+        for (first, second), count in self.counts.most_common():
+            if len(result) >= limit or count < min_count:
+                break
+            if first in FALL_THROUGH_INSTRUCTIONS:
+                result.append((first, second))
+        return tuple(result)
+
+    def save(self, path):
+        """Write this profile to `path` as JSON"""
+        entries = [[first, second, count] for (first, second), count in self.counts.most_common()]
+        with open(path, 'w') as f:
+            json.dump(entries, f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """Return a profile that was written by `save`"""
+        with open(path) as f:
+            entries = json.load(f)
+        return cls({(first, second): count for first, second, count in entries})
@@ -8,7 +8,10 @@ Reiterating it here in full seems redundant and error prone, for the full spec s
 However, this complexity led me to create these classes which implement the following interface:
     - `from_instruction(cls, instruction)` which creates an instance from an instruction (class method)
     - `create_instruction(self, position=None)` which does the opposite (useful for testing)
-    - `find_offset(self, value)` which returns the correct offset of the jump (useful for implementing the instruction)
+    - `find_offset(self, value)` which returns the correct offset of the jump
+    - `jump_table(self, source)` which returns a function from values to the absolute targets of the jumps
+      from the instruction at `source`. Instructions decode their switch and build this function once, when they are
+      bound, so a dispatch is a list index (tableswitch) or a dict lookup (lookupswitch)
 
 Hopefully, these classes will ease the implementation of test and instruction handling.
 See control.py and test/test_instructions/test_control.py for usage examples.
@@ -46,20 +49,35 @@ class LookupSwitch:
         except KeyError:
             return self.default
 
+    def jump_table(self, source):
+        targets = {value: source + offset for value, offset in self.pairs.items()}
+        default = source + self.default
+
+        def find_target(value):
+            return targets.get(value, default)
+
+        return find_target
+
     @classmethod
     def from_instruction(cls, instruction):
         _validate_instruction_name(instruction, LOOKUP_SWITCH)
+        operands = instruction.operands
+        if operands and isinstance(operands[0], dict):
+            # The way jawa disassembles the instruction, a mapping of matches to offsets and the default offset
+            pairs, default = operands
+            return cls(int(default.value), sorted(pairs.items()))
         default, num_pairs, *flat = _ints_from_instruction(instruction)
         pairs = pull_pairs(flat)
         return cls(default, pairs)
 
 
 class TableSwitch:
-    def __init__(self, default, offsets):
+    def __init__(self, default, low, offsets):
+        """`offsets` are the offsets of the values `low`, `low` + 1 and so on"""
         self.default = default
-        self.offsets = sorted(offsets)
-        self.low = self.offsets[0]
-        self.high = self.offsets[len(self.offsets) - 1]
+        self.offsets = list(offsets)
+        self.low = low
+        self.high = low + len(self.offsets) - 1
 
     def find_offset(self, value):
         offsets = self.offsets
@@ -73,6 +91,18 @@ class TableSwitch:
 
         return offset
 
+    def jump_table(self, source):
+        targets = [source + offset for offset in self.offsets]
+        low, high = self.low, self.high
+        default = source + self.default
+
+        def find_target(value):
+            if low <= value <= high:
+                return targets[value - low]
+            return default
+
+        return find_target
+
     def create_instruction(self, position=None):
         return _create_instruction(TABLE_SWITCH, position, [
             self.default,
@@ -85,7 +115,7 @@ class TableSwitch:
     def from_instruction(cls, instruction):
         _validate_instruction_name(instruction, TABLE_SWITCH)
         default, low, high, *offsets = _ints_from_instruction(instruction)
-        return cls(default, offsets)
+        return cls(default, low, offsets)
 
 
 def _int_value(v):
@@ -0,0 +1,540 @@
+"""An engine that keeps primitive values unboxed
+
+The other engines represent every value on the op stack and in the locals as a `JvmValue`, so every constant that is
+pushed and every result of a computation allocates one. This engine is a variant of the direct engine,
+in which frames hold `int` and `float` values as plain Python numbers instead.
+The type of such a value is known from the instruction that uses it, ``iadd`` adds ints, ``fadd`` adds floats.
+
+Some values stay boxed:
+ - References, since the JvmValue of a reference is the identity of the object, and it is not allocated per use.
+ - Longs and doubles. The duplication instructions behave differently for values of computational type 2
+   (see `stack_instructions.DUPLICATION_SPECS`), and that type is read from the value itself.
+   Boxing them keeps ints and longs apart without tracking the types of stack slots.
+
+Objects, statics and arrays of references hold JvmValues just like they do with other engines,
+so values are boxed when they are stored there, with the type of the value they replace, and unboxed when they are
+loaded. Arrays of primitives hold raw numbers anyway, see core/primitive_arrays.py.
+See `box` and `unbox` for code that inspects the frames of an unboxed Machine.
+
+Instructions whose handlers never look at values, such as loads, stores, invocations and returns,
+use the handlers of the direct engine. The handlers in this module replace the others, see `bind_instruction`.
+"""
+from functools import partial
+
+from jawa.util.bytecode import opcode_table
+
+from pyjvm.core.hierarchies import TypeCheckCache
+from pyjvm.core.jvm_types import JvmValue, Integer, Float, CompType, ArrayReferenceType, ObjectReferenceType
+from pyjvm.core.primitive_arrays import PrimitiveArray
+from pyjvm.instructions import direct
+from pyjvm.instructions.comparisons import BRANCH_COMPARISONS, BOOLEAN_COMPARISONS, BINARY_REFERENCE_COMPARISONS
+from pyjvm.instructions.constant_instructions import CONSTANT_VALUES
+from pyjvm.instructions.conversions import CONVERSION_DICT
+from pyjvm.instructions.direct import HandlerContext
+from pyjvm.instructions.instructions import WIDE_OPCODE
+from pyjvm.instructions.loads_and_stores import STORE_INTO_ARRAY_INSTRUCTIONS, LOAD_FROM_ARRAY_INSTRUCTIONS
+from pyjvm.instructions.math import OPERATORS
+from pyjvm.instructions.references import create_levels, default_elements
+from pyjvm.instructions.stack_instructions import DUPLICATION_SPECS
+from pyjvm.instructions.switches import TABLE_SWITCH, LOOKUP_SWITCH, TableSwitch, LookupSwitch
+from pyjvm.utils import value_array_type_indicators
+
+_NULL_POINTER = 'java/lang/NullPointerException'
+_NEGATIVE_ARRAY_SIZE = 'java/lang/NegativeArraySizeException'
+
+# The types whose values are unboxed
+UNBOXED_TYPES = (Integer, Float)
+# The prefixes of the array load instructions whose elements are unboxed
+_RAW_ARRAY_PREFIXES = 'ibcsf'
+
+# Handler factories that replace the ones of the direct engine, by numeric opcode
+_factories = dict()
+
+
+def unbox(value):
+    """Return the representation of the JvmValue `value` on the op stack and in the locals of an unboxed frame"""
+    if value.type in UNBOXED_TYPES:
+        return value.value
+    return value
+
+
+def box(value):
+    """Return a JvmValue for `value`, a value from an unboxed frame, the opposite of `unbox`"""
+    if isinstance(value, JvmValue):
+        return value
+    if isinstance(value, float):
+        return Float.create_instance(value)
+    return Integer.create_instance(value)
+
+
+def _box_like(old_value, value):
+    """Box `value` as a replacement for the JvmValue `old_value`, so it keeps the declared type of a field"""
+    if isinstance(value, JvmValue):
+        return value
+    return old_value.type.create_instance(value)
+
+
+def _box_as(type_, value):
+    """Box `value` as a value of the declared type of a field"""
+    if isinstance(value, JvmValue):
+        return value
+    return type_.create_instance(value)
+
+
+def _raw(value):
+    """Return the Python value of a value from an unboxed frame"""
+    if isinstance(value, JvmValue):
+        return value.value
+    return value
+
+
+def _is_category_two(value):
+    return isinstance(value, JvmValue) and CompType(value).is_two
+
+
+def _result_factory(type_):
+    """Return a function that turns a Python value into the unboxed frame representation of a `type_` value"""
+    if type_ in UNBOXED_TYPES:
+        # Mirrors `type_.create_instance(value).value`
+        return float if type_ == Float else _identity
+    return type_.create_instance
+
+
+def _identity(value):
+    return value
+
+
+def handles(names_and_args):
+    """Like `direct.handles`, for the handlers of this engine"""
+
+    def wrapper(factory):
+        for name, args in dict(names_and_args).items():
+            opcode = opcode_table[name]['op']
+            if opcode in _factories:
+                raise ValueError(f'{name} already has an unboxed handler')
+            _factories[opcode] = (factory, tuple(args))
+        return factory
+
+    return wrapper
+
+
+def handles_list(names):
+    """Like `handles`, for factories that do not need extra arguments"""
+    return handles({name: [] for name in names})
+
+
+def bind_instruction(instruction, constants, machine, location=(None, None, None), resolved_constants=None):
+    """Return a handler for `instruction` that works with unboxed frames, see `direct.bind_instruction`"""
+    opcode = instruction.opcode
+    if opcode == WIDE_OPCODE:
+        opcode = opcode_table[instruction.mnemonic]['op']
+    try:
+        factory, args = _factories[opcode]
+    except KeyError:
+        return direct.bind_instruction(instruction, constants, machine, location, resolved_constants)
+    return factory(HandlerContext(instruction, constants, machine, location, resolved_constants), *args)
+
+
+def get_unboxed_instructions():
+    """Return the names of the instructions whose handlers differ from the direct engine's"""
+    return [opcode_table[opcode]['mnemonic'] for opcode in _factories]
+
+
+# Arrays
+
+@handles({name: [name[0] != 'a'] for name in STORE_INTO_ARRAY_INSTRUCTIONS})
+def store_into_array(context, stores_raw_elements):
+    """Primitive arrays store raw numbers, see core/primitive_arrays.py"""
+    machine = context.machine
+
+    def handler(frame):
+        stack = frame.op_stack
+        array = stack.peek(2)
+        if array.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        value = stack.pop()
+        index = stack.pop()
+        stack.pop()
+        elements = array.value
+        if stores_raw_elements:
+            try:
+                elements.store(index, _raw(value))
+            except AttributeError:
+                elements[index] = _box_like(elements[index], value)
+        else:
+            elements[index] = value
+        frame.advance()
+
+    return handler
+
+
+@handles({name: [name[0] in _RAW_ARRAY_PREFIXES] for name in LOAD_FROM_ARRAY_INSTRUCTIONS})
+def load_from_array(context, loads_raw_elements):
+    machine = context.machine
+
+    def handler(frame):
+        stack = frame.op_stack
+        array = stack.peek(1)
+        if array.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        index = stack.pop()
+        stack.pop()
+        elements = array.value
+        if loads_raw_elements:
+            try:
+                value = elements.load(index)
+            except AttributeError:
+                value = unbox(elements[index])
+        else:
+            value = elements[index]
+        stack.push(value)
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['arraylength'])
+def array_length(context):
+    machine = context.machine
+
+    def handler(frame):
+        stack = frame.op_stack
+        array = stack.peek()
+        if array.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        stack.pop()
+        stack.push(len(array.value))
+        frame.advance()
+
+    return handler
+
+
+def _new_array_handler(machine, type_, create_elements):
+    array_type = ArrayReferenceType(type_)
+
+    def handler(frame):
+        stack = frame.op_stack
+        size = stack.peek()
+        if size < 0:
+            machine.create_and_throw(_NEGATIVE_ARRAY_SIZE)
+            return
+        elements = create_elements(size)
+        stack.pop()
+        stack.push(array_type.create_instance(elements))
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['newarray'])
+def new_value_array(context):
+    indicator = context.operand_as_int()
+    type_ = value_array_type_indicators.type_by_indicator(indicator)
+    return _new_array_handler(context.machine, type_, partial(PrimitiveArray.create, indicator))
+
+
+@handles_list(['anewarray'])
+def new_ref_array(context):
+    type_ = ObjectReferenceType(refers_to=context.operand_as_class().name)
+    return _new_array_handler(context.machine, type_, partial(default_elements, type_))
+
+
+@handles_list(['multianewarray'])
+def new_multi_array(context):
+    machine = context.machine
+    base_type = ObjectReferenceType(context.operand_as_class().name)
+    num_dimensions = context.operand_as_int(index=1)
+    array_type = base_type
+    for _ in range(num_dimensions):
+        array_type = ArrayReferenceType(array_type)
+
+    def handler(frame):
+        stack = frame.op_stack
+        dimensions = stack.peek_many(num_dimensions)
+        if any(d < 0 for d in dimensions):
+            machine.create_and_throw(_NEGATIVE_ARRAY_SIZE)
+            return
+        array_value = create_levels(dimensions, lambda: base_type.create_instance(base_type.default_value))
+        for _ in range(num_dimensions):
+            stack.pop()
+        stack.push(array_type.create_instance(array_value))
+        frame.advance()
+
+    return handler
+
+
+# Stack instructions
+
+@handles({name: [specs] for name, specs in DUPLICATION_SPECS.items()})
+def duplicate(context, specs):
+    specs = [([int(n) == 2 for n in comp_type_string], amount, index) for comp_type_string, amount, index in specs]
+
+    def matches(stack, expected_categories):
+        if stack.size() < len(expected_categories):
+            return False
+        return all(
+            _is_category_two(stack.peek(index)) == is_two for index, is_two in enumerate(expected_categories)
+        )
+
+    def handler(frame):
+        stack = frame.op_stack
+        for expected_categories, amount_to_take, index_for_insertion in specs:
+            if matches(stack, expected_categories):
+                copies = [v.duplicate() if isinstance(v, JvmValue) else v for v in stack.peek_many(amount_to_take)]
+                for copy in reversed(copies):
+                    stack.insert_at_offset(index_for_insertion, copy)
+                frame.advance()
+                return
+
+        raise ValueError('No comp type case match')
+
+    return handler
+
+
+# Constants
+
+@handles({name: [unbox(value)] for name, value in CONSTANT_VALUES.items()})
+def push_constant(context, value):
+    def handler(frame):
+        frame.op_stack.push(value)
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['sipush', 'bipush'])
+def push_operand(context):
+    literal = context.operand_as_int()
+
+    def handler(frame):
+        frame.op_stack.push(literal)
+        frame.advance()
+
+    return handler
+
+
+@handles_list([
+    'ldc',
+    'ldc_w',
+    'ldc2_w'
+])
+def load_from_constant_pool(context):
+    value = unbox(context.operand_as_value())
+
+    def handler(frame):
+        frame.op_stack.push(value)
+        frame.advance()
+
+    return handler
+
+
+# Conversions and math
+
+@handles({name: [source, target] for name, (source, target) in CONVERSION_DICT.items()})
+def convert(context, source, target):
+    result = _result_factory(target)
+    if source in UNBOXED_TYPES:
+        def handler(frame):
+            stack = frame.op_stack
+            stack.push(result(stack.pop()))
+            frame.advance()
+    else:
+        def handler(frame):
+            stack = frame.op_stack
+            stack.push(result(stack.pop().value))
+            frame.advance()
+
+    return handler
+
+
+def _math_handlers():
+    dic = {}
+    for op in OPERATORS:
+        dic.update(op.bytecode_args())
+    return dic
+
+
+@handles(_math_handlers())
+def math(context, op, type_, operands):
+    result = _result_factory(type_)
+    if type_ in UNBOXED_TYPES:
+        if operands == 1:
+            def handler(frame):
+                stack = frame.op_stack
+                stack.push(result(op(stack.pop())))
+                frame.advance()
+        else:
+            def handler(frame):
+                stack = frame.op_stack
+                right = stack.pop()
+                left = stack.pop()
+                stack.push(result(op(left, right)))
+                frame.advance()
+    else:
+        # Shifts of longs take an int as their right operand, so operands are unwrapped by their representation
+        if operands == 1:
+            def handler(frame):
+                stack = frame.op_stack
+                stack.push(result(op(stack.pop().value)))
+                frame.advance()
+        else:
+            def handler(frame):
+                stack = frame.op_stack
+                right = stack.pop()
+                left = stack.pop()
+                stack.push(result(op(left.value, _raw(right))))
+                frame.advance()
+
+    return handler
+
+
+@handles_list(['iinc'])
+def increment(context):
+    local_index, amount_to_add = [op.value for op in context.instruction.operands]
+
+    def handler(frame):
+        # Follows the Increment Instructor, see math.py
+        frame.op_stack.push(frame.locals.load(local_index) + amount_to_add)
+        frame.advance()
+
+    return handler
+
+
+# Comparisons
+
+@handles({name: [pops, op, name in BINARY_REFERENCE_COMPARISONS] for name, (pops, op) in BRANCH_COMPARISONS.items()})
+def branch_comparison(context, pops, op, compares_references):
+    pos = context.instruction.pos
+    target = pos + context.operand_as_int()
+    next_target = pos + 1
+
+    if pops == 1:
+        def handler(frame):
+            frame.jump(target if op(frame.op_stack.pop()) else next_target)
+    elif compares_references:
+        def handler(frame):
+            stack = frame.op_stack
+            first = stack.pop()
+            second = stack.pop()
+            frame.jump(target if op(first.value, second.value) else next_target)
+    else:
+        def handler(frame):
+            stack = frame.op_stack
+            first = stack.pop()
+            second = stack.pop()
+            frame.jump(target if op(first, second) else next_target)
+
+    return handler
+
+
+@handles({name: [op] for name, op in BOOLEAN_COMPARISONS.items()})
+def boolean_comparison(context, op):
+    def handler(frame):
+        stack = frame.op_stack
+        first = stack.pop()
+        second = stack.pop()
+        stack.push(1 if op(_raw(first), _raw(second)) else 0)
+        frame.advance()
+
+    return handler
+
+
+@handles({
+    TABLE_SWITCH: [TableSwitch],
+    LOOKUP_SWITCH: [LookupSwitch]
+})
+def switch(context, switch_class):
+    instruction = context.instruction
+    find_target = switch_class.from_instruction(instruction).jump_table(instruction.pos)
+
+    def handler(frame):
+        frame.jump(find_target(frame.op_stack.pop()))
+
+    return handler
+
+
+# References
+
+@handles_list(['instanceof'])
+def instance_of(context):
+    is_instance = TypeCheckCache(context.operand_as_class().descriptor, context.loader).is_instance
+
+    def handler(frame):
+        stack = frame.op_stack
+        obj = stack.pop()
+        stack.push(1 if not obj.is_null and is_instance(obj) else 0)
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['getfield'])
+def get_field(context):
+    machine = context.machine
+    name = context.operand_as_field().name
+
+    def handler(frame):
+        stack = frame.op_stack
+        obj = stack.peek()
+        if obj.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        stack.pop()
+        stack.push(unbox(obj.value.fields[name]))
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['putfield'])
+def put_field(context):
+    machine = context.machine
+    field_ref = context.operand_as_field()
+    name = field_ref.name
+    type_ = field_ref.type_
+
+    def handler(frame):
+        stack = frame.op_stack
+        obj = stack.peek(1)
+        if obj.is_null:
+            machine.create_and_throw(_NULL_POINTER)
+            return
+        value = stack.pop()
+        stack.pop()
+        obj.value.fields[name] = _box_as(type_, value)
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['putstatic'])
+def put_static(context):
+    loader = context.loader
+    field_ref = context.operand_as_field()
+    field_name = field_ref.name
+    class_name = field_ref.class_name
+    type_ = field_ref.type_
+
+    def handler(frame):
+        value = frame.op_stack.pop()
+        loader.get_the_statics(class_name)[field_name] = _box_as(type_, value)
+        frame.advance()
+
+    return handler
+
+
+@handles_list(['getstatic'])
+def get_static(context):
+    loader = context.loader
+    field_ref = context.operand_as_field()
+    field_name = field_ref.name
+    class_name = field_ref.class_name
+
+    def handler(frame):
+        frame.op_stack.push(unbox(loader.get_the_statics(class_name)[field_name]))
+        frame.advance()
+
+    return handler
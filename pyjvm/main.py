@@ -8,7 +8,17 @@ This module uses the click library (http://click.pocoo.org) to provide the follo
  - ``pyjvm dump_class_from_jar``: Similar to dump_class but provides the ability to inspect classes inside JAR files
  - ``pyjvm run``: Runs a JVM class.
    Provides classpath functionality via an argument.
-   Provides basic tracing ability via a flag.
+   Provides basic tracing ability via a flag, and structured, filtered tracing into a binary file via options.
+   Provides a choice of execution engine via an option.
+   Provides options that record an instruction pair profile, and fuse the profile's most common pairs
+   into superinstructions.
+   Provides an option that compiles methods which are invoked often enough.
+   Provides a flag that reports the hits and misses of every call site's inline cache.
+   Provides a flag that turns optional intrinsics off, and a flag that reports how often each intrinsic was invoked.
+   Provides an option that keeps converted classes in an on-disk cache between runs.
+   Provides a flag that parses and converts the classes that the main class can reach in parallel, before running.
+ - ``pyjvm trace-dump``: Summarizes a binary trace that was written by ``pyjvm run --trace``, and optionally
+   displays its events.
 """
 from pathlib import Path
 
@@ -17,10 +27,11 @@ from jawa.cf import ClassFile
 from jawa.classloader import ClassLoader
 from jawa.util.bytecode import opcode_table
 
-from pyjvm.core import machine
+from pyjvm.core import machine, tracing, intrinsics as intrinsics_module
 from pyjvm.core.actions import Action
 from pyjvm.core.class_loaders import TraditionalLoader
 from pyjvm.instructions.instructions import get_implemented_instructions
+from pyjvm.instructions.superinstructions import PairProfile
 from pyjvm.utils import utils
 
 
@@ -100,23 +111,118 @@ def dump_class_from_jar(path, name):
 @click.argument('main_class')
 @click.option('-cp', default='')
 @click.option('--report', is_flag=True)
-def run(main_class, cp, report):
+@click.option('--engine', type=click.Choice(machine.ENGINES), default=machine.ACTIONS_ENGINE)
+@click.option('--record-pairs', type=click.Path(dir_okay=False), default=None)
+@click.option('--fuse-from', type=click.Path(exists=True, dir_okay=False), default=None)
+@click.option('--compile-threshold', type=click.IntRange(min=1), default=None)
+@click.option('--call-sites', is_flag=True)
+@click.option('--intrinsics/--no-intrinsics', default=True)
+@click.option('--intrinsic-counts', is_flag=True)
+@click.option('--trace', type=click.Path(dir_okay=False), default=None)
+@click.option('--trace-method', multiple=True)
+@click.option('--trace-opcode', multiple=True)
+@click.option('--trace-depth', type=click.IntRange(min=1), default=None)
+@click.option('--class-cache', type=click.Path(file_okay=False), default=None)
+@click.option('--preload', is_flag=True)
+@click.option('--preload-workers', type=click.IntRange(min=1), default=None)
+def run(main_class, cp, report, engine, record_pairs, fuse_from, compile_threshold, call_sites, intrinsics,
+        intrinsic_counts, trace, trace_method, trace_opcode, trace_depth, class_cache, preload, preload_workers):
     """A command that executes a `main` method in a JVM class
 
     :param main_class: The name of the class
     :param cp: Colon separated class anf jar files
     :param report: A bool representing whether or not to dump execution info to stdout
+    :param engine: The way instructions are executed, see `machine.ENGINES`
+    :param record_pairs: A path to write an instruction pair profile to, see `PairProfile`.
+    Instructions are not fused while recording, unless `fuse_from` is given
+    :param fuse_from: A path to a pair profile, whose most common pairs will be fused into superinstructions.
+    Requires the direct or unboxed engine
+    :param compile_threshold: The amount of invocations after which a method is compiled. Requires the direct engine
+    :param call_sites: A bool representing whether or not to report the inline caches of call sites after running.
+    Call sites are used by the direct and unboxed engines
+    :param intrinsics: A bool representing whether or not to use optional intrinsics, see core/intrinsics.py
+    :param intrinsic_counts: A bool representing whether or not to report how often each intrinsic was invoked
+    :param trace: A path to write a binary trace to, see core/tracing.py
+    :param trace_method: Globs of ``class#name(descriptor)`` strings, limits tracing to the methods that match them
+    :param trace_opcode: Names of instructions, limits tracing to those instructions
+    :param trace_depth: The maximal call depth to trace
+    :param class_cache: A directory to keep converted classes in between runs, see core/class_cache.py
+    :param preload: A bool representing whether or not to preload the classes that are reachable from the main class,
+    see `TraditionalLoader.preload`
+    :param preload_workers: The amount of processes that preload classes. Defaults to the amount of processors
     """
-    loader = TraditionalLoader(cp)
+    if report and trace is not None:
+        raise click.UsageError('--report and --trace cannot be used together')
+    trace_filter = tracing.TraceFilter(
+        methods=trace_method or ('*',),
+        opcodes=trace_opcode or None,
+        max_depth=trace_depth
+    )
+    tracer = None
     if report:
-        echo = print
-    else:
-        echo = None
-    machine.run(loader, main_class, echo=echo)
+        tracer = tracing.EchoTracer(print, trace_filter)
+    elif trace is not None:
+        tracer = tracing.BinaryTracer.open(trace, trace_filter)
+
+    loader = TraditionalLoader(cp, cache_directory=class_cache)
+    if preload:
+        loader.preload([main_class], transitive=True, workers=preload_workers)
+
+    superinstructions = None
+    if fuse_from is not None:
+        superinstructions = PairProfile.load(fuse_from).patterns()
+    pair_profile = None
+    if record_pairs is not None:
+        pair_profile = PairProfile()
+
+    try:
+        the_machine = machine.run(
+            loader,
+            main_class,
+            engine=engine,
+            superinstructions=superinstructions,
+            pair_profile=pair_profile,
+            compile_threshold=compile_threshold,
+            tracer=tracer,
+            intrinsics=intrinsics
+        )
+    finally:
+        if tracer is not None:
+            tracer.close()
+
+    if pair_profile is not None:
+        pair_profile.save(record_pairs)
+    if call_sites:
+        for line in the_machine.call_sites.report():
+            click.echo(line)
+    if intrinsic_counts:
+        for line in intrinsics_module.report(the_machine.intrinsic_counts):
+            click.echo(line)
+
+
+@click.command()
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--events', is_flag=True)
+@click.option('--limit', type=click.IntRange(min=1), default=10)
+def trace_dump(path, events, limit):
+    """A command that summarizes a binary trace, see core/tracing.py
+
+    :param path: A trace that was written by ``pyjvm run --trace``
+    :param events: A bool representing whether or not to display every event before the summary
+    :param limit: The amount of most common methods, instructions and actions to display
+    """
+    with open(path, 'rb') as f:
+        all_events = list(tracing.read_trace(f))
+    if events:
+        for event in all_events:
+            click.echo(str(event))
+    for line in tracing.summarize(all_events, limit):
+        click.echo(line)
 
 
 # Add the sub commands to the main command, as per the `click` documentation
 cli.add_command(run)
+cli.add_command(trace_dump)
 cli.add_command(action_report)
 cli.add_command(instruction_report)
 cli.add_command(dump_class)
@@ -0,0 +1,68 @@
+"""Functions for the bit level representation of JVM numbers
+
+Python ints are unbounded, so these functions reduce them to the two's complement ints of the JVM.
+"""
+import math
+import struct
+
+INT_MASK = 0xFFFFFFFF
+LONG_MASK = 0xFFFFFFFFFFFFFFFF
+
+_FLOAT = struct.Struct('<f')
+_DOUBLE = struct.Struct('<d')
+_INT = struct.Struct('<i')
+_LONG = struct.Struct('<q')
+
+
+def to_int(value):
+    """Return the signed 32 bit int whose bits are the lowest 32 bits of `value`"""
+    value &= INT_MASK
+    return value - (1 << 32) if value >> 31 else value
+
+
+def to_long(value):
+    """Return the signed 64 bit long whose bits are the lowest 64 bits of `value`"""
+    value &= LONG_MASK
+    return value - (1 << 64) if value >> 63 else value
+
+
+def float_to_raw_int_bits(value):
+    """``Float.floatToRawIntBits``"""
+    return _INT.unpack(_FLOAT.pack(value))[0]
+
+
+def float_to_int_bits(value):
+    """``Float.floatToIntBits``, which maps all NaNs to a single value"""
+    if math.isnan(value):
+        return 0x7fc00000
+    return float_to_raw_int_bits(value)
+
+
+def int_bits_to_float(value):
+    """``Float.intBitsToFloat``"""
+    return _FLOAT.unpack(_INT.pack(to_int(value)))[0]
+
+
+def double_to_raw_long_bits(value):
+    """``Double.doubleToRawLongBits``"""
+    return _LONG.unpack(_DOUBLE.pack(value))[0]
+
+
+def double_to_long_bits(value):
+    """``Double.doubleToLongBits``, which maps all NaNs to a single value"""
+    if math.isnan(value):
+        return 0x7ff8000000000000
+    return double_to_raw_long_bits(value)
+
+
+def long_bits_to_double(value):
+    """``Double.longBitsToDouble``"""
+    return _DOUBLE.unpack(_LONG.pack(to_long(value)))[0]
+
+
+def round_to_float(value):
+    """Return the Python float that is closest to the 32 bit float that `value` rounds to"""
+    try:
+        return _FLOAT.unpack(_FLOAT.pack(value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
@@ -50,14 +50,24 @@ class ClassRegistry:
         The instance will be initialized with `*args` followed by the arguments from registry time.
         The keywords to the constructor will be `kwargs` updated with the keyword arguments from registry time.
         """
+        return self.factory(name)(*args, **kwargs)
+
+    def factory(self, name):
+        """Return a function that creates instances of the class registered under the key `name`
+
+        Calling the function is equivalent to calling `get` with `name`, but the lookup only happens once.
+        This is useful for callers that create many instances for the same key.
+        """
         try:
             init = self._mapping[name]
         except KeyError as e:
             raise KeyError(f'{name} does not exist in the class registry') from e
-        else:
-            args = args + init.args
+
+        def create(*args, **kwargs):
             kwargs.update(init.kwargs)
-            return init.the_class(*args, **kwargs)
+            return init.the_class(*(args + init.args), **kwargs)
+
+        return create
 
     def decorator(self, name, *args, **kwargs):
         """Return a function that takes a class an registers it under `name` with the provided arguments"""
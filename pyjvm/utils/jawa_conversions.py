@@ -7,18 +7,27 @@ However, there was no need to pedantically recreate all that jawa did. Some of t
  - The Instruction class
  - The ConstantPool class and its supportive structures
 """
+import functools
+import sys
+from array import array
 from typing import Iterable
 
+import attr
 import jawa.methods
 import jawa.util.descriptor
 from jawa import constants as jawa_constants
 from jawa.cf import ClassFile
 from jawa.methods import Method
 
-from pyjvm.core.jvm_class import JvmClass, BytecodeMethod, MethodKey, Handlers, ExceptionHandler
+from pyjvm.core.jvm_class import JvmClass, BytecodeMethod, MethodKey, Handlers, ExceptionHandler, MethodCode
 from pyjvm.core.jvm_types import Type, Integer, Float, Long, Double, ArrayReferenceType, ObjectReferenceType, \
     RootObjectType, JvmObject
+from pyjvm.core.primitive_arrays import PrimitiveArray
 from pyjvm.utils.utils import split_by_predicate
+from pyjvm.utils.value_array_type_indicators import typecode_by_indicator
+
+# The ``newarray`` indicator of char arrays
+_CHAR_INDICATOR = 5
 
 _LETTERS_MAP = {
     'D': Double,
@@ -61,24 +70,63 @@ def key_from_method_ref(ref):
     return MethodKey(name, descriptor)
 
 
+@functools.lru_cache(maxsize=None)
+def argument_count(method_key):
+    """Return the amount of arguments that the method with `method_key` takes, not counting `this`"""
+    return len(jawa.util.descriptor.method_descriptor(method_key.descriptor).args)
+
+
 def convert_method(method: jawa.methods.Method, constants) -> BytecodeMethod:
-    """Convert a jawa method to a BytecodeMethod"""
-    name = method.name.value
+    """Convert a jawa method to a BytecodeMethod
+
+    The method is deferred, its code is disassembled and converted when it is first used, see `BytecodeMethod.deferred`
+    """
+    flags = method.access_flags
+    is_native = flags.get('acc_native')
     descriptor = method.descriptor.value
-    arg_types = [convert_type(t) for t in method.args]
-    is_native = method.access_flags.get('acc_native')
+
+    return BytecodeMethod.deferred(
+        name=method.name.value,
+        descriptor=descriptor,
+        args=_argument_types(descriptor),
+        is_native=is_native,
+        # Only abstract and native methods have no code, see section 4.7.3 of the JVM 8 specification
+        has_code=not (is_native or flags.get('acc_abstract')),
+        load_code=CodeLoader(method, constants)
+    )
+
+
+@attr.s(frozen=True)
+class CodeLoader:
+    """The `load_code` function of a converted method, see `convert_method`
+
+    method: jawa.methods.Method, the method whose code is loaded
+    constants: The jawa ConstantPool of the method's class
+    """
+    method = attr.ib()
+    constants = attr.ib()
+
+    def __call__(self):
+        return convert_code(self.method, self.constants)
+
+    def bytecode(self):
+        """Return the code without disassembling it, as bytecode, max_locals, max_stack and exception handlers"""
+        code = self.method.code
+        if code is None:
+            return b'', 0, 0, Handlers()
+        # jawa keeps the bytecode of a CodeAttribute in `_code`, it has no public attribute for it
+        return code._code, code.max_locals, code.max_stack, _create_exception_handlers(code, self.constants)
+
+
+def convert_code(method: jawa.methods.Method, constants) -> MethodCode:
+    """Disassemble and convert the code of a jawa method"""
     code = method.code
     handlers = _create_exception_handlers(code, constants)
     instructions, max_locals, max_stack = _instructions_locals_stack(code)
-
-    return BytecodeMethod(
-        name=name,
-        descriptor=descriptor,
+    return MethodCode(
         instructions=instructions,
-        args=arg_types,
         max_locals=max_locals,
         max_stack=max_stack,
-        is_native=is_native,
         exception_handlers=handlers
     )
 
@@ -120,6 +168,11 @@ def _atom_type(base, name):
         return _LETTERS_MAP[base.upper()]
 
 
+@functools.lru_cache(maxsize=None)
+def _argument_types(descriptor):
+    return tuple(convert_type(t) for t in jawa.util.descriptor.method_descriptor(descriptor).args)
+
+
 def _field_to_pair(field):
     return field.name.value, convert_type(field.type)
 
@@ -179,8 +232,33 @@ def _instructions_locals_stack(code):
 
 
 def _convert_const_to_string_instance(const):
-    text = const.string.value
-    chars = [ord(c) for c in text]
+    return string_instance(const.string.value)
+
+
+def _utf16_units(text):
+    """Return the UTF-16 code units of `text`, the chars of a Java String, in a char[] buffer"""
+    units = array(typecode_by_indicator(_CHAR_INDICATOR))
+    units.frombytes(text.encode('utf-16-le', 'surrogatepass'))
+    if sys.byteorder == 'big':
+        units.byteswap()
+    return units
+
+
+def _utf16_text(units):
+    """Return the Python str of a char[] buffer, the reverse of `_utf16_units`"""
+    units = array(typecode_by_indicator(_CHAR_INDICATOR), units)
+    if sys.byteorder == 'big':
+        units.byteswap()
+    return units.tobytes().decode('utf-16-le', 'surrogatepass')
+
+
+def string_instance(text):
+    """Return a java/lang/String instance whose value is the Python str `text`
+
+    The chars are held by a PrimitiveArray, like the ones that ``newarray`` creates, so they can be copied to and
+    from other char arrays.
+    """
+    chars = PrimitiveArray(Integer, typecode_by_indicator(_CHAR_INDICATOR), _utf16_units(text))
     char_array = ArrayReferenceType(Integer).create_instance(chars)
     hash_value = hash(text) % (2 ** 32)
     hash_ = Integer.create_instance(hash_value)
@@ -189,3 +267,19 @@ def _convert_const_to_string_instance(const):
         'hash': hash_,
         'value': char_array
     }))
+
+
+def string_text(string_object):
+    """Return the Python str of the java/lang/String JvmObject `string_object`, the reverse of `string_instance`
+
+    Honors the 'offset' and 'count' fields, for String classes that share their char arrays.
+    """
+    fields = string_object.fields
+    chars = fields['value'].value
+    if isinstance(chars, PrimitiveArray):
+        codes = chars.buffer
+    else:
+        codes = [getattr(c, 'value', c) for c in chars]
+    offset = fields['offset'].value if 'offset' in fields else 0
+    count = fields['count'].value if 'count' in fields else len(codes) - offset
+    return _utf16_text(codes[offset:offset + count])
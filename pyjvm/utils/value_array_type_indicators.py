@@ -29,3 +29,22 @@ def indicator_by_type(type_):
 def type_by_indicator(indicator):
     """Return the type that corresponds to `indicator`"""
     return _BY_INDICATOR[indicator]
+
+
+# The `array` module typecodes that store the elements of each kind of primitive array with its JVM width.
+# Booleans are stored as bytes, like the JVM does, and chars are unsigned.
+_TYPECODES = {
+    4: 'b',
+    5: 'H',
+    6: 'f',
+    7: 'd',
+    8: 'b',
+    9: 'h',
+    10: 'i',
+    11: 'q'
+}
+
+
+def typecode_by_indicator(indicator):
+    """Return the `array` typecode of the elements of arrays that `indicator` describes"""
+    return _TYPECODES[indicator]
@@ -13,11 +13,12 @@ While this may seem a bit intimidating at first,
 it is completely declarative, and will (hopefully) become obvious once one gets to know
 the types in the system.
 """
+import attr
 import pytest
 from jawa.constants import ConstantPool
 from jawa.util.bytecode import Instruction
 
-from pyjvm.core.actions import Push, Pop, PushNewInstance, DuplicateTop, StoreInLocals, \
+from pyjvm.core.actions import Action, Push, Pop, PushNewInstance, DuplicateTop, StoreInLocals, \
     StoreIntoArray, PutField, PutStatic, GoTo, Invoke, ReturnVoid, ReturnResult, ThrowObject, CreateAndThrow, \
     IncrementProgramCounter
 from pyjvm.core.class_loaders import FixedClassLoader
@@ -70,6 +71,24 @@ COMPLEX_CLASS = JvmClass(
 )
 
 
+@attr.s(frozen=True)
+class PushTwice(Action):
+    """An action that is defined outside of the core, to test executor registration"""
+    value = attr.ib()
+
+
+def _push_twice(machine, action):
+    for _ in range(2):
+        machine.frames.peek().op_stack.push(action.value)
+
+
+@pytest.fixture
+def push_twice_executor(monkeypatch):
+    """Register `_push_twice` as the executor of PushTwice for the duration of a test"""
+    monkeypatch.setattr(Machine, '_external_executors', dict(Machine._external_executors))
+    Machine.register_executor(PushTwice)(_push_twice)
+
+
 def complex_machine():
     machine = Machine(FixedClassLoader({
         COMPLEX_CLASS_NAME: COMPLEX_CLASS,
@@ -277,3 +296,21 @@ def test_native_method(std_loader):
     )
     with pytest.raises(NativeNotSupported):
         machine.act(action)
+
+
+def test_registered_executor(push_twice_executor):
+    machine = complex_machine()
+    machine.act(PushTwice(SOME_INT))
+    assert machine.frames.peek().op_stack.size() == 2
+
+
+def test_action_without_executor():
+    machine = complex_machine()
+
+    class Unknown(Action):
+        pass
+
+    with pytest.raises(TypeError):
+        machine.act(Unknown())
+    with pytest.raises(TypeError):
+        complex_machine().act(Unknown())
@@ -2,6 +2,7 @@ from jawa.constants import ConstantPool
 
 from pyjvm.core.actions import Push
 from pyjvm.core.jvm_types import Integer, Double, ObjectReferenceType, ArrayReferenceType, JvmObject
+from pyjvm.core.primitive_arrays import PrimitiveArray
 from pyjvm.instructions import constant_instructions
 from test.utils import assert_incrementing_instruction, constant_instruction, literal_instruction
 
@@ -53,7 +54,9 @@ def test_string_constant():
     consts = ConstantPool()
     const = consts.create_string(text)
 
-    chars = [ord(c) for c in text]
+    chars = PrimitiveArray.create(5, len(text))
+    for index, c in enumerate(text):
+        chars.store(index, ord(c))
     char_array = ArrayReferenceType(Integer).create_instance(chars)
     hash_value = hash(text) % (2 ** 32)
     hash_ = Integer.create_instance(hash_value)
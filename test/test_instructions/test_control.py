@@ -1,7 +1,9 @@
+from jawa.util.bytecode import Instruction, Operand, OperandTypes
+
 from pyjvm.core.actions import ReturnResult, ReturnVoid, GoTo, Pop
 from pyjvm.core.jvm_types import Integer
 from pyjvm.instructions.control import RETURN_RESULT_INSTRUCTIONS
-from pyjvm.instructions.switches import LookupSwitch, TableSwitch
+from pyjvm.instructions.switches import LookupSwitch, TableSwitch, LOOKUP_SWITCH
 from pyjvm.utils.utils import named_tuple_replace
 from test.utils import assert_instruction, literal_instruction
 
@@ -76,7 +78,7 @@ def test_lookup_switch():
 
 def test_table_switch():
     source = 1
-    switch = TableSwitch(10, [2, 3, 4])
+    switch = TableSwitch(10, 2, [2, 3, 4])
     instruction = switch.create_instruction(source)
     irrelevant_value = switch.high * 2
 
@@ -98,3 +100,22 @@ def test_table_switch():
             GoTo(source + switch.default)
         ]
     )
+
+
+def test_jump_tables():
+    source = 100
+    table = TableSwitch.from_instruction(TableSwitch(10, -1, [30, 20, 40]).create_instruction(source))
+    find_target = table.jump_table(source)
+    assert [find_target(value) for value in range(-2, 3)] == [110, 130, 120, 140, 110]
+
+    lookup = LookupSwitch(10, [(-5, 3), (1000, 6)])
+    find_target = lookup.jump_table(source)
+    assert [find_target(value) for value in [-5, 0, 1000]] == [103, 110, 106]
+
+
+def test_disassembled_lookup_switch():
+    # jawa disassembles the pairs of a lookupswitch into a dictionary, followed by the default offset
+    instruction = Instruction.create(LOOKUP_SWITCH, [{5: 30, 1: 20}, Operand(OperandTypes.BRANCH, 10)])
+    switch = LookupSwitch.from_instruction(instruction)
+    assert switch.default == 10
+    assert list(switch.pairs.items()) == [(1, 20), (5, 30)]
@@ -0,0 +1,247 @@
+import pytest
+from jawa.constants import ConstantPool
+from jawa.util.bytecode import Instruction, Operand, OperandTypes
+
+from pyjvm.core.class_loaders import FixedClassLoader
+from pyjvm.core.jvm_class import JvmClass, BytecodeMethod, MethodKey
+from pyjvm.core.jvm_types import Integer, Long, Float, Double, NULL_VALUE, RootObjectType, ArrayReferenceType, \
+    ObjectReferenceType, JvmObject
+from pyjvm.instructions.direct import get_handled_instructions
+from pyjvm.instructions.instructions import get_implemented_instructions
+from pyjvm.utils.utils import literal_operand, constant_operand, named_tuple_replace
+from test.utils import assert_engines_agree, NPE_CLASS_NAME, CHECK_CAST_CLASS_NAME, \
+    constant_instruction, literal_instruction
+
+TARGET_CLASS_NAME = 'Target'
+FIELD_NAME = 'field'
+STATIC_FIELD_NAME = 'static_field'
+STATIC_METHOD_KEY = MethodKey('twice', '(I)V')
+NEGATIVE_ARRAY_SIZE_CLASS_NAME = 'java/lang/NegativeArraySizeException'
+
+
+def _target_class():
+    nop = Instruction.create('nop')
+    method = BytecodeMethod(
+        name=STATIC_METHOD_KEY.name,
+        descriptor=STATIC_METHOD_KEY.descriptor,
+        instructions=[nop],
+        max_locals=2,
+        max_stack=2,
+        args=[Integer]
+    )
+    return JvmClass(
+        TARGET_CLASS_NAME,
+        RootObjectType.refers_to,
+        ConstantPool(),
+        fields={FIELD_NAME: Integer},
+        static_fields={STATIC_FIELD_NAME: Integer},
+        methods={STATIC_METHOD_KEY: method}
+    )
+
+
+def _loader():
+    def exception_class(name):
+        return JvmClass(name, RootObjectType.refers_to, ConstantPool())
+
+    return FixedClassLoader({
+        RootObjectType.refers_to: JvmClass(RootObjectType.refers_to, None, ConstantPool()),
+        TARGET_CLASS_NAME: _target_class(),
+        NPE_CLASS_NAME: exception_class(NPE_CLASS_NAME),
+        CHECK_CAST_CLASS_NAME: exception_class(CHECK_CAST_CLASS_NAME),
+        NEGATIVE_ARRAY_SIZE_CLASS_NAME: exception_class(NEGATIVE_ARRAY_SIZE_CLASS_NAME),
+    })
+
+
+def _ints(*values):
+    return [Integer.create_instance(v) for v in values]
+
+
+def _target_instance():
+    return ObjectReferenceType(TARGET_CLASS_NAME).create_instance(JvmObject({FIELD_NAME: Integer.create_instance(3)}))
+
+
+def _int_array():
+    return ArrayReferenceType(Integer).create_instance(_ints(1, 2, 3))
+
+
+def _agree(instruction, **kwargs):
+    kwargs.setdefault('loader_factory', _loader)
+    assert_engines_agree(instruction, **kwargs)
+
+
+def test_all_instructions_are_handled():
+    assert set(get_handled_instructions()) == set(get_implemented_instructions())
+
+
+@pytest.mark.parametrize('name, op_stack', [
+    ('iadd', _ints(3, 4)),
+    ('isub', _ints(3, 4)),
+    ('imul', _ints(3, 4)),
+    ('idiv', _ints(3, 12)),
+    ('irem', _ints(5, 12)),
+    ('ineg', _ints(5)),
+    ('ishl', _ints(2, 5)),
+    ('ixor', _ints(6, 5)),
+    ('ladd', [Long.create_instance(3), Long.create_instance(4)]),
+    ('dmul', [Double.create_instance(1.5), Double.create_instance(4.0)]),
+    ('fneg', [Float.create_instance(1.5)]),
+    ('lcmp', [Long.create_instance(3), Long.create_instance(4)]),
+    ('dcmpg', [Double.create_instance(3.0), Double.create_instance(4.0)]),
+    ('i2l', _ints(7)),
+    ('i2b', _ints(300)),
+    ('d2i', [Double.create_instance(7.5)]),
+])
+def test_math_and_conversions(name, op_stack):
+    _agree(name, op_stack=op_stack)
+
+
+def test_iinc():
+    instruction = Instruction.create('iinc', [literal_operand(1), literal_operand(5)])
+    _agree(instruction, locals_values={1: Integer.create_instance(4)})
+
+
+@pytest.mark.parametrize('name, locals_values, op_stack', [
+    ('iload_1', {1: Integer.create_instance(4)}, []),
+    ('lload_0', {0: Long.create_instance(4)}, []),
+    ('aload_2', {2: NULL_VALUE}, []),
+    ('istore_3', {}, _ints(6)),
+    ('dstore_1', {}, [Double.create_instance(6.0)]),
+])
+def test_locals(name, locals_values, op_stack):
+    _agree(name, locals_values=locals_values, op_stack=op_stack)
+
+
+@pytest.mark.parametrize('name, op_stack', [
+    ('iaload', lambda: _ints(1) + [_int_array()]),
+    ('iastore', lambda: _ints(7, 1) + [_int_array()]),
+    ('iaload', lambda: _ints(1) + [NULL_VALUE]),
+    ('iastore', lambda: _ints(7, 1) + [NULL_VALUE]),
+    ('arraylength', lambda: [_int_array()]),
+])
+def test_arrays(name, op_stack):
+    _agree(name, op_stack=op_stack)
+
+
+@pytest.mark.parametrize('name, op_stack', [
+    ('dup', _ints(1, 2)),
+    ('dup_x1', _ints(1, 2, 3)),
+    ('dup_x2', _ints(1, 2, 3)),
+    ('dup2', _ints(1, 2)),
+    ('dup2', [Long.create_instance(1)]),
+    ('dup2_x1', _ints(1, 2, 3)),
+    ('dup2_x2', [Double.create_instance(1), Long.create_instance(2)]),
+    ('pop', _ints(1, 2)),
+    ('pop2', _ints(1, 2)),
+    ('swap', _ints(1, 2)),
+])
+def test_stack_instructions(name, op_stack):
+    _agree(name, op_stack=op_stack)
+
+
+@pytest.mark.parametrize('instruction', [
+    'iconst_m1',
+    'lconst_1',
+    'dconst_0',
+    'aconst_null',
+    literal_instruction('bipush', 12),
+    literal_instruction('sipush', 300),
+])
+def test_constants(instruction):
+    _agree(instruction)
+
+
+def test_ldc():
+    constants = ConstantPool()
+    for constant in [constants.create_double(2.5), constants.create_string('hello')]:
+        _agree(constant_instruction('ldc2_w', constant), constants=constants)
+
+
+@pytest.mark.parametrize('name, op_stack', [
+    ('if_icmpge', _ints(1, 2)),
+    ('if_icmpge', _ints(2, 1)),
+    ('ifeq', _ints(0)),
+    ('ifne', _ints(0)),
+    ('ifnull', [NULL_VALUE]),
+    ('ifnonnull', [NULL_VALUE]),
+    ('if_acmpeq', [NULL_VALUE, NULL_VALUE]),
+])
+def test_branches(name, op_stack):
+    instruction = named_tuple_replace(literal_instruction(name, 20), pos=10)
+    _agree(instruction, op_stack=op_stack)
+
+
+@pytest.mark.parametrize('name, op_stack', [
+    ('ireturn', _ints(1)),
+    ('return', []),
+    ('athrow', [NULL_VALUE]),
+])
+def test_returns_and_throws(name, op_stack):
+    _agree(name, op_stack=op_stack)
+
+
+def test_go_to():
+    _agree(named_tuple_replace(literal_instruction('goto', -4), pos=8))
+
+
+def test_table_switch():
+    instruction = Instruction.create('tableswitch', [
+        Operand(OperandTypes.BRANCH, 40),
+        Operand(OperandTypes.LITERAL, 0),
+        Operand(OperandTypes.LITERAL, 1),
+        Operand(OperandTypes.BRANCH, 20),
+        Operand(OperandTypes.BRANCH, 30),
+    ])
+    for value in range(-1, 3):
+        _agree(instruction, op_stack=_ints(value))
+
+
+def test_invoke_static():
+    constants = ConstantPool()
+    method_ref = constants.create_method_ref(TARGET_CLASS_NAME, STATIC_METHOD_KEY.name, STATIC_METHOD_KEY.descriptor)
+    _agree(constant_instruction('invokestatic', method_ref), constants=constants, op_stack=_ints(5))
+
+
+@pytest.mark.parametrize('name, value', [
+    ('instanceof', NULL_VALUE),
+    ('instanceof', _target_instance()),
+    ('checkcast', NULL_VALUE),
+    ('checkcast', _target_instance()),
+])
+def test_type_checks(name, value):
+    constants = ConstantPool()
+    class_constant = constants.create_class(TARGET_CLASS_NAME)
+    _agree(constant_instruction(name, class_constant), constants=constants, op_stack=[value])
+
+
+def test_new():
+    constants = ConstantPool()
+    _agree(constant_instruction('new', constants.create_class(TARGET_CLASS_NAME)), constants=constants)
+
+
+@pytest.mark.parametrize('name, op_stack', [
+    ('getfield', lambda: [_target_instance()]),
+    ('getfield', lambda: [NULL_VALUE]),
+    ('putfield', lambda: _ints(9) + [_target_instance()]),
+    ('getstatic', lambda: []),
+    ('putstatic', lambda: _ints(9)),
+])
+def test_fields(name, op_stack):
+    constants = ConstantPool()
+    field_name = STATIC_FIELD_NAME if name.endswith('static') else FIELD_NAME
+    field_ref = constants.create_field_ref(TARGET_CLASS_NAME, field_name, 'I')
+    _agree(constant_instruction(name, field_ref), constants=constants, op_stack=op_stack)
+
+
+@pytest.mark.parametrize('size', [2, -1])
+def test_new_arrays(size):
+    constants = ConstantPool()
+    class_constant = constants.create_class(TARGET_CLASS_NAME)
+    _agree(literal_instruction('newarray', 10), op_stack=_ints(size))
+    _agree(constant_instruction('anewarray', class_constant), constants=constants, op_stack=_ints(size))
+
+
+def test_multi_new_array():
+    constants = ConstantPool()
+    class_constant = constants.create_class(TARGET_CLASS_NAME)
+    instruction = Instruction.create('multianewarray', [constant_operand(class_constant), literal_operand(2)])
+    _agree(instruction, constants=constants, op_stack=_ints(2, 3))
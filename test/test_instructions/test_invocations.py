@@ -52,6 +52,6 @@ def test_invoke_v():
         op_stack=reversed_arguments,
         expected=[
             Pop(3),
-            Invoke(class_name, key, arguments)
+            Invoke(class_name, key, arguments, virtual=True)
         ]
     )
@@ -0,0 +1,200 @@
+import math
+
+import pytest
+from jawa.cf import ClassFile
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core import array_intrinsics
+from pyjvm.core.array_intrinsics import ARRAYS, SYSTEM, VM_SYSTEM, CLONE_KEY
+from pyjvm.core.intrinsics import IntrinsicThrow, IntrinsicRegistry, REGISTRY
+from pyjvm.core.jvm_class import MethodKey
+from pyjvm.core.frame import Frame
+from pyjvm.core.jvm_types import Integer, Float, ArrayReferenceType, ObjectReferenceType, NULL_VALUE
+from pyjvm.core.machine import Machine, ENGINES, DIRECT_ENGINE
+from pyjvm.core.primitive_arrays import PrimitiveArray
+from pyjvm.utils.jawa_conversions import string_instance, string_text
+from test.utils import create_program, program_loader, program_result, result_field_ref, literal_instruction, \
+    constant_instruction, PROGRAM_CLASS_NAME, RUN_METHOD_KEY
+
+INT, LONG, FLOAT, DOUBLE, BOOLEAN, CHAR = 10, 11, 6, 7, 4, 5
+STRING = ObjectReferenceType('java/lang/String')
+
+
+def _primitive(indicator, values):
+    elements = PrimitiveArray.create(indicator, len(values))
+    for index, value in enumerate(values):
+        elements.store(index, value)
+    return ArrayReferenceType(elements.element_type).create_instance(elements)
+
+
+def _ints(*values):
+    return [Integer.create_instance(v) for v in values]
+
+
+def _raw(array_value):
+    return list(array_value.value.buffer)
+
+
+def test_array_copy():
+    source = _primitive(INT, [1, 2, 3, 4])
+    destination = _primitive(INT, [0] * 4)
+    array_intrinsics.array_copy(None, [source, *_ints(1), destination, *_ints(0, 3)])
+    assert _raw(destination) == [2, 3, 4, 0]
+
+    # Overlapping ranges behave as if the source was copied first
+    array_intrinsics.array_copy(None, [source, *_ints(0), source, *_ints(1, 3)])
+    assert _raw(source) == [1, 1, 2, 3]
+
+
+def test_array_copy_with_string_literals():
+    literal = string_instance('abc')
+    chars = _primitive(CHAR, [0] * 3)
+    array_intrinsics.array_copy(None, [literal.value.fields['value'], *_ints(0), chars, *_ints(0, 3)])
+    assert _raw(chars) == [ord(c) for c in 'abc']
+
+    chars.value.store(1, ord('x'))
+    array_intrinsics.array_copy(None, [chars, *_ints(0), literal.value.fields['value'], *_ints(0, 3)])
+    assert string_text(literal.value) == 'axc'
+
+
+def test_array_copy_checks_reference_elements():
+    shape, square, circle = (ObjectReferenceType(name) for name in ['Shape', 'Square', 'Circle'])
+    class_files = [ClassFile.create(shape.refers_to)]
+    for child in [square, circle]:
+        class_files.append(ClassFile.create(child.refers_to, shape.refers_to))
+    machine = Machine(program_loader(*class_files), engine=DIRECT_ENGINE)
+    shapes = ArrayReferenceType(shape).create_instance(
+        [square.create_instance(None), NULL_VALUE, circle.create_instance(None), square.create_instance(None)]
+    )
+    squares = ArrayReferenceType(square).create_instance([NULL_VALUE] * 4)
+    objects = ArrayReferenceType(ObjectReferenceType('java/lang/Object')).create_instance([NULL_VALUE] * 4)
+
+    array_intrinsics.array_copy(machine, [shapes, *_ints(0), objects, *_ints(0, 4)])
+    assert objects.value == shapes.value
+
+    # The elements before the first one that a Square[] cannot hold are copied
+    with pytest.raises(IntrinsicThrow) as info:
+        array_intrinsics.array_copy(machine, [shapes, *_ints(0), squares, *_ints(0, 4)])
+    assert info.value.class_name == 'java/lang/ArrayStoreException'
+    assert squares.value == shapes.value[:2] + [NULL_VALUE] * 2
+
+    array_intrinsics.array_copy(machine, [squares, *_ints(0), shapes, *_ints(2, 2)])
+    assert shapes.value[2] == shapes.value[0]
+
+
+@pytest.mark.parametrize('source, destination, positions, exception', [
+    ('null', 'ints', (0, 0, 1), 'java/lang/NullPointerException'),
+    ('ints', 'longs', (0, 0, 1), 'java/lang/ArrayStoreException'),
+    ('ints', 'ints', (3, 0, 2), 'java/lang/ArrayIndexOutOfBoundsException'),
+    ('ints', 'ints', (0, 0, -1), 'java/lang/ArrayIndexOutOfBoundsException'),
+])
+def test_array_copy_exceptions(source, destination, positions, exception):
+    arrays = {'ints': _primitive(INT, [1, 2, 3, 4]), 'longs': _primitive(LONG, [1, 2, 3, 4]), 'null': NULL_VALUE}
+    source = arrays[source]
+    destination = arrays[destination]
+    src_pos, dest_pos, length = _ints(*positions)
+    with pytest.raises(IntrinsicThrow) as info:
+        array_intrinsics.array_copy(None, [source, src_pos, destination, dest_pos, length])
+    assert info.value.class_name == exception
+
+
+def test_fill_and_copies():
+    array_value = _primitive(INT, [0] * 5)
+    array_intrinsics.fill(None, [array_value, *_ints(1, 3, 7)])
+    assert _raw(array_value) == [0, 7, 7, 0, 0]
+    array_intrinsics.fill(None, [array_value, *_ints(-1)])
+    assert _raw(array_value) == [-1] * 5
+
+    assert _raw(array_intrinsics.copy_of(None, [array_value, *_ints(7)])) == [-1] * 5 + [0, 0]
+    assert _raw(array_intrinsics.copy_of_range(None, [array_value, *_ints(3, 6)])) == [-1, -1, 0]
+    with pytest.raises(IntrinsicThrow):
+        array_intrinsics.fill(None, [array_value, *_ints(3, 1, 0)])
+
+    strings = ArrayReferenceType(STRING).create_instance([NULL_VALUE])
+    copied = array_intrinsics.copy_of(None, [strings, *_ints(2)])
+    assert copied.type == strings.type
+    assert copied.value == [NULL_VALUE, STRING.create_instance(STRING.default_value)]
+
+
+def test_equals_and_hash_codes():
+    def equal(first, second, indicator=DOUBLE):
+        return array_intrinsics.equals('D', None, [_primitive(indicator, first), _primitive(indicator, second)])
+
+    assert equal([math.nan], [math.nan]) == Integer.create_instance(1)
+    assert equal([0.0], [-0.0]) == Integer.create_instance(0)
+    assert equal([1.0], [1.0, 2.0]) == Integer.create_instance(0)
+
+    # The values that Java's Arrays.hashCode returns
+    assert array_intrinsics.hash_code('I', None, [_primitive(INT, [1, 2, 3])]) == Integer.create_instance(30817)
+    assert array_intrinsics.hash_code('J', None, [_primitive(LONG, [1 << 32])]) == Integer.create_instance(32)
+    assert array_intrinsics.hash_code('Z', None, [_primitive(BOOLEAN, [1, 0])]) == Integer.create_instance(40359)
+    assert array_intrinsics.hash_code('F', None, [_primitive(FLOAT, [1.0])]) == Integer.create_instance(1065353247)
+    assert array_intrinsics.hash_code('I', None, [NULL_VALUE]) == Integer.create_instance(0)
+
+
+def test_sort():
+    array_value = _primitive(DOUBLE, [math.nan, 1.0, 0.0, -0.0, -5.0])
+    array_intrinsics.sort('D', None, [array_value])
+    result = _raw(array_value)
+    assert result[:2] == [-5.0, -0.0] and math.copysign(1.0, result[1]) == -1.0
+    assert result[2:4] == [0.0, 1.0] and math.isnan(result[4])
+
+    array_value = _primitive(INT, [5, 4, 3, 2, 1])
+    array_intrinsics.sort('I', None, [array_value, *_ints(1, 4)])
+    assert _raw(array_value) == [5, 2, 3, 4, 1]
+
+
+def test_clone_is_shallow():
+    original = _primitive(FLOAT, [1.5])
+    copy = array_intrinsics.clone(None, [original])
+    copy.value.store(0, 2.5)
+    assert original.value[0] == Float.create_instance(1.5)
+    assert copy.type == original.type
+
+
+def test_lookup():
+    assert REGISTRY.find('[I', CLONE_KEY).function is array_intrinsics.clone
+    arraycopy_key = MethodKey('arraycopy', '(Ljava/lang/Object;ILjava/lang/Object;II)V')
+    assert REGISTRY.find(SYSTEM, arraycopy_key).function is array_intrinsics.array_copy
+    assert REGISTRY.find(VM_SYSTEM, arraycopy_key).function is array_intrinsics.array_copy
+    assert REGISTRY.find(ARRAYS, MethodKey('sort', '([D)V'))
+    # These need the elements' equals and compareTo methods
+    assert REGISTRY.find(ARRAYS, MethodKey('equals', '([Ljava/lang/Object;[Ljava/lang/Object;)Z')) is None
+    assert REGISTRY.find(ARRAYS, MethodKey('sort', '([Ljava/lang/Object;)V')) is None
+    assert REGISTRY.find(ARRAYS, MethodKey('sort', '([Z)V')) is None
+
+
+FILL_KEY = MethodKey('fill', '([II)V')
+HASH_CODE_KEY = MethodKey('hashCode', '([I)I')
+
+
+def _fill_and_hash(constants):
+    """Fill an int[3] with 7 and store its hash code"""
+    return [
+        Instruction.create('iconst_3'),
+        literal_instruction('newarray', INT),
+        Instruction.create('astore_0'),
+        Instruction.create('aload_0'),
+        literal_instruction('bipush', 7),
+        constant_instruction('invokestatic', constants.create_method_ref(ARRAYS, FILL_KEY.name, FILL_KEY.descriptor)),
+        Instruction.create('aload_0'),
+        constant_instruction('invokestatic', constants.create_method_ref(
+            ARRAYS, HASH_CODE_KEY.name, HASH_CODE_KEY.descriptor
+        )),
+        constant_instruction('putstatic', result_field_ref(constants)),
+        Instruction.create('return')
+    ]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_machines_invoke_intrinsics_without_frames(engine):
+    loader = program_loader(create_program(_fill_and_hash))
+    # Only these intrinsics are registered, so the machine resolves Arrays without loading it
+    registry = IntrinsicRegistry()
+    for key in [FILL_KEY, HASH_CODE_KEY]:
+        registry.add(ARRAYS, key, REGISTRY.find(ARRAYS, key).function)
+    machine = Machine(loader, engine=engine, intrinsic_registry=registry)
+    jvm_class = loader.get_the_class(PROGRAM_CLASS_NAME)
+    machine.frames.push(Frame.from_class_and_method(jvm_class, jvm_class.methods[RUN_METHOD_KEY]))
+    machine.run()
+    assert program_result(machine) == ((31 + 7) * 31 + 7) * 31 + 7
@@ -0,0 +1,42 @@
+from jawa.constants import ConstantPool
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.actions import Push, IncrementProgramCounter
+from pyjvm.core.frame_locals import Locals
+from pyjvm.core.jvm_types import Integer
+from pyjvm.core.stack import Stack
+from pyjvm.instructions.instructions import bind_instruction, WIDE_OPCODE
+from pyjvm.utils.utils import named_tuple_replace, local_operand
+from test.utils import dummy_loader
+
+
+def _locals_with(index, value):
+    locals_ = Locals(5)
+    locals_.store(index, Integer.create_instance(value))
+    return locals_
+
+
+def test_bound_instruction_is_reusable():
+    bound = bind_instruction(Instruction.create('iload_1'), ConstantPool(), dummy_loader())
+    for value in range(3):
+        actions = bound.execute(_locals_with(1, value), Stack())
+        assert actions.has(Push(Integer.create_instance(value)), IncrementProgramCounter)
+
+
+def test_bound_instruction_restores_inputs():
+    bound = bind_instruction(Instruction.create('nop'), ConstantPool(), dummy_loader())
+    bound.execute(Locals(1), Stack())
+    assert bound.instructor.locals is None
+    assert bound.instructor.op_stack is None
+
+
+def test_wide_instruction():
+    # jawa keeps the opcode of the wide prefix, but the mnemonic of the widened instruction
+    instruction = Instruction.create('iload', [local_operand(300)])
+    instruction = named_tuple_replace(instruction, opcode=WIDE_OPCODE)
+
+    locals_ = Locals(301)
+    locals_.store(300, Integer.create_instance(7))
+
+    bound = bind_instruction(instruction, ConstantPool(), dummy_loader())
+    assert bound.execute(locals_, Stack()).has(Push(Integer.create_instance(7)))
@@ -0,0 +1,128 @@
+import pytest
+from jawa.cf import ClassFile
+
+from pyjvm.core.call_sites import CallSites, UNINITIALIZED, MONOMORPHIC, POLYMORPHIC, MEGAMORPHIC, NO_RECEIVER
+from pyjvm.core.jvm_class import MethodKey
+from pyjvm.core.machine import DIRECT_ENGINE, ACTIONS_ENGINE
+from test.utils import run_program, program_result, static_method, result_field_ref, PROGRAM_CLASS_NAME, \
+    RUN_METHOD_KEY, RESULT_FIELD, calls_and_exceptions
+
+BASE_CLASS_NAME = 'Base'
+VALUE_KEY = MethodKey('value', '()I')
+
+
+def _site(max_entries=2):
+    return CallSites(max_entries).create(('Caller', 'method', '()V', 3), 'Target', MethodKey('target', '()V'))
+
+
+def _resolver(calls):
+    # noinspection PyUnusedLocal
+    def resolve(receiver_type):
+        calls.append(None)
+        return len(calls)
+
+    return resolve
+
+
+def test_states():
+    site = _site()
+    calls = []
+    assert site.state == UNINITIALIZED
+
+    assert site.lookup('A', _resolver(calls)) == 1
+    assert site.state == MONOMORPHIC
+    assert site.lookup('A', _resolver(calls)) == 1
+    assert (site.hits, site.misses) == (1, 1)
+
+    assert site.lookup('B', _resolver(calls)) == 2
+    assert site.state == POLYMORPHIC
+    assert site.receiver_types() == ['A', 'B']
+
+    assert site.lookup('C', _resolver(calls)) == 3
+    assert site.state == MEGAMORPHIC
+    assert site.receiver_types() == []
+    assert (site.hits, site.misses) == (1, 3)
+
+
+def test_megamorphic_sites_share_resolutions():
+    sites = CallSites(max_entries=1)
+    first = sites.create(('Caller', 'method', '()V', 3), 'Target', MethodKey('target', '()V'))
+    second = sites.create(('Caller', 'method', '()V', 6), 'Target', MethodKey('target', '()V'))
+    calls = []
+    for site in [first, second]:
+        for receiver_type in ['A', 'B', 'C']:
+            site.lookup(receiver_type, _resolver(calls))
+        assert site.state == MEGAMORPHIC
+
+    # The first site resolved A, B and C. The second resolved A before becoming megamorphic
+    assert len(calls) == 4
+
+
+def test_invalid_max_entries():
+    with pytest.raises(ValueError):
+        CallSites(0)
+
+
+def _virtual_calls(receiver_class_names):
+    """A program that sums the results of calling `value` on an instance of every class in `receiver_class_names`
+
+    All the calls to `value` go through a single call site, in the static method `call`.
+    """
+    cf = ClassFile.create(PROGRAM_CLASS_NAME)
+    field = cf.fields.create(RESULT_FIELD, 'I')
+    field.access_flags.set('acc_static', True)
+    constants = cf.constants
+    value_ref = constants.create_method_ref(BASE_CLASS_NAME, VALUE_KEY.name, VALUE_KEY.descriptor)
+    call_ref = constants.create_method_ref(PROGRAM_CLASS_NAME, 'call', f'(L{BASE_CLASS_NAME};)I')
+    static_method(cf, 'call', f'(L{BASE_CLASS_NAME};)I', [
+        ('aload_0',),
+        ('invokevirtual', value_ref),
+        ('ireturn',),
+    ])
+
+    code = [('iconst_0',)]
+    for name in receiver_class_names:
+        code.extend([
+            ('new', constants.create_class(name)),
+            ('invokestatic', call_ref),
+            ('iadd',),
+        ])
+    code.extend([
+        ('putstatic', result_field_ref(constants)),
+        ('return',)
+    ])
+    static_method(cf, RUN_METHOD_KEY.name, RUN_METHOD_KEY.descriptor, code)
+
+    base = ClassFile.create(BASE_CLASS_NAME)
+    value = static_method(base, VALUE_KEY.name, VALUE_KEY.descriptor, [('iconst_2',), ('ireturn',)])
+    value.access_flags.set('acc_static', False)
+
+    subclasses = [ClassFile.create(name, BASE_CLASS_NAME) for name in set(receiver_class_names) - {BASE_CLASS_NAME}]
+    return [cf, base] + subclasses
+
+
+@pytest.mark.parametrize('receivers, state', [
+    (['Base', 'Base', 'Base'], MONOMORPHIC),
+    (['Base', 'A', 'Base'], POLYMORPHIC),
+    (['A', 'B', 'C', 'D', 'Base'], MEGAMORPHIC),
+])
+def test_virtual_calls(receivers, state):
+    class_files = _virtual_calls(receivers)
+    machine = run_program(*class_files, engine=DIRECT_ENGINE, polymorphic_limit=4)
+    assert program_result(machine) == 2 * len(receivers)
+    assert machine.frames.size() == 0
+
+    site, = [site for site in machine.call_sites if site.method_key == VALUE_KEY]
+    assert site.state == state
+    assert site.hits + site.misses == len(receivers)
+
+    assert program_result(run_program(*_virtual_calls(receivers), engine=ACTIONS_ENGINE)) == 2 * len(receivers)
+
+
+def test_loop_site():
+    machine = run_program(*calls_and_exceptions(), engine=DIRECT_ENGINE)
+    add_site, = [site for site in machine.call_sites if site.method_key.name == 'add']
+    assert add_site.state == MONOMORPHIC
+    assert add_site.receiver_types() == [NO_RECEIVER]
+    assert (add_site.hits, add_site.misses) == (9, 1)
+    assert any('add(II)I: monomorphic, 9 hits, 1 misses' in line for line in machine.call_sites.report())
@@ -0,0 +1,121 @@
+import io
+import os
+
+import pytest
+from jawa.cf import ClassFile
+from jawa.constants import ConstantPool
+
+from pyjvm.core.class_cache import ClassCache, class_to_data, class_from_data, entry_stamp
+from pyjvm.core.class_loaders import FixedClassLoader
+from pyjvm.core.frame import Frame
+from pyjvm.core.jvm_class import JvmClass, BytecodeMethod
+from pyjvm.core.jvm_types import RootObjectType
+from pyjvm.core.machine import Machine, ENGINES
+from pyjvm.utils import jawa_conversions
+from pyjvm.utils.jawa_conversions import convert_class_file
+from test.utils import calls_and_exceptions, program_result, PROGRAM_CLASS_NAME, RUN_METHOD_KEY
+
+
+def _reparsed(cf):
+    """Return `cf` as jawa parses it from a class file"""
+    out = io.BytesIO()
+    cf.save(out)
+    out.seek(0)
+    return ClassFile(out)
+
+
+def _classes():
+    return [convert_class_file(_reparsed(cf)) for cf in calls_and_exceptions()]
+
+
+def test_round_trip():
+    for jvm_class in _classes():
+        restored = class_from_data(class_to_data(jvm_class))
+        assert restored.name == jvm_class.name
+        assert restored.name_of_base == jvm_class.name_of_base
+        assert restored.fields == jvm_class.fields
+        assert restored.static_fields == jvm_class.static_fields
+        assert restored.methods == jvm_class.methods
+        assert [c.pack() for c in restored.constants] == [c.pack() for c in jvm_class.constants]
+
+
+def test_storing_does_not_load_code(monkeypatch):
+    def fail(method, constants):
+        raise AssertionError(f'The code of {method.name.value} was loaded')
+
+    monkeypatch.setattr(jawa_conversions, 'convert_code', fail)
+    for jvm_class in _classes():
+        data = class_to_data(jvm_class)
+        assert class_to_data(class_from_data(data)) == data
+
+
+def test_round_trip_of_loaded_methods():
+    jvm_class = _classes()[0]
+    methods = list(jvm_class.methods.items())
+    loaded = [
+        (key, BytecodeMethod(
+            name=method.name,
+            descriptor=method.descriptor,
+            instructions=method.instructions,
+            max_locals=method.max_locals,
+            max_stack=method.max_stack,
+            args=method.args,
+            exception_handlers=method.exception_handlers
+        ))
+        for key, method in methods
+    ]
+    eager = JvmClass(jvm_class.name, jvm_class.name_of_base, jvm_class.constants, methods=loaded)
+    assert class_from_data(class_to_data(eager)).methods == jvm_class.methods
+
+
+@pytest.fixture
+def stamp(tmp_path):
+    entry = tmp_path / 'classes.jar'
+    entry.write_bytes(b'jar')
+    return entry_stamp(entry)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_cached_classes_run(tmp_path, stamp, engine):
+    writer = ClassCache(tmp_path / 'cache')
+    for jvm_class in _classes():
+        writer.put(stamp, jvm_class.name, jvm_class)
+
+    reader = ClassCache(tmp_path / 'cache')
+    classes = {name: reader.get(stamp, name) for name in [PROGRAM_CLASS_NAME, 'Oops']}
+    assert reader.hits == 2
+    classes[RootObjectType.refers_to] = JvmClass(RootObjectType.refers_to, None, ConstantPool())
+    loader = FixedClassLoader(classes)
+    machine = Machine(loader, engine=engine)
+    jvm_class = loader.get_the_class(PROGRAM_CLASS_NAME)
+    machine.frames.push(Frame.from_class_and_method(jvm_class, jvm_class.methods[RUN_METHOD_KEY]))
+    machine.run()
+    assert program_result(machine) == sum(range(10)) + 100
+
+
+def test_invalidation(tmp_path, stamp):
+    cache = ClassCache(tmp_path / 'cache')
+    jvm_class = _classes()[0]
+    cache.put(stamp, jvm_class.name, jvm_class)
+    assert cache.get(stamp, jvm_class.name) is not None
+
+    path, mtime, size = stamp
+    assert cache.get((path, mtime + 1, size), jvm_class.name) is None
+    assert cache.get(stamp, 'Other') is None
+
+    # Damaged files are misses
+    for file in (tmp_path / 'cache').rglob('*.class-cache'):
+        file.write_bytes(file.read_bytes()[:20])
+    assert cache.get(stamp, jvm_class.name) is None
+    assert cache.misses == 3
+
+
+def test_failed_writes_leave_no_files(tmp_path, stamp, monkeypatch):
+    def fail(source, destination):
+        raise OSError('Cannot replace')
+
+    monkeypatch.setattr(os, 'replace', fail)
+    cache = ClassCache(tmp_path / 'cache')
+    jvm_class = _classes()[0]
+    cache.put(stamp, jvm_class.name, jvm_class)
+    assert [path for path in (tmp_path / 'cache').rglob('*') if path.is_file()] == []
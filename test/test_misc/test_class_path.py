@@ -0,0 +1,76 @@
+import io
+from zipfile import ZipFile, ZIP_STORED, ZIP_DEFLATED, ZIP_BZIP2
+
+import pytest
+from jawa.cf import ClassFile
+
+from pyjvm.core.class_path import ClassPath
+
+
+def _class_bytes(name, field='value'):
+    cf = ClassFile.create(name)
+    cf.fields.create(field, 'I')
+    out = io.BytesIO()
+    cf.save(out)
+    return out.getvalue()
+
+
+def _jar(path, classes, compression=ZIP_DEFLATED):
+    with ZipFile(path, 'w', compression=compression) as archive:
+        archive.writestr('META-INF/MANIFEST.MF', 'Manifest-Version: 1.0\n')
+        for name, data in classes.items():
+            archive.writestr(f'{name}.class', data)
+    return str(path)
+
+
+@pytest.mark.parametrize('compression', [ZIP_STORED, ZIP_DEFLATED, ZIP_BZIP2])
+def test_read_from_archive(tmp_path, compression):
+    classes = {'a/A': _class_bytes('a/A'), 'a/b/B': _class_bytes('a/b/B')}
+    class_path = ClassPath([_jar(tmp_path / 'classes.jar', classes, compression)])
+
+    for name, data in classes.items():
+        assert name in class_path
+        assert class_path.read(name) == data
+    assert 'META-INF/MANIFEST' not in class_path
+    class_path.close()
+    assert class_path.read('a/A') == classes['a/A']
+
+
+def test_read_from_directory(tmp_path):
+    data = _class_bytes('a/A')
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'a' / 'A.class').write_bytes(data)
+    class_path = ClassPath([str(tmp_path)])
+
+    assert class_path.read('a/A') == data
+    assert class_path.find('a/A').path == str(tmp_path / 'a' / 'A.class')
+
+
+def test_first_entry_wins(tmp_path):
+    first = _class_bytes('A', field='first')
+    second = _class_bytes('A', field='second')
+    directory = tmp_path / 'directory'
+    directory.mkdir()
+    (directory / 'A.class').write_bytes(second)
+    jar = _jar(tmp_path / 'first.jar', {'A': first})
+
+    assert ClassPath([jar, str(directory)]).read('A') == first
+    assert ClassPath([str(directory), jar]).read('A') == second
+    assert ClassPath([jar, _jar(tmp_path / 'second.jar', {'A': second})]).read('A') == first
+
+
+def test_missing_classes_are_remembered(tmp_path):
+    class_path = ClassPath([str(tmp_path)])
+
+    assert class_path.find('Late') is None
+    (tmp_path / 'Late.class').write_bytes(_class_bytes('Late'))
+    assert class_path.find('Late') is None
+    with pytest.raises(FileNotFoundError):
+        class_path.read('Late')
+
+    assert ClassPath([str(tmp_path)]).find('Late') is not None
+
+
+def test_missing_archive(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ClassPath([str(tmp_path / 'missing.jar')])
@@ -0,0 +1,100 @@
+import pytest
+from jawa.assemble import assemble, Label
+
+from pyjvm.core.machine import Machine, DIRECT_ENGINE, ACTIONS_ENGINE
+from pyjvm.instructions.compiler import CompiledMethods
+from test.utils import create_program, run_program, program_result, sum_loop, result_field_ref, dummy_loader, \
+    calls_and_exceptions
+
+
+def _inlined_instructions(constants):
+    """A program that mixes the kinds of instructions that the compiler inlines"""
+    return assemble([
+        ('ldc2_w', constants.create_long(5)),
+        ('lconst_1',),
+        ('ladd',),
+        ('l2i',),
+        ('istore_1',),
+        ('iload_1',),
+        ('i2l',),
+        ('lconst_1',),
+        ('ladd',),
+        ('l2i',),
+        ('istore_2',),
+        ('iload_2',),
+        ('iload_1',),
+        ('swap',),
+        ('isub',),
+        ('ineg',),
+        ('istore_3',),
+        ('aconst_null',),
+        ('ifnonnull', Label('skip')),
+        ('iinc', 3, 10),
+        ('istore_3',),
+        Label('skip'),
+        ('sipush', 1000),
+        ('iconst_2',),
+        ('pop',),
+        ('iload_3',),
+        ('iload_1',),
+        ('ishl',),
+        ('iadd',),
+        ('lconst_0',),
+        ('lconst_1',),
+        ('lcmp',),
+        ('iadd',),
+        ('putstatic', result_field_ref(constants)),
+        ('return',),
+    ])
+
+
+@pytest.mark.parametrize('machine_kwargs', [
+    dict(engine=ACTIONS_ENGINE),
+    dict(engine=DIRECT_ENGINE),
+    dict(engine=DIRECT_ENGINE, compile_threshold=1),
+])
+def test_inlined_instructions(machine_kwargs):
+    machine = run_program(create_program(_inlined_instructions), **machine_kwargs)
+    # Follows the quirks of the Instructors: iinc pushes its result and lcmp pushes 1 only for equal values
+    assert program_result(machine) == 1000 + ((1 + 10) << 6) + 0
+
+
+@pytest.mark.parametrize('threshold', [1, 2, 5, 100])
+def test_sum_loop(threshold):
+    machine = run_program(create_program(sum_loop), engine=DIRECT_ENGINE, compile_threshold=threshold)
+    assert program_result(machine) == sum(range(10))
+    assert len(machine.compiled_methods) == (1 if threshold == 1 else 0)
+
+
+@pytest.mark.parametrize('threshold', [None, 1, 3])
+def test_calls_and_exceptions(threshold):
+    machine = run_program(*calls_and_exceptions(), engine=DIRECT_ENGINE, compile_threshold=threshold)
+    assert program_result(machine) == sum(range(10)) + 100
+    assert machine.frames.size() == 0
+
+
+def test_threshold_is_reached():
+    machine = run_program(*calls_and_exceptions(), engine=DIRECT_ENGINE, compile_threshold=3)
+    compiled = {name for _, name, _ in machine.compiled_methods._functions}
+    assert compiled == {'add'}
+
+
+def test_interpreter_agrees():
+    interpreted = run_program(*calls_and_exceptions(), engine=ACTIONS_ENGINE)
+    assert program_result(interpreted) == sum(range(10)) + 100
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompiledMethods(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_only_direct_engine():
+    with pytest.raises(ValueError):
+        Machine(dummy_loader(), engine=ACTIONS_ENGINE, compile_threshold=1)
@@ -0,0 +1,122 @@
+import math
+
+import pytest
+from jawa.assemble import Label
+from jawa.cf import ClassFile
+from jawa.constants import ConstantPool
+
+from pyjvm.core.constant_pool import ResolvedConstants, ClassRef, FieldRef, MethodRef, SharedConstants
+from pyjvm.core.jvm_class import MethodKey, JvmClass
+from pyjvm.core.jvm_types import Integer, Double
+from pyjvm.core.machine import ENGINES
+from pyjvm.utils.jawa_conversions import string_instance
+from test.utils import run_program, program_result, calls_and_exceptions, result_field_ref, static_method, \
+    PROGRAM_CLASS_NAME, RUN_METHOD_KEY
+
+
+def test_resolution():
+    constants = ConstantPool()
+    class_index = constants.create_class('Target').index
+    field_index = constants.create_field_ref('Target', 'count', 'I').index
+    method_index = constants.create_method_ref('Target', 'add', '(II)I').index
+    value_index = constants.create_integer(7).index
+    resolved = ResolvedConstants(constants)
+    assert len(resolved) == 0
+
+    assert resolved.class_ref(class_index) == ClassRef('Target', 'LTarget;')
+    assert resolved.field(field_index) == FieldRef('Target', 'count', Integer)
+    assert resolved.method(method_index) == MethodRef('Target', MethodKey('add', '(II)I'), 2)
+    assert resolved.value(value_index) == Integer.create_instance(7)
+    assert len(resolved) == 4
+
+
+def test_entries_are_resolved_once():
+    constants = ConstantPool()
+    value_index = constants.create_integer(7).index
+    method_index = constants.create_method_ref('Target', 'add', '(II)I').index
+    resolved = ResolvedConstants(constants)
+    assert resolved.value(value_index) is resolved.value(value_index)
+    assert resolved.method(method_index) is resolved.method(method_index)
+
+
+def test_every_class_has_a_table():
+    first = JvmClass('First', None, ConstantPool())
+    second = JvmClass('Second', None, ConstantPool())
+    assert first.resolved_constants.constants is first.constants
+    assert first.resolved_constants is not second.resolved_constants
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_instructions_use_the_class_table(engine):
+    machine = run_program(*calls_and_exceptions(), engine=engine)
+    assert program_result(machine) == sum(range(10)) + 100
+    assert len(machine.class_loader.get_the_class(PROGRAM_CLASS_NAME).resolved_constants) > 0
+
+
+def test_constants_are_shared_between_pools():
+    shared = SharedConstants()
+    first, second = ConstantPool(), ConstantPool()
+    indices = [(pool.create_string('text').index, pool.create_double(-0.0).index) for pool in (first, second)]
+    (first_string, first_double), (second_string, second_double) = indices
+    first_resolved = ResolvedConstants(first, shared)
+    second_resolved = ResolvedConstants(second, shared)
+    assert first_resolved.value(first_string) is second_resolved.value(second_string)
+    assert first_resolved.value(first_double) is second_resolved.value(second_double)
+    assert len(shared) == 2
+
+    # 0.0 equals -0.0, but they are different constants
+    assert math.copysign(1.0, shared.number(Double, 0.0).value) == 1.0
+    assert shared.number(Double, math.nan) is shared.number(Double, math.nan)
+
+
+def test_intern():
+    shared = SharedConstants()
+    literal = shared.string('text')
+    assert shared.intern(string_instance('text')) is literal
+    other = string_instance('other')
+    assert shared.intern(other) is other
+    assert shared.string('other') is other
+
+
+OTHER_CLASS_NAME = 'Other'
+
+
+def _literal_comparison():
+    """A program that stores 1 if a literal is identical to the same literal from another class, and 0 otherwise"""
+    other = ClassFile.create(OTHER_CLASS_NAME)
+    static_method(other, 'text', '()Ljava/lang/String;', [
+        ('ldc', other.constants.create_string('literal')),
+        ('areturn',),
+    ])
+
+    cf = ClassFile.create(PROGRAM_CLASS_NAME)
+    field = cf.fields.create('result', 'I')
+    field.access_flags.set('acc_static', True)
+    constants = cf.constants
+    static_method(cf, RUN_METHOD_KEY.name, RUN_METHOD_KEY.descriptor, [
+        ('iconst_0',),
+        ('istore_0',),
+        ('ldc', constants.create_string('literal')),
+        ('invokestatic', constants.create_method_ref(OTHER_CLASS_NAME, 'text', '()Ljava/lang/String;')),
+        ('if_acmpne', Label('end')),
+        ('iconst_1',),
+        ('istore_0',),
+        Label('end'),
+        ('iload_0',),
+        ('putstatic', result_field_ref(constants)),
+        ('return',),
+    ])
+    return cf, other
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_literals_are_identical(engine):
+    machine = run_program(*_literal_comparison(), engine=engine)
+    assert program_result(machine) == 1
+
+
+def test_machines_do_not_share_constants():
+    first, second = (run_program(*_literal_comparison()) for _ in range(2))
+    shared = first.class_loader.shared_constants
+    assert first.class_loader.get_the_class(OTHER_CLASS_NAME).resolved_constants.shared is shared
+    assert second.class_loader.shared_constants.string('literal') is not shared.string('literal')
@@ -0,0 +1,74 @@
+import pytest
+from jawa.cf import ClassFile
+
+from pyjvm.core.jvm_class import BytecodeMethod, MethodKey
+from pyjvm.core.jvm_types import Integer
+from pyjvm.core.machine import ENGINES
+from pyjvm.utils import jawa_conversions
+from pyjvm.utils.jawa_conversions import convert_class_file
+from test.utils import calls_and_exceptions, static_method, run_program, program_result, PROGRAM_CLASS_NAME
+
+
+@pytest.fixture
+def loaded_methods(monkeypatch):
+    """Record the names of the methods whose code is loaded"""
+    names = []
+    convert_code = jawa_conversions.convert_code
+
+    def recording(method, constants):
+        names.append(method.name.value)
+        return convert_code(method, constants)
+
+    monkeypatch.setattr(jawa_conversions, 'convert_code', recording)
+    return names
+
+
+def test_code_is_loaded_on_first_use(loaded_methods):
+    cf = ClassFile.create('Deferred')
+    static_method(cf, 'add', '(II)I', [('iload_0',), ('iload_1',), ('iadd',), ('ireturn',)])
+    method = convert_class_file(cf).methods[MethodKey('add', '(II)I')]
+
+    assert method.args == (Integer, Integer)
+    assert method.has_code
+    assert loaded_methods == []
+
+    assert [ins.mnemonic for ins in method.instructions] == ['iload_0', 'iload_1', 'iadd', 'ireturn']
+    assert method.max_locals == 10
+    assert method.instruction_table.end == 4
+    assert method.exception_handlers.handlers == ()
+    assert loaded_methods == ['add']
+
+    eager = BytecodeMethod(
+        name='add',
+        descriptor='(II)I',
+        instructions=method.instructions,
+        max_locals=10,
+        max_stack=10,
+        args=[Integer, Integer]
+    )
+    assert method == eager
+
+
+def test_methods_without_code():
+    cf = ClassFile.create('Abstract')
+    abstract = cf.methods.create('abstract', '()V')
+    abstract.access_flags.set('acc_abstract', True)
+    native = cf.methods.create('native', '()V')
+    native.access_flags.set('acc_native', True)
+    methods = convert_class_file(cf).methods
+
+    assert not methods[MethodKey('abstract', '()V')].has_code
+    assert not methods[MethodKey('native', '()V')].has_code
+    assert methods[MethodKey('native', '()V')].is_native
+    assert methods[MethodKey('abstract', '()V')].instructions == ()
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_only_invoked_methods_are_loaded(loaded_methods, engine):
+    cf, exception_cf = calls_and_exceptions()
+    static_method(cf, 'unused', '()V', [('return',)])
+
+    machine = run_program(cf, exception_cf, engine=engine)
+
+    assert program_result(machine, PROGRAM_CLASS_NAME) == 145
+    assert sorted(loaded_methods) == ['add', 'fail', 'run']
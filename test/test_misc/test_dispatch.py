@@ -0,0 +1,98 @@
+import pytest
+from jawa.cf import ClassFile
+from jawa.constants import ConstantPool
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.class_loaders import FixedClassLoader
+from pyjvm.core.jvm_class import JvmClass, BytecodeMethod, MethodKey
+from pyjvm.core.jvm_types import RootObjectType
+from pyjvm.core.machine import ENGINES
+from test.utils import run_program, program_result, static_method, result_field_ref, PROGRAM_CLASS_NAME, \
+    RUN_METHOD_KEY, RESULT_FIELD
+
+KEY = MethodKey('run', '()V')
+OTHER_KEY = MethodKey('other', '()V')
+
+
+def _method(key, has_body=True):
+    instructions = [Instruction.create('return')] if has_body else []
+    return BytecodeMethod(
+        name=key.name,
+        descriptor=key.descriptor,
+        instructions=instructions,
+        max_locals=1,
+        max_stack=1,
+        args=[]
+    )
+
+
+def _loader(*classes):
+    root = JvmClass(RootObjectType.refers_to, None, ConstantPool(), methods={OTHER_KEY: _method(OTHER_KEY)})
+    return FixedClassLoader({c.name: c for c in classes + (root,)})
+
+
+def _class(name, base=RootObjectType.refers_to, interfaces=(), methods=()):
+    return JvmClass(name, base, ConstantPool(), interfaces=interfaces, methods={key: _method(key, body)
+                                                                            for key, body in methods})
+
+
+def test_overriding_methods_replace_inherited_ones():
+    loader = _loader(
+        _class('Base', methods=[(KEY, True)]),
+        _class('Child', base='Base', methods=[(KEY, True)]),
+        _class('GrandChild', base='Child')
+    )
+    declaring, _ = loader.resolve('GrandChild', KEY)
+    assert declaring.name == 'Child'
+    declaring, _ = loader.resolve('GrandChild', OTHER_KEY)
+    assert declaring.name == RootObjectType.refers_to
+    assert loader.vtable('GrandChild') is loader['GrandChild'].vtable
+
+
+def test_interface_default_methods():
+    loader = _loader(
+        _class('Interface', methods=[(KEY, True)]),
+        _class('Abstract', interfaces=['Interface'], methods=[(KEY, False)]),
+        _class('Implementation', base='Abstract'),
+        _class('Overriding', base='Abstract', methods=[(KEY, True)])
+    )
+    assert loader.itable('Implementation')[KEY][0].name == 'Interface'
+    assert loader.resolve('Implementation', KEY)[0].name == 'Interface'
+    assert loader.resolve('Overriding', KEY)[0].name == 'Overriding'
+
+
+def test_missing_method():
+    loader = _loader(_class('Base'))
+    with pytest.raises(KeyError):
+        loader.resolve_method('Base', KEY)
+
+
+VALUE_KEY = MethodKey('value', '()I')
+
+
+def _overriding_program():
+    """A program that invokes `value` on a Base variable that holds a Child, which overrides `value`"""
+    cf = ClassFile.create(PROGRAM_CLASS_NAME)
+    field = cf.fields.create(RESULT_FIELD, 'I')
+    field.access_flags.set('acc_static', True)
+    constants = cf.constants
+    static_method(cf, RUN_METHOD_KEY.name, RUN_METHOD_KEY.descriptor, [
+        ('new', constants.create_class('Child')),
+        ('invokevirtual', constants.create_method_ref('Base', VALUE_KEY.name, VALUE_KEY.descriptor)),
+        ('putstatic', result_field_ref(constants)),
+        ('return',)
+    ])
+
+    class_files = [cf]
+    for name, base, value in [('Base', None, 'iconst_1'), ('Child', 'Base', 'iconst_2')]:
+        class_file = ClassFile.create(name, base) if base else ClassFile.create(name)
+        method = static_method(class_file, VALUE_KEY.name, VALUE_KEY.descriptor, [(value,), ('ireturn',)])
+        method.access_flags.set('acc_static', False)
+        class_files.append(class_file)
+    return class_files
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_receiver_dispatch(engine):
+    machine = run_program(*_overriding_program(), engine=engine)
+    assert program_result(machine) == 2
@@ -43,3 +43,18 @@ def test_conversion():
     assert len(handlers) == 1
     handler = handlers[0]
     assert handler.catch_type == exception_name
+
+
+def test_handlers_by_pc():
+    inner = ExceptionHandler(start_pc=2, end_pc=4, handler_pc=10, catch_type=NPE_CLASS_NAME)
+    outer = ExceptionHandler(start_pc=0, end_pc=6, handler_pc=12, catch_type='java/lang/Throwable')
+    later = ExceptionHandler(start_pc=8, end_pc=9, handler_pc=14, catch_type='java/lang/Throwable')
+    handlers = Handlers([inner, outer, later])
+
+    assert [handlers.find_handlers(pc) for pc in range(10)] == [
+        (outer,), (outer,), (inner, outer), (inner, outer), (outer,), (outer,), (), (), (later,), ()
+    ]
+    assert handlers.find_handlers(1000) == ()
+    assert Handlers().find_handlers(0) == ()
+    for pc in range(10):
+        assert handlers.find_handlers(pc) == tuple(h for h in handlers.handlers if h.relevant_to_pc(pc))
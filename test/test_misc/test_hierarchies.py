@@ -3,8 +3,8 @@
 These tests rely heavily on the relationship of three classes in the java/io package:
 `FileOutputStream` derives from `OutputStream` which implements `Closeable`
 """
-from pyjvm.core.hierarchies import does_type_derive_from, simple_instance_check
-from pyjvm.core.jvm_types import ObjectReferenceType, ArrayReferenceType
+from pyjvm.core.hierarchies import does_type_derive_from, simple_instance_check, is_assignable
+from pyjvm.core.jvm_types import ObjectReferenceType, ArrayReferenceType, RootObjectType
 from pyjvm.utils.utils import class_as_descriptor
 
 _IO = 'java/io/'
@@ -52,5 +52,18 @@ def test_instance_of_parent_interface(std_loader):
     assert simple_instance_check(FILE_OUTPUT_STREAM, CLOSEABLE, std_loader)
 
 
+def test_assignable_arrays():
+    streams = ArrayReferenceType(ObjectReferenceType(OUTPUT_STREAM))
+    assert is_assignable(streams, RootObjectType, None)
+    assert is_assignable(streams, ObjectReferenceType('java/lang/Cloneable'), None)
+    assert is_assignable(ArrayReferenceType(streams), ArrayReferenceType(RootObjectType), None)
+    assert not is_assignable(streams, ObjectReferenceType(OUTPUT_STREAM), None)
+
+
+def test_assignable_classes(std_loader):
+    assert is_assignable(ObjectReferenceType(FILE_OUTPUT_STREAM), ObjectReferenceType(CLOSEABLE), std_loader)
+    assert not is_assignable(ObjectReferenceType(OUTPUT_STREAM), ObjectReferenceType(FILE_OUTPUT_STREAM), std_loader)
+
+
 def _add_dimensions_to_descriptor(descriptor, dimensions=1):
     return '[' * dimensions + descriptor
@@ -0,0 +1,52 @@
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.jvm_class import InstructionTable
+from pyjvm.utils.utils import named_tuple_replace
+
+# Positions as they would be in a method with instructions of different sizes
+POSITIONS = [0, 1, 4, 5, 8]
+
+
+def _table(positions=None):
+    if positions is None:
+        positions = POSITIONS
+    instructions = [named_tuple_replace(Instruction.create('nop'), pos=pos) for pos in positions]
+    return InstructionTable(instructions)
+
+
+def test_index_at_instruction_positions():
+    table = _table()
+    for index, pos in enumerate(POSITIONS):
+        assert table.index_at(pos) == index
+
+
+def test_index_between_instructions():
+    table = _table()
+    assert table.index_at(2) == 2
+    assert table.index_at(3) == 2
+    assert table.index_at(6) == 4
+
+
+def test_index_past_the_end():
+    table = _table()
+    assert table.index_at(table.end_pc) == table.end
+    assert table.index_at(table.end_pc + 100) == table.end
+
+
+def test_pc_after():
+    table = _table()
+    assert table.pc_after(0) == 1
+    assert table.pc_after(1) == 4
+    assert table.index_at(table.pc_after(len(POSITIONS) - 1)) == table.end
+
+
+def test_identical_positions():
+    # Instructions that are created for tests are all at position 0
+    table = _table([0, 0])
+    assert table.index_at(0) == 0
+    assert table.index_at(table.pc_after(0)) == table.end
+
+
+def test_empty():
+    table = _table([])
+    assert table.index_at(0) == table.end
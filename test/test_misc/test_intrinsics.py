@@ -0,0 +1,75 @@
+import pytest
+from jawa.cf import ClassFile
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.intrinsics import IntrinsicRegistry, ARRAY_CLASS, report
+from pyjvm.core.jvm_class import MethodKey
+from pyjvm.core.jvm_types import Integer
+from pyjvm.core.machine import ENGINES
+from test.utils import create_program, run_program, program_result, result_field_ref, literal_instruction, \
+    constant_instruction, static_method
+
+MATH = 'java/lang/Math'
+MAX_KEY = MethodKey('max', '(II)I')
+
+
+def _constant(machine, args):
+    return Integer.create_instance(1)
+
+
+def test_registry():
+    registry = IntrinsicRegistry()
+    registry.add(MATH, MAX_KEY, _constant)
+    with pytest.raises(ValueError):
+        registry.add(MATH, MAX_KEY, _constant)
+    registry.add(ARRAY_CLASS, MAX_KEY, _constant, required=True)
+
+    assert registry.find(MATH, MAX_KEY).function is _constant
+    assert registry.find(MATH, MAX_KEY, optional=False) is None
+    assert registry.find('[[J', MAX_KEY, optional=False).class_name == ARRAY_CLASS
+    assert registry.find(MATH, MethodKey('min', '(II)I')) is None
+    assert len(registry) == 2
+
+    method = registry.method(MATH, MAX_KEY)
+    assert method is registry.method(MATH, MAX_KEY)
+    assert len(method.args) == 2
+    assert method.intrinsic(None, []) == Integer.create_instance(1)
+
+
+def _maximums(constants):
+    """Store max(2, 7) + max(3, 1)"""
+    max_ref = constants.create_method_ref(MATH, MAX_KEY.name, MAX_KEY.descriptor)
+    return [
+        Instruction.create('iconst_2'),
+        literal_instruction('bipush', 7),
+        constant_instruction('invokestatic', max_ref),
+        Instruction.create('iconst_3'),
+        Instruction.create('iconst_1'),
+        constant_instruction('invokestatic', max_ref),
+        Instruction.create('iadd'),
+        constant_instruction('putstatic', result_field_ref(constants)),
+        Instruction.create('return')
+    ]
+
+
+def _bytecode_math():
+    """A Math class whose max always returns its first argument, to tell it apart from the intrinsic"""
+    cf = ClassFile.create(MATH)
+    static_method(cf, MAX_KEY.name, MAX_KEY.descriptor, [('iload_0',), ('ireturn',)])
+    return cf
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_intrinsics_are_counted(engine):
+    machine = run_program(create_program(_maximums), _bytecode_math(), engine=engine)
+    assert program_result(machine) == 10
+    intrinsic, = machine.intrinsic_counts
+    assert str(intrinsic) == 'java/lang/Math#max(II)I'
+    assert report(machine.intrinsic_counts) == ['java/lang/Math#max(II)I: 2']
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_intrinsics_can_be_disabled(engine):
+    machine = run_program(create_program(_maximums), _bytecode_math(), engine=engine, intrinsics=False)
+    assert program_result(machine) == 5
+    assert not machine.intrinsic_counts
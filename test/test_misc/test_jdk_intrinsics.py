@@ -0,0 +1,158 @@
+import math
+
+import pytest
+
+from pyjvm.core import jdk_intrinsics
+from pyjvm.core.intrinsics import IntrinsicThrow, default_registry
+from pyjvm.core.jvm_class import MethodKey
+from pyjvm.core.jvm_types import Integer, Long, Float, Double, NULL_VALUE
+from pyjvm.core.machine import Machine
+from pyjvm.utils.jawa_conversions import string_instance
+from test.utils import dummy_loader
+
+TYPES = {'I': Integer, 'J': Long, 'F': Float, 'D': Double, 'C': Integer}
+
+
+def _call(class_name, name, descriptor, *args):
+    """Call the intrinsic of a static method with Python values, and return the value of its result"""
+    intrinsic = default_registry().find(f'java/lang/{class_name}', MethodKey(name, descriptor))
+    arg_letters = descriptor[1:descriptor.index(')')].replace('Ljava/lang/String;', 'S')
+    values = [
+        (NULL_VALUE if arg is None else string_instance(arg)) if letter == 'S' else TYPES[letter].create_instance(arg)
+        for letter, arg in zip(arg_letters, args)
+    ]
+    return intrinsic(None, values)
+
+
+def _value(*args):
+    return _call(*args).value
+
+
+def _string(*args):
+    return jdk_intrinsics._text(_call(*args).value)
+
+
+def test_math():
+    assert _value('Math', 'max', '(II)I', 3, -4) == 3
+    assert _value('Math', 'abs', '(I)I', -2 ** 31) == -2 ** 31
+    assert math.copysign(1.0, _value('Math', 'max', '(DD)D', -0.0, 0.0)) == 1.0
+    assert math.copysign(1.0, _value('Math', 'min', '(FF)F', 0.0, -0.0)) == -1.0
+    assert math.isnan(_value('Math', 'min', '(DD)D', math.nan, 1.0))
+    assert math.isnan(_value('Math', 'sqrt', '(D)D', -1.0))
+    assert _value('Math', 'log', '(D)D', 0.0) == -math.inf
+    assert _value('Math', 'pow', '(DD)D', -0.0, -3.0) == -math.inf
+    assert math.isnan(_value('Math', 'pow', '(DD)D', 1.0, math.nan))
+    assert math.copysign(1.0, _value('Math', 'ceil', '(D)D', -0.5)) == -1.0
+    assert _value('Math', 'rint', '(D)D', 2.5) == 2.0
+    assert _value('Math', 'round', '(D)J', -2.5) == -2
+    assert _value('Math', 'round', '(D)J', 0.49999999999999994) == 0
+    assert _value('Math', 'round', '(F)I', 1e20) == 2 ** 31 - 1
+
+
+@pytest.mark.parametrize('dividend, divisor', [
+    (5.0, 3.0), (-5.0, 3.0), (2.5, 1.0), (3.5, 1.0), (-0.0, 2.0), (4.0, 2.0), (-4.0, 2.0), (1e308, 1e-308),
+    (0.1, 0.03), (7.0, math.inf), (math.inf, 2.0), (1.0, 0.0), (math.nan, 1.0), (1.0, -math.nan)
+])
+def test_ieee_remainder(dividend, divisor):
+    expected = _value('Math', 'IEEEremainder', '(DD)D', dividend, divisor)
+    actual = jdk_intrinsics._remainder(dividend, divisor)
+    if math.isnan(expected):
+        assert math.isnan(actual)
+    else:
+        assert (actual, math.copysign(1.0, actual)) == (expected, math.copysign(1.0, expected))
+
+
+def test_bits():
+    assert _value('Float', 'floatToIntBits', '(F)I', 1.0) == 0x3f800000
+    assert _value('Double', 'doubleToLongBits', '(D)J', -0.0) == -2 ** 63
+    assert _value('Double', 'longBitsToDouble', '(J)D', 0x3ff0000000000000) == 1.0
+    assert _call('Float', 'isNaN', '(F)Z', math.nan) == Integer.create_instance(1)
+    assert _value('Integer', 'bitCount', '(I)I', -1) == 32
+    assert _value('Integer', 'highestOneBit', '(I)I', -1) == -2 ** 31
+    assert _value('Long', 'lowestOneBit', '(J)J', 12) == 4
+    assert _value('Long', 'numberOfLeadingZeros', '(J)I', 1) == 63
+    assert _value('Integer', 'numberOfTrailingZeros', '(I)I', 0) == 32
+    assert _value('Integer', 'reverse', '(I)I', 1) == -2 ** 31
+    assert _value('Integer', 'reverseBytes', '(I)I', 0x01020304) == 0x04030201
+    assert _value('Integer', 'rotateLeft', '(II)I', -2 ** 31, 1) == 1
+    assert _value('Long', 'rotateRight', '(JI)J', 1, 1) == -2 ** 63
+    assert _value('Long', 'signum', '(J)I', -5) == -1
+
+
+def test_character():
+    assert _value('Character', 'isDigit', '(C)Z', ord('7')) == 1
+    assert _value('Character', 'isLetter', '(I)Z', 0x110000) == 0
+    assert _value('Character', 'isWhitespace', '(C)Z', 0xa0) == 0
+    assert _value('Character', 'isSpaceChar', '(C)Z', 0xa0) == 1
+    assert _value('Character', 'toUpperCase', '(C)C', ord('a')) == ord('A')
+    assert _value('Character', 'toUpperCase', '(C)C', ord('ß')) == ord('ß')
+    assert _value('Character', 'digit', '(CI)I', ord('f'), 16) == 15
+    assert _value('Character', 'digit', '(CI)I', ord('9'), 8) == -1
+    assert _value('Character', 'forDigit', '(II)C', 11, 16) == ord('b')
+
+
+def test_parsing():
+    assert _value('Integer', 'parseInt', '(Ljava/lang/String;)I', '-2147483648') == -2 ** 31
+    assert _value('Integer', 'parseInt', '(Ljava/lang/String;I)I', '+ff', 16) == 255
+    assert _value('Long', 'parseLong', '(Ljava/lang/String;)J', '9223372036854775807') == 2 ** 63 - 1
+    assert _value('Double', 'parseDouble', '(Ljava/lang/String;)D', ' 1.5e3d ') == 1500.0
+    assert _value('Double', 'parseDouble', '(Ljava/lang/String;)D', '0x1p4') == 16.0
+    assert _value('Float', 'parseFloat', '(Ljava/lang/String;)F', '0.1') == 0.10000000149011612
+
+
+@pytest.mark.parametrize('class_name, descriptor, text', [
+    ('Integer', '(Ljava/lang/String;)I', '2147483648'),
+    ('Integer', '(Ljava/lang/String;)I', '1_000'),
+    ('Integer', '(Ljava/lang/String;)I', ' 1'),
+    ('Integer', '(Ljava/lang/String;)I', '-'),
+    ('Integer', '(Ljava/lang/String;)I', None),
+    ('Double', '(Ljava/lang/String;)D', 'inf'),
+    ('Double', '(Ljava/lang/String;)D', '1_0'),
+])
+def test_parsing_failures(class_name, descriptor, text):
+    name = 'parseInt' if class_name == 'Integer' else 'parseDouble'
+    with pytest.raises(IntrinsicThrow) as info:
+        _call(class_name, name, descriptor, text)
+    assert info.value.class_name == 'java/lang/NumberFormatException'
+
+
+@pytest.mark.parametrize('class_name, descriptor, args, expected', [
+    ('Integer', '(I)Ljava/lang/String;', [-42], '-42'),
+    ('Integer', '(II)Ljava/lang/String;', [255, 16], 'ff'),
+    ('Long', '(JI)Ljava/lang/String;', [-255, 99], '-255'),
+    ('Double', '(D)Ljava/lang/String;', [1.0], '1.0'),
+    ('Double', '(D)Ljava/lang/String;', [0.001], '0.001'),
+    ('Double', '(D)Ljava/lang/String;', [1e7], '1.0E7'),
+    ('Double', '(D)Ljava/lang/String;', [-1.25e-5], '-1.25E-5'),
+    ('Double', '(D)Ljava/lang/String;', [-0.0], '-0.0'),
+    ('Double', '(D)Ljava/lang/String;', [-math.inf], '-Infinity'),
+    ('Float', '(F)Ljava/lang/String;', [0.10000000149011612], '0.1'),
+    ('Float', '(F)Ljava/lang/String;', [3.4028234663852886e+38], '3.4028235E38'),
+])
+def test_to_string(class_name, descriptor, args, expected):
+    assert _string(class_name, 'toString', descriptor, *args) == expected
+
+
+def test_unsigned_strings_and_value_of():
+    assert _string('Integer', 'toHexString', '(I)Ljava/lang/String;', -1) == 'ffffffff'
+    assert _string('Long', 'toBinaryString', '(J)Ljava/lang/String;', 5) == '101'
+    assert _string('Integer', 'toOctalString', '(I)Ljava/lang/String;', 8) == '10'
+    assert _string('String', 'valueOf', '(C)Ljava/lang/String;', ord('x')) == 'x'
+    assert _string('String', 'valueOf', '(J)Ljava/lang/String;', 2 ** 40) == str(2 ** 40)
+
+
+def test_null_strings_throw():
+    with pytest.raises(IntrinsicThrow) as info:
+        _call('Double', 'parseDouble', '(Ljava/lang/String;)D', None)
+    assert info.value.class_name == 'java/lang/NullPointerException'
+
+
+def test_intern():
+    key = MethodKey('intern', '(Ljava/lang/String;)Ljava/lang/String;')
+    intern = default_registry().find('java/lang/VMString', key)
+    assert intern.required
+    machine = Machine(dummy_loader())
+    first, second = string_instance('interned'), string_instance('interned')
+    assert intern(machine, [first]) is first
+    assert intern(machine, [second]) is first
+    assert intern(Machine(dummy_loader()), [second]) is second
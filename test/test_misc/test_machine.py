@@ -0,0 +1,23 @@
+import pytest
+
+from pyjvm.core.machine import ENGINES
+
+from test.utils import create_program, run_program, program_result, sum_loop, deep_throw
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_loop(engine):
+    machine = run_program(create_program(sum_loop), engine=engine)
+    assert program_result(machine) == sum(range(10))
+    assert machine.frames.size() == 0
+
+
+# Deeper than the Python recursion limit
+DEPTH = 3000
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_unwinding_deep_stacks(engine):
+    machine = run_program(*deep_throw(DEPTH), engine=engine)
+    assert program_result(machine) == 1
+    assert machine.frames.size() == 0
@@ -0,0 +1,54 @@
+import io
+from zipfile import ZipFile
+
+import pytest
+
+from pyjvm.core.class_loaders import TraditionalLoader, _referenced_class_name
+from pyjvm.core.frame import Frame
+from pyjvm.core.machine import Machine
+from test.utils import calls_and_exceptions, program_result, PROGRAM_CLASS_NAME, RUN_METHOD_KEY, \
+    EXCEPTION_CLASS_NAME
+
+
+@pytest.fixture
+def loader(tmp_path):
+    """A TraditionalLoader with the classes of `calls_and_exceptions` in a JAR"""
+    path = tmp_path / 'program.jar'
+    with ZipFile(path, 'w') as archive:
+        for cf in calls_and_exceptions():
+            out = io.BytesIO()
+            cf.save(out)
+            archive.writestr(f'{cf.this.name.value}.class', out.getvalue())
+    return TraditionalLoader(str(path))
+
+
+def test_referenced_class_name():
+    assert _referenced_class_name('java/lang/String') == 'java/lang/String'
+    assert _referenced_class_name('[Ljava/lang/String;') == 'java/lang/String'
+    assert _referenced_class_name('[[Ljava/lang/Object;') == 'java/lang/Object'
+    assert _referenced_class_name('[I') is None
+
+
+def test_preload(loader):
+
+    assert loader.preload([PROGRAM_CLASS_NAME, 'Missing'], workers=2) == 1
+    assert loader.preload([PROGRAM_CLASS_NAME], workers=2) == 0
+    loader.get_the_class(EXCEPTION_CLASS_NAME)
+    assert loader.preload([EXCEPTION_CLASS_NAME], workers=2) == 0
+
+
+def test_preloaded_classes_run(loader):
+    assert loader.preload([PROGRAM_CLASS_NAME, EXCEPTION_CLASS_NAME], workers=2) == 2
+
+    machine = Machine(loader)
+    jvm_class = loader.get_the_class(PROGRAM_CLASS_NAME)
+    machine.frames.push(Frame.from_class_and_method(jvm_class, jvm_class.methods[RUN_METHOD_KEY]))
+    machine.run()
+    assert program_result(machine) == sum(range(10)) + 100
+
+
+def test_transitive_preload(loader):
+    # Loaded classes are not preloaded, so the classes that java/lang/Object refers to are not reached
+    loader.get_the_class('java/lang/Object')
+
+    assert loader.preload([PROGRAM_CLASS_NAME], transitive=True, workers=2) == 2
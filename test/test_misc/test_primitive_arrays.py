@@ -0,0 +1,64 @@
+import pytest
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.jvm_types import Integer, Long, Float
+from pyjvm.core.machine import ENGINES
+from pyjvm.core.primitive_arrays import PrimitiveArray
+from pyjvm.utils import value_array_type_indicators
+from test.utils import create_program, run_program, program_result, result_field_ref, literal_instruction, \
+    constant_instruction
+
+BOOLEAN, CHAR, FLOAT, DOUBLE, BYTE, SHORT, INT, LONG = range(4, 12)
+
+
+def test_element_widths():
+    widths = {indicator: PrimitiveArray.create(indicator, 0).buffer.itemsize for indicator in range(4, 12)}
+    assert widths == {BOOLEAN: 1, CHAR: 2, FLOAT: 4, DOUBLE: 8, BYTE: 1, SHORT: 2, INT: 4, LONG: 8}
+
+
+def test_defaults_and_boxing():
+    array = PrimitiveArray.create(INT, 3)
+    assert len(array) == 3
+    assert array == [Integer.create_instance(0)] * 3
+    array[1] = Integer.create_instance(7)
+    assert array.load(1) == 7
+    assert array[1] == Integer.create_instance(7)
+    assert PrimitiveArray.create(LONG, 1)[0] == Long.create_instance(0)
+    assert PrimitiveArray.create(FLOAT, 1)[0] == Float.create_instance(0.0)
+    assert array.element_type == value_array_type_indicators.type_by_indicator(INT)
+
+
+@pytest.mark.parametrize('indicator, stored, loaded', [
+    (BYTE, 200, -56),
+    (SHORT, 40000, -25536),
+    (CHAR, -1, 65535),
+    (INT, 2 ** 31, -2 ** 31),
+    (LONG, 2 ** 63, -2 ** 63),
+    (INT, 2.7, 2)
+])
+def test_stores_narrow_to_the_width(indicator, stored, loaded):
+    array = PrimitiveArray.create(indicator, 1)
+    array.store(0, stored)
+    assert array.load(0) == loaded
+
+
+def _byte_array_round_trip(constants):
+    """Store 300 in a byte array and load it back"""
+    return [
+        Instruction.create('iconst_1'),
+        literal_instruction('newarray', BYTE),
+        Instruction.create('dup'),
+        Instruction.create('iconst_0'),
+        literal_instruction('sipush', 300),
+        Instruction.create('bastore'),
+        Instruction.create('iconst_0'),
+        Instruction.create('baload'),
+        constant_instruction('putstatic', result_field_ref(constants)),
+        Instruction.create('return')
+    ]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_use_typed_buffers(engine):
+    machine = run_program(create_program(_byte_array_round_trip), engine=engine)
+    assert program_result(machine) == 44
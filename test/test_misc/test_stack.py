@@ -0,0 +1,65 @@
+import pytest
+
+from pyjvm.core.stack import Stack
+
+
+@pytest.mark.parametrize('max_depth', [None, 4])
+def test_push_and_pop(max_depth):
+    stack = Stack(max_depth=max_depth)
+    for value in range(4):
+        stack.push(value)
+    assert stack.size() == 4
+    assert [stack.pop() for _ in range(4)] == [3, 2, 1, 0]
+    assert stack.size() == 0
+
+
+def test_initial_values_are_top_first():
+    stack = Stack(values=[1, 2, 3])
+    assert stack.peek() == 1
+    assert stack.peek(2) == 3
+    assert list(stack) == [1, 2, 3]
+    assert stack.peek_many(2) == [1, 2]
+    assert stack.peek_many(10) == [1, 2, 3]
+    assert stack.peek_many(0) == []
+
+
+def test_peek_out_of_range():
+    stack = Stack(values=[1], max_depth=3)
+    with pytest.raises(IndexError):
+        stack.peek(1)
+
+
+def test_pop_empty():
+    with pytest.raises(IndexError):
+        Stack(max_depth=3).pop()
+
+
+@pytest.mark.parametrize('max_depth', [None, 5])
+def test_insert_at_offset(max_depth):
+    stack = Stack(values=[1, 2, 3], max_depth=max_depth)
+    stack.insert_at_offset(2, 'a')
+    assert list(stack) == [1, 2, 'a', 3]
+    stack.insert_at_offset(0, 'b')
+    assert list(stack) == ['b', 1, 2, 'a', 3]
+    stack.insert_at_offset(5, 'c')
+    assert list(stack) == ['b', 1, 2, 'a', 3, 'c']
+
+
+def test_overflow():
+    stack = Stack(max_depth=1)
+    stack.push(1)
+    # A single value beyond the maximum depth is tolerated
+    stack.push(2)
+    with pytest.raises(OverflowError):
+        stack.push(3)
+    with pytest.raises(OverflowError):
+        stack.insert_at_offset(1, 3)
+
+
+def test_clear_reuses_slots():
+    stack = Stack(values=[1, 2], max_depth=2)
+    stack.clear()
+    assert stack.size() == 0
+    assert list(stack) == []
+    stack.push(3)
+    assert list(stack) == [3]
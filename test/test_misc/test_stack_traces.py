@@ -0,0 +1,69 @@
+from jawa.constants import ConstantPool
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.frame import Frame
+from pyjvm.core.intrinsics import default_registry
+from pyjvm.core.jvm_class import JvmClass, BytecodeMethod, MethodKey
+from pyjvm.core.jvm_types import ObjectReferenceType, Integer
+from pyjvm.core.machine import Machine
+from pyjvm.core.stack_traces import StackTrace, VM_THROWABLE, STACK_TRACE_ELEMENT
+from pyjvm.utils.jawa_conversions import string_text
+from test.utils import create_program, program_loader, sum_loop, PROGRAM_CLASS_NAME, RUN_METHOD_KEY, \
+    EXCEPTION_CLASS_NAME
+
+STRING = ObjectReferenceType('java/lang/String')
+
+
+def _method(name):
+    return BytecodeMethod(
+        name=name, descriptor='()V', instructions=[Instruction.create('return')], max_locals=1, max_stack=1, args=[]
+    )
+
+
+def _machine_in_constructor():
+    """Return a machine that runs the constructor of an exception, called by the program's `run`, and the exception"""
+    loader = program_loader(create_program(sum_loop))
+    loader.classes[EXCEPTION_CLASS_NAME] = JvmClass(EXCEPTION_CLASS_NAME, 'java/lang/Object', ConstantPool())
+    loader.classes[STACK_TRACE_ELEMENT] = JvmClass(STACK_TRACE_ELEMENT, 'java/lang/Object', ConstantPool(), fields={
+        'declaringClass': STRING,
+        'methodName': STRING,
+        'lineNumber': Integer
+    })
+    machine = Machine(loader)
+    exception = machine.create_instance(EXCEPTION_CLASS_NAME)
+    program = loader.get_the_class(PROGRAM_CLASS_NAME)
+    run = Frame.from_class_and_method(program, program.methods[RUN_METHOD_KEY])
+    run.pc = 4
+    machine.frames.push(run)
+    for name in ['<init>', 'fillInStackTrace']:
+        frame = Frame.from_class_and_method(loader.get_the_class(EXCEPTION_CLASS_NAME), _method(name))
+        frame.locals.store(0, exception)
+        machine.frames.push(frame)
+    return machine, exception
+
+
+def _intrinsic(name, descriptor):
+    return default_registry().find(VM_THROWABLE, MethodKey(name, descriptor), optional=False)
+
+
+def test_capture_skips_the_construction_of_the_throwable():
+    machine, exception = _machine_in_constructor()
+    vm_throwable = _intrinsic('fillInStackTrace', '(Ljava/lang/Throwable;)Ljava/lang/VMThrowable;')(
+        machine, [exception]
+    )
+    assert vm_throwable.type.refers_to == VM_THROWABLE
+    assert vm_throwable.value.frames == ((PROGRAM_CLASS_NAME, RUN_METHOD_KEY.name, 4),)
+
+
+def test_elements_are_created_on_demand():
+    machine, exception = _machine_in_constructor()
+    trace = StackTrace.capture(machine, exception)
+    machine.frames.pop()
+    elements = _intrinsic('getStackTrace', '(Ljava/lang/Throwable;)[Ljava/lang/StackTraceElement;')(
+        machine, [trace, exception]
+    )
+    element, = elements.value
+    fields = element.value.fields
+    assert string_text(fields['declaringClass'].value) == PROGRAM_CLASS_NAME
+    assert string_text(fields['methodName'].value) == RUN_METHOD_KEY.name
+    assert fields['lineNumber'] == Integer.create_instance(-1)
@@ -0,0 +1,86 @@
+import pytest
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.machine import DIRECT_ENGINE, ACTIONS_ENGINE, Machine
+from pyjvm.instructions.superinstructions import fuse, validate_patterns, PairProfile, DEFAULT_PATTERNS
+from pyjvm.utils.utils import named_tuple_replace
+from test.utils import create_program, run_program, program_result, sum_loop, dummy_loader
+
+
+def _instructions(*names):
+    return [named_tuple_replace(Instruction.create(name), pos=pos) for pos, name in enumerate(names)]
+
+
+def _recording_handlers(amount, log):
+    def create(index):
+        def handler(_):
+            log.append(index)
+
+        return handler
+
+    return tuple(create(index) for index in range(amount))
+
+
+def test_fuse_replaces_only_the_first_handler():
+    instructions = _instructions('iload_1', 'iload_2', 'iadd', 'istore_3', 'return')
+    log = []
+    handlers = _recording_handlers(len(instructions), log)
+    fused = fuse(instructions, handlers, validate_patterns(DEFAULT_PATTERNS))
+
+    fused[0](None)
+    assert log == [0, 1, 2, 3]
+    assert fused[1:] == handlers[1:]
+
+
+def test_no_match():
+    instructions = _instructions('iload_1', 'iconst_1', 'iadd', 'istore_3')
+    handlers = _recording_handlers(len(instructions), [])
+    assert fuse(instructions, handlers, validate_patterns(DEFAULT_PATTERNS)) == handlers
+
+
+def test_family_does_not_match_other_names():
+    instructions = _instructions('aload_1', 'getfield')
+    handlers = _recording_handlers(len(instructions), [])
+    assert fuse(instructions, handlers, validate_patterns([('aload_0', 'getfield')])) == handlers
+
+
+@pytest.mark.parametrize('pattern', [
+    ('iload',),
+    ('goto', 'iload'),
+    ('getfield', 'iadd'),
+])
+def test_invalid_patterns(pattern):
+    with pytest.raises(ValueError):
+        validate_patterns([pattern])
+
+
+def test_only_direct_engine():
+    with pytest.raises(ValueError):
+        Machine(dummy_loader(), engine=ACTIONS_ENGINE, superinstructions=DEFAULT_PATTERNS)
+
+
+def test_default_patterns():
+    assert Machine(dummy_loader(), engine=DIRECT_ENGINE).superinstructions == DEFAULT_PATTERNS
+    assert Machine(dummy_loader(), engine=DIRECT_ENGINE, echo=print).superinstructions == ()
+    assert Machine(dummy_loader(), engine=DIRECT_ENGINE, pair_profile=PairProfile()).superinstructions == ()
+    assert Machine(dummy_loader()).superinstructions == ()
+
+
+def test_profile_and_fuse(tmp_path):
+    profile = PairProfile()
+    machine = run_program(create_program(sum_loop), engine=DIRECT_ENGINE, superinstructions=(), pair_profile=profile)
+    assert program_result(machine) == sum(range(10))
+
+    # The loop body executes 10 times, the condition 11 times
+    assert profile.counts[('iload_2', 'if_icmpge')] == 11
+    assert profile.counts[('iload_1', 'iload_2')] == 10
+    assert ('goto', 'bipush') not in profile.counts
+
+    path = tmp_path / 'profile.json'
+    profile.save(path)
+    patterns = PairProfile.load(path).patterns(limit=4)
+    assert len(patterns) == 4
+    assert ('bipush', 'iload_2') in patterns
+
+    machine = run_program(create_program(sum_loop), engine=DIRECT_ENGINE, superinstructions=patterns)
+    assert program_result(machine) == sum(range(10))
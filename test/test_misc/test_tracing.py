@@ -0,0 +1,81 @@
+import io
+
+import pytest
+
+from pyjvm.core import tracing
+from pyjvm.core.machine import Machine, ENGINES, ACTIONS_ENGINE, DIRECT_ENGINE
+from pyjvm.core.tracing import BinaryTracer, EchoTracer, TraceFilter, read_trace, summarize, METHOD_ENTER, \
+    METHOD_EXIT, INSTRUCTION, ACTION
+from test.utils import run_program, program_result, calls_and_exceptions, dummy_loader, PROGRAM_CLASS_NAME
+
+ADD_METHOD = f'{PROGRAM_CLASS_NAME}#add(II)I'
+
+
+def _trace(engine, trace_filter=None):
+    stream = io.BytesIO()
+    machine = run_program(*calls_and_exceptions(), engine=engine, tracer=BinaryTracer(stream, trace_filter))
+    assert program_result(machine) == sum(range(10)) + 100
+    return list(read_trace(io.BytesIO(stream.getvalue())))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_binary_trace(engine):
+    events = _trace(engine)
+    enters = [e for e in events if e.kind == METHOD_ENTER and e.method == ADD_METHOD]
+    exits = [e for e in events if e.kind == METHOD_EXIT and e.method == ADD_METHOD]
+    assert len(enters) == len(exits) == 10
+    assert all(e.depth == 2 for e in enters + exits)
+
+    add_instructions = [e.mnemonic for e in events if e.kind == INSTRUCTION and e.method == ADD_METHOD]
+    assert add_instructions[:4] == ['iload_0', 'iload_1', 'iadd', 'ireturn']
+    has_actions = any(e.kind == ACTION for e in events)
+    assert has_actions == (engine == ACTIONS_ENGINE)
+
+
+def test_filters():
+    events = _trace(ACTIONS_ENGINE, TraceFilter(methods=['*#add*'], opcodes=['iadd']))
+    assert {e.method for e in events} == {ADD_METHOD}
+    assert {e.mnemonic for e in events if e.kind == INSTRUCTION} == {'iadd'}
+    assert {e.action for e in events if e.kind == ACTION} == {'Push', 'Pop', 'IncrementProgramCounter'}
+
+    events = _trace(ACTIONS_ENGINE, TraceFilter(max_depth=1))
+    assert max(e.depth for e in events) == 1
+    assert ADD_METHOD not in {e.method for e in events}
+
+
+def test_echo():
+    lines = []
+    run_program(*calls_and_exceptions(), engine=DIRECT_ENGINE, echo=lines.append)
+    assert f'|  |  -> {ADD_METHOD}' in lines
+    assert f'|  |  <- {ADD_METHOD}' in lines
+
+    filtered = []
+    tracer = EchoTracer(filtered.append, TraceFilter(opcodes=['ireturn']))
+    run_program(*calls_and_exceptions(), engine=DIRECT_ENGINE, tracer=tracer)
+    assert len([line for line in filtered if 'ireturn' in line]) == 10
+
+
+def test_summary():
+    lines = summarize(_trace(ACTIONS_ENGINE), limit=1)
+    assert lines[0].endswith('maximal depth 2')
+    assert '  enter: 12' in lines
+    assert lines[lines.index('Methods by entries:') + 1].endswith(ADD_METHOD)
+
+
+def test_invalid_traces():
+    with pytest.raises(ValueError):
+        list(read_trace(io.BytesIO(b'not a trace')))
+    stream = io.BytesIO()
+    BinaryTracer(stream)._write(METHOD_ENTER, 1, 0)
+    with pytest.raises(ValueError):
+        list(read_trace(io.BytesIO(stream.getvalue())))
+    with pytest.raises(ValueError):
+        list(read_trace(io.BytesIO(stream.getvalue()[:-1])))
+
+
+def test_untraced_machines_do_not_check_for_a_tracer():
+    assert Machine(dummy_loader())._run_instruction.__func__ is Machine._run_instruction
+    traced = Machine(dummy_loader(), tracer=tracing.EchoTracer(print))
+    assert traced._run_instruction.__func__ is Machine._run_traced_instruction
+    with pytest.raises(ValueError):
+        Machine(dummy_loader(), echo=print, tracer=tracing.EchoTracer(print))
@@ -0,0 +1,52 @@
+from jawa.constants import ConstantPool
+
+from pyjvm.core.class_loaders import FixedClassLoader
+from pyjvm.core.hierarchies import TypeCheckCache, type_key
+from pyjvm.core.jvm_class import JvmClass
+from pyjvm.core.jvm_types import RootObjectType, ObjectReferenceType, ArrayReferenceType, Integer
+from pyjvm.utils.utils import class_as_descriptor
+
+
+def _loader():
+    def create(name, base=RootObjectType.refers_to, interfaces=()):
+        return name, JvmClass(name, base, ConstantPool(), interfaces=interfaces)
+
+    return FixedClassLoader(dict([
+        create(RootObjectType.refers_to, None),
+        create('Interface'),
+        create('Base', interfaces=['Interface']),
+        create('Child', 'Base'),
+        create('Other'),
+    ]))
+
+
+def test_ancestor_sets_are_memoized():
+    loader = _loader()
+    ancestors = loader.ancestor_set('Child')
+    assert ancestors == {'Child', 'Base', 'Interface', RootObjectType.refers_to}
+    assert loader.ancestor_set('Child') is ancestors
+    assert loader['Base'].ancestors == {'Base', 'Interface', RootObjectType.refers_to}
+
+
+def test_cache():
+    loader = _loader()
+    cache = TypeCheckCache(class_as_descriptor('Interface'), loader)
+    child = loader.default_instance('Child')
+    other = loader.default_instance('Other')
+
+    assert cache.is_instance(child)
+    assert cache.is_instance(loader.default_instance('Child'))
+    assert not cache.is_instance(other)
+    assert not cache.is_instance(other)
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_type_keys():
+    keys = {
+        type_key(ObjectReferenceType('Base')),
+        type_key(ObjectReferenceType('Child')),
+        type_key(ArrayReferenceType(ObjectReferenceType('Base'))),
+        type_key(ArrayReferenceType(ArrayReferenceType(ObjectReferenceType('Base')))),
+        type_key(ArrayReferenceType(Integer)),
+    }
+    assert len(keys) == 5
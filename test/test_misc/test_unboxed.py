@@ -0,0 +1,88 @@
+import pytest
+from jawa.constants import ConstantPool
+from jawa.util.bytecode import Instruction
+
+from pyjvm.core.jvm_types import Integer, Float, Long, NULL_VALUE, ObjectReferenceType, JvmObject
+from pyjvm.core.machine import ENGINES, UNBOXED_ENGINE, Machine
+from pyjvm.instructions.unboxed import box, unbox
+from test.utils import create_program, run_program, program_result, result_field_ref, engine_results, \
+    literal_instruction, constant_instruction, dummy_loader, PROGRAM_CLASS_NAME, RESULT_FIELD
+
+
+def test_box_and_unbox():
+    for value in [Integer.create_instance(3), Float.create_instance(1.5)]:
+        assert unbox(value) == value.value
+        assert box(unbox(value)) == value
+    for value in [Long.create_instance(3), NULL_VALUE]:
+        assert unbox(value) is value
+        assert box(value) is value
+
+
+def _frame_state(instruction, op_stack):
+    method_name, pc, stack, locals_ = engine_results(instruction, op_stack=op_stack)[UNBOXED_ENGINE][0]
+    return stack
+
+
+def test_frames_hold_plain_numbers():
+    assert _frame_state('iadd', [Integer.create_instance(1), Integer.create_instance(2)]) == [3]
+    assert _frame_state('i2f', [Integer.create_instance(1)]) == [1.0]
+    assert _frame_state('i2l', [Integer.create_instance(1)]) == [Long.create_instance(1)]
+    assert _frame_state(literal_instruction('bipush', 5), []) == [5]
+
+
+def test_duplication_tells_longs_from_ints():
+    ints = [Integer.create_instance(1), Integer.create_instance(2)]
+    assert _frame_state('dup2', ints) == [1, 2, 1, 2]
+    long = Long.create_instance(1)
+    assert _frame_state('dup2', [long]) == [long, long]
+
+
+def _array_and_long_math(constants):
+    """Store 5 in an int array, load it back, add the long 3 to it and store the result"""
+    return [
+        Instruction.create('iconst_3'),
+        literal_instruction('newarray', 10),
+        Instruction.create('astore_0'),
+        Instruction.create('aload_0'),
+        Instruction.create('iconst_1'),
+        literal_instruction('bipush', 5),
+        Instruction.create('iastore'),
+        Instruction.create('aload_0'),
+        Instruction.create('iconst_1'),
+        Instruction.create('iaload'),
+        Instruction.create('i2l'),
+        constant_instruction('ldc2_w', constants.create_long(3)),
+        Instruction.create('ladd'),
+        Instruction.create('l2i'),
+        constant_instruction('putstatic', result_field_ref(constants)),
+        Instruction.create('return')
+    ]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_heap_values_stay_boxed(engine):
+    machine = run_program(create_program(_array_and_long_math), engine=engine)
+    assert program_result(machine) == 8
+    assert machine.class_loader.get_the_statics(PROGRAM_CLASS_NAME)[RESULT_FIELD] == Integer.create_instance(8)
+
+
+def test_engine_options():
+    with pytest.raises(ValueError):
+        Machine(dummy_loader(), engine=UNBOXED_ENGINE, compile_threshold=1)
+    assert Machine(dummy_loader(), engine=UNBOXED_ENGINE).superinstructions
+
+
+def test_put_fields_that_objects_lack():
+    # Objects such as the ones that `string_instance` creates only have some of the fields of their class
+    constants = ConstantPool()
+    field_ref = constants.create_field_ref('Partial', 'count', 'I')
+    objects = []
+
+    def op_stack():
+        obj = ObjectReferenceType('Partial').create_instance(JvmObject({}))
+        objects.append(obj)
+        return [Integer.create_instance(5), obj]
+
+    results = engine_results(constant_instruction('putfield', field_ref), constants=constants, op_stack=op_stack)
+    assert all(isinstance(result, list) for result in results.values())
+    assert [obj.value.fields['count'] for obj in objects] == [Integer.create_instance(5)] * len(ENGINES)
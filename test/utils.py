@@ -1,14 +1,22 @@
 """Test utilities"""
+from jawa.assemble import assemble, Label
+from jawa.attributes.code import CodeException
+from jawa.cf import ClassFile
 from jawa.constants import ConstantPool
-from jawa.util.bytecode import Instruction
+from jawa.util.bytecode import Instruction, Operand, OperandTypes
 
 from pyjvm.core.actions import IncrementProgramCounter
 from pyjvm.core.class_loaders import FixedClassLoader
+from pyjvm.core.frame import Frame
 from pyjvm.core.frame_locals import Locals
-from pyjvm.core.jvm_types import Integer
+from pyjvm.core.jvm_class import MethodKey, JvmClass, BytecodeMethod
+from pyjvm.core.jvm_types import Integer, RootObjectType
+from pyjvm.core.machine import Machine, ENGINES, Unhandled, UNBOXED_ENGINE
 from pyjvm.core.stack import Stack
 from pyjvm.instructions.instructions import InstructorInputs, execute_instruction
-from pyjvm.utils.utils import literal_operand, constant_operand
+from pyjvm.instructions.unboxed import unbox
+from pyjvm.utils.jawa_conversions import convert_class_file
+from pyjvm.utils.utils import literal_operand, constant_operand, named_tuple_replace
 
 SOME_INT = Integer.create_instance(2)
 
@@ -98,3 +106,312 @@ def constant_instruction(name, constant):
 def literal_instruction(name, literal):
     """Return an instruction named `name` that has exactly one LITERAL operand with the value `literal`"""
     return Instruction.create(name, [literal_operand(literal)])
+
+
+PROGRAM_CLASS_NAME = 'Program'
+RESULT_FIELD = 'result'
+RUN_METHOD_KEY = MethodKey('run', '()V')
+
+
+def create_program(code_factory, max_stack=10, max_locals=10, name=PROGRAM_CLASS_NAME):
+    """Return a `ClassFile` with a static int field named `RESULT_FIELD` and a static method `run()V`
+
+    :param code_factory: A function that takes the class' ConstantPool and returns the instructions of `run`
+    """
+    cf = ClassFile.create(name)
+    field = cf.fields.create(RESULT_FIELD, 'I')
+    field.access_flags.set('acc_static', True)
+    method = cf.methods.create(RUN_METHOD_KEY.name, RUN_METHOD_KEY.descriptor, code=True)
+    method.access_flags.set('acc_static', True)
+    method.code.max_stack = max_stack
+    method.code.max_locals = max_locals
+    method.code.assemble(code_factory(cf.constants))
+    return cf
+
+
+def result_field_ref(constants, name=PROGRAM_CLASS_NAME):
+    """Return a field reference to the result field of the class created by `create_program`"""
+    return constants.create_field_ref(name, RESULT_FIELD, 'I')
+
+
+def program_loader(*class_files):
+    """Return a FixedClassLoader with the converted `class_files` and a bare java/lang/Object"""
+    classes = {RootObjectType.refers_to: JvmClass(RootObjectType.refers_to, None, ConstantPool())}
+    for cf in class_files:
+        jvm_class = convert_class_file(cf)
+        classes[jvm_class.name] = jvm_class
+    return FixedClassLoader(classes)
+
+
+def run_program(cf, *other_class_files, **machine_kwargs):
+    """Run the `run` method of the class created by `create_program` and return the machine that ran it
+
+    `other_class_files` are loaded as well, they can be used by the program.
+    """
+    loader = program_loader(cf, *other_class_files)
+    machine = Machine(loader, **machine_kwargs)
+    jvm_class = loader.get_the_class(cf.this.name.value)
+    machine.frames.push(Frame.from_class_and_method(jvm_class, jvm_class.methods[RUN_METHOD_KEY]))
+    machine.run()
+    return machine
+
+
+def program_result(machine, name=PROGRAM_CLASS_NAME):
+    """Return the value of the result field of the class created by `create_program`"""
+    return machine.class_loader.get_the_statics(name)[RESULT_FIELD].value
+
+
+def _branch(offset):
+    return Operand(OperandTypes.BRANCH, offset)
+
+
+def _literal(value):
+    return Operand(OperandTypes.LITERAL, value)
+
+
+def sum_loop(constants):
+    """Sum the numbers 0 to 9 into the result field, local 1 is the sum and local 2 is the counter"""
+    return [
+        Instruction.create('iconst_0'),  # 0
+        Instruction.create('istore_1'),  # 1
+        Instruction.create('iconst_0'),  # 2
+        Instruction.create('istore_2'),  # 3
+        # BranchComparison sends the operands to the comparison with top-of-stack first
+        Instruction.create('bipush', [_literal(10)]),  # 4
+        Instruction.create('iload_2'),  # 6
+        Instruction.create('if_icmpge', [_branch(14)]),  # 7
+        Instruction.create('iload_1'),  # 10
+        Instruction.create('iload_2'),  # 11
+        Instruction.create('iadd'),  # 12
+        Instruction.create('istore_1'),  # 13
+        Instruction.create('iload_2'),  # 14
+        Instruction.create('iconst_1'),  # 15
+        Instruction.create('iadd'),  # 16
+        Instruction.create('istore_2'),  # 17
+        Instruction.create('goto', [_branch(-14)]),  # 18
+        Instruction.create('iload_1'),  # 21
+        Instruction.create('putstatic', [Operand(OperandTypes.CONSTANT_INDEX, result_field_ref(constants).index)]),
+        Instruction.create('return')
+    ]
+
+
+EXCEPTION_CLASS_NAME = 'Oops'
+
+
+def static_method(cf, name, descriptor, code):
+    """Create a static method in `cf`, `code` is assembled with `jawa.assemble.assemble`"""
+    method = cf.methods.create(name, descriptor, code=True)
+    method.access_flags.set('acc_static', True)
+    method.code.max_stack = 10
+    method.code.max_locals = 10
+    method.code.assemble(assemble(code))
+    return method
+
+
+def calls_and_exceptions():
+    """A program that sums 0 to 9 through calls to `add`, then adds 100 in the handler of an exception"""
+    cf = ClassFile.create(PROGRAM_CLASS_NAME)
+    field = cf.fields.create('result', 'I')
+    field.access_flags.set('acc_static', True)
+    constants = cf.constants
+    add_ref = constants.create_method_ref(PROGRAM_CLASS_NAME, 'add', '(II)I')
+    fail_ref = constants.create_method_ref(PROGRAM_CLASS_NAME, 'fail', '()V')
+    exception_class = constants.create_class(EXCEPTION_CLASS_NAME)
+
+    static_method(cf, 'add', '(II)I', [
+        ('iload_0',),
+        ('iload_1',),
+        ('iadd',),
+        ('ireturn',),
+    ])
+    static_method(cf, 'fail', '()V', [
+        ('new', exception_class),
+        ('athrow',),
+    ])
+    run = static_method(cf, RUN_METHOD_KEY.name, RUN_METHOD_KEY.descriptor, [
+        ('iconst_0',),
+        ('istore_1',),
+        ('iconst_0',),
+        ('istore_2',),
+        Label('loop'),
+        # BranchComparison sends the operands to the comparison with top-of-stack first
+        ('bipush', 10),
+        ('iload_2',),
+        ('if_icmpge', Label('end')),
+        ('iload_1',),
+        ('iload_2',),
+        ('invokestatic', add_ref),
+        ('istore_1',),
+        ('iload_2',),
+        ('iconst_1',),
+        ('iadd',),
+        ('istore_2',),
+        ('goto', Label('loop')),
+        Label('end'),
+        ('invokestatic', fail_ref),
+        ('goto', Label('done')),
+        ('pop',),
+        ('iload_1',),
+        ('bipush', 100),
+        ('iadd',),
+        ('istore_1',),
+        Label('done'),
+        ('iload_1',),
+        ('putstatic', result_field_ref(constants)),
+        ('return',),
+    ])
+
+    positions = [ins.pos for ins in run.code.disassemble()]
+    # The call to `fail`, followed by `goto done` and the handler
+    call_index = len(positions) - 10
+    start, end, handler = positions[call_index:call_index + 3]
+    run.code.exception_table.append(CodeException(start, end, handler, exception_class.index))
+
+    return cf, ClassFile.create(EXCEPTION_CLASS_NAME)
+
+
+def deep_throw(depth):
+    """A program that recurses `depth` frames deep, throws, and stores 1 in the handler at the bottom"""
+    cf = ClassFile.create(PROGRAM_CLASS_NAME)
+    field = cf.fields.create('result', 'I')
+    field.access_flags.set('acc_static', True)
+    constants = cf.constants
+    down_ref = constants.create_method_ref(PROGRAM_CLASS_NAME, 'down', '(I)V')
+    exception_class = constants.create_class(EXCEPTION_CLASS_NAME)
+
+    static_method(cf, 'down', '(I)V', [
+        ('iload_0',),
+        ('ifne', Label('recurse')),
+        ('new', exception_class),
+        ('athrow',),
+        Label('recurse'),
+        ('iload_0',),
+        ('iconst_1',),
+        ('isub',),
+        ('invokestatic', down_ref),
+        ('return',),
+    ])
+    run = static_method(cf, RUN_METHOD_KEY.name, RUN_METHOD_KEY.descriptor, [
+        ('ldc', constants.create_integer(depth)),
+        ('invokestatic', down_ref),
+        ('return',),
+        ('pop',),
+        ('iconst_1',),
+        ('putstatic', result_field_ref(constants)),
+        ('return',),
+    ])
+    # The handler covers the call
+    call, after_call, handler = [ins.pos for ins in run.code.disassemble()][1:4]
+    run.code.exception_table.append(CodeException(call, after_call, handler, exception_class.index))
+    return cf, ClassFile.create(EXCEPTION_CLASS_NAME)
+
+
+ENGINE_TEST_CLASS_NAME = 'EngineTest'
+
+
+def _snapshot_locals(locals_):
+    snapshot = []
+    for index in range(locals_.length):
+        try:
+            snapshot.append(locals_.load(index))
+        except ValueError:
+            snapshot.append(None)
+    return snapshot
+
+
+def _snapshot_frames(machine):
+    return [
+        (frame.method_name, frame.pc, list(frame.op_stack), _snapshot_locals(frame.locals))
+        for frame in machine.frames
+    ]
+
+
+def _fresh(values, default):
+    if values is None:
+        return default
+    if callable(values):
+        return values()
+    return values
+
+
+def engine_results(instruction, op_stack=(), locals_values=None, constants=None, loader_factory=dummy_loader):
+    """Execute `instruction` once with every engine and return a dictionary from engines to the resulting state
+
+    The instruction executes in a frame that sits on top of another frame, so returns and invocations can be compared.
+    The state is a list that describes all the frames, or the name of the class of an exception that was unhandled.
+    The other arguments follow the conventions of `DefaultInputs`, `locals_values` is a dict from indexes to values.
+    Since instructions may mutate values (arrays, for example), `op_stack` and `locals_values` can also be
+    functions that return fresh values. They will be called once per engine.
+    The values are unboxed for the unboxed engine, so its state holds unboxed values, see instructions/unboxed.py.
+    """
+    if isinstance(instruction, str):
+        instruction = Instruction.create(instruction)
+    if constants is None:
+        constants = ConstantPool()
+
+    jvm_class = JvmClass(ENGINE_TEST_CLASS_NAME, RootObjectType.refers_to, constants)
+    nop = Instruction.create('nop')
+    caller = BytecodeMethod(
+        name='caller',
+        descriptor='()V',
+        instructions=[nop, named_tuple_replace(nop, pos=1)],
+        max_locals=0,
+        max_stack=5,
+        args=[]
+    )
+    method = BytecodeMethod(
+        name='method',
+        descriptor='()V',
+        instructions=[instruction, named_tuple_replace(nop, pos=instruction.pos + 100)],
+        max_locals=5,
+        max_stack=10,
+        args=[]
+    )
+
+    results = {}
+    for engine in ENGINES:
+        machine = Machine(loader_factory(), engine=engine)
+        machine.frames.push(Frame.from_class_and_method(jvm_class, caller))
+        frame = Frame.from_class_and_method(jvm_class, method)
+        frame.pc = instruction.pos
+        convert = unbox if engine == UNBOXED_ENGINE else _identity
+        for value in reversed(list(_fresh(op_stack, ()))):
+            frame.op_stack.push(convert(value))
+        for index, value in _fresh(locals_values, {}).items():
+            frame.locals.store(index, convert(value))
+        machine.frames.push(frame)
+
+        try:
+            machine.step()
+        except Unhandled as e:
+            results[engine] = e.instance.type.refers_to
+        else:
+            results[engine] = _snapshot_frames(machine)
+
+    return results
+
+
+def assert_engines_agree(instruction, **kwargs):
+    """Assert that all engines have the same effect when executing `instruction`
+
+    The `**kwargs` will be passed to `engine_results`.
+    """
+    results = engine_results(instruction, **kwargs)
+    (_, first), *others = results.items()
+    for engine, result in others:
+        expected = _unboxed_state(first) if engine == UNBOXED_ENGINE else first
+        assert result == expected, f'{engine} engine does not agree when executing {instruction}'
+
+
+def _identity(value):
+    return value
+
+
+def _unboxed_state(state):
+    """Return the state that the unboxed engine should reach when another engine reaches `state`"""
+    if isinstance(state, str):
+        return state
+    return [
+        (method_name, pc, [unbox(v) for v in op_stack], [None if v is None else unbox(v) for v in locals_])
+        for method_name, pc, op_stack, locals_ in state
+    ]